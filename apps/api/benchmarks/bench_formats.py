@@ -0,0 +1,72 @@
+"""Benchmark bytes on the wire and CPU per stream for each streaming format.
+
+Run with ``python benchmarks/bench_formats.py``; every format and encoding
+combination prints one JSON line.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+
+from api.streaming import ENCODERS, StreamCompressor, brotli_available
+
+SENTENCES = (
+    "the model streams each token to the client as soon as it is generated",
+    "so that long answers appear progressively on slow mobile connections",
+)
+
+
+def make_chunks(chunks: int, seed: int = 0) -> list[str]:
+    """Return chunks resembling provider output of one or two words each."""
+    rng = random.Random(seed)  # noqa: S311
+    words = " ".join(SENTENCES).split()
+    return [
+        " ".join(rng.choice(words) for _ in range(rng.randint(1, 2))) + " "
+        for _ in range(chunks)
+    ]
+
+
+def run_stream(media_type: str, encoding: str | None, chunks: list[str]) -> int:
+    """Encode and compress one stream, returning the bytes sent."""
+    encoder = ENCODERS[media_type](str(uuid.uuid4()), str(uuid.uuid4()))
+    compressor = StreamCompressor(encoding) if encoding else None
+    sent = 0
+    for chunk in chunks:
+        frame = encoder.frame(chunk)
+        sent += len(compressor.compress(frame) if compressor else frame)
+    tail = encoder.DONE
+    if compressor:
+        tail = compressor.compress(tail) + compressor.finish()
+    return sent + len(tail)
+
+
+def main() -> None:
+    """Run every combination and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=500)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    encodings = [None, "gzip", *(["br"] if brotli_available() else [])]
+    for media_type in ("text/event-stream", "application/x-ndjson", "text/plain"):
+        for encoding in encodings:
+            started = time.process_time()
+            for _ in range(args.streams):
+                sent = run_stream(media_type, encoding, chunks)
+            cpu = (time.process_time() - started) / args.streams
+            result = {
+                "format": media_type,
+                "encoding": encoding or "identity",
+                "chunks": args.chunks,
+                "bytes_per_stream": sent,
+                "cpu_ms_per_stream": cpu * 1000,
+            }
+            sys.stdout.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Microbenchmarks for the agent and router hot paths, offline.
+
+Runs against a deterministic fake LLM provider, so results only reflect the
+code between the HTTP layer and the model. Every case prints one JSON line;
+pass ``--baseline`` with the output of an earlier run to add the change
+against it. Run with ``uv run python benchmarks/bench_hot_paths.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import timeit
+import uuid
+from collections.abc import Awaitable, Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from agents.llm import FakeProvider, LLMFactory
+from agents.memory import ConversationHistory
+
+LENGTHS = (10, 100, 1_000, 10_000)
+
+Baseline = dict[tuple[str, str], float]
+
+
+def _load_baseline(path: Path | None) -> Baseline:
+    if path is None:
+        return {}
+    results = (json.loads(line) for line in path.read_text().splitlines() if line)
+    return {(r["benchmark"], r["case"]): r["us_per_op"] for r in results}
+
+
+def _report(
+    baseline: Baseline, benchmark: str, case: str, seconds: float, ops: int
+) -> None:
+    result: dict[str, Any] = {
+        "benchmark": benchmark,
+        "case": case,
+        "ops": ops,
+        "us_per_op": seconds / ops * 1e6,
+        "ops_per_second": ops / seconds,
+    }
+    previous = baseline.get((benchmark, case))
+    if previous is not None:
+        result["baseline_us_per_op"] = previous
+        result["change"] = result["us_per_op"] / previous - 1
+    sys.stdout.write(json.dumps(result) + "\n")
+
+
+async def _atime(operation: Callable[[], Awaitable[object]], ops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(ops):
+        await operation()
+    return time.perf_counter() - started
+
+
+def _messages(length: int) -> list[dict[str, str]]:
+    roles = ("user", "assistant")
+    return [{"role": roles[i % 2], "content": f"message {i}"} for i in range(length)]
+
+
+def _history(length: int) -> ConversationHistory:
+    history = ConversationHistory()
+    history.append({"role": "system", "content": "prompt"})
+    for message in _messages(length):
+        history.append(message)
+    return history
+
+
+async def _consume(stream: Any) -> None:  # noqa: ANN401
+    async for _ in stream:
+        pass
+
+
+async def run(args: argparse.Namespace, report: Callable[..., None]) -> None:
+    """Run every case, reporting each result as it completes."""
+    # Import late so the agent picks up the fake provider from the settings
+    from api.routers import chat  # noqa: PLC0415
+
+    agent = chat.get_agent()
+    ops = args.ops
+
+    for length in LENGTHS:
+        messages = _messages(length)
+        # Conversion is linear in the length, so keep the run time level
+        number = max(ops * LENGTHS[0] // length, 10)
+        seconds = timeit.timeit(
+            partial(agent._convert_to_langchain_messages, messages),  # noqa: SLF001
+            number=number,
+        )
+        report("message_conversion", f"{length}_messages", seconds, number)
+
+    user_message = {"role": "user", "content": "hi"}
+    for length in LENGTHS:
+        history = _history(length)
+        seconds = timeit.timeit(
+            partial(agent._prompt_window, history, user_message),  # noqa: SLF001
+            number=ops,
+        )
+        report("history_window", f"{length}_messages", seconds, ops)
+
+    # The graph's own cost is the difference between these two
+    prompt = agent._convert_to_langchain_messages(  # noqa: SLF001
+        [{"role": "system", "content": "prompt"}, user_message]
+    )
+    turns = args.turns
+    seconds = await _atime(partial(agent.llm.ainvoke, prompt), turns)
+    report("graph_invocation", "llm_only", seconds, turns)
+    state = {
+        "messages": [{"role": "system", "content": "prompt"}, user_message],
+        "conversation_id": "bench",
+        "current_response": "",
+        "current_message": "hi",
+    }
+    config = {"configurable": {"thread_id": "bench"}}
+    seconds = await _atime(partial(agent.graph.ainvoke, state, config=config), turns)
+    report("graph_invocation", "graph", seconds, turns)
+
+    seconds = await _atime(lambda: agent.get_response("hi", str(uuid.uuid4())), turns)
+    report("turn", "complete", seconds, turns)
+    seconds = await _atime(
+        lambda: _consume(agent.stream_response("hi", str(uuid.uuid4()))), turns
+    )
+    report("turn", "stream", seconds, turns)
+
+    for media_type in chat.ENCODERS:
+
+        async def stream(media_type: str = media_type) -> None:
+            buffer = chat.start_chat_stream("hi", str(uuid.uuid4()))
+            await _consume(chat.follow_stream(buffer, media_type))
+
+        seconds = await _atime(stream, turns)
+        report("stream_encoding", media_type, seconds, turns)
+
+    await chat.shutdown()
+
+
+def main() -> None:
+    """Parse the options, register the fake provider and run every case."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--response-chars", type=int, default=400)
+    parser.add_argument("--chunk-chars", type=int, default=4)
+    parser.add_argument(
+        "--chunks-per-second",
+        type=float,
+        default=None,
+        help="fake model chunk rate; unlimited by default",
+    )
+    parser.add_argument("--first-token-delay", type=float, default=0.0)
+    parser.add_argument("--baseline", type=Path, default=None)
+    args = parser.parse_args()
+
+    LLMFactory.register_provider(
+        FakeProvider(
+            response_chars=args.response_chars,
+            chunk_chars=args.chunk_chars,
+            chunks_per_second=args.chunks_per_second,
+            first_token_delay_seconds=args.first_token_delay,
+        )
+    )
+    os.environ["LLM_PROVIDER"] = "fake"
+    report = partial(_report, _load_baseline(args.baseline))
+    asyncio.run(run(args, report))
+
+
+if __name__ == "__main__":
+    main()
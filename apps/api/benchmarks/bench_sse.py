@@ -0,0 +1,94 @@
+"""Microbenchmark for SSE frame encoding and chunk coalescing.
+
+Run with ``python benchmarks/bench_sse.py``; every case prints one JSON line.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections.abc import AsyncGenerator
+
+from api.streaming import SSEEncoder, coalesce
+
+CHUNK = "token "
+
+
+def _report(case: str, **values: float) -> None:
+    sys.stdout.write(json.dumps({"case": case, **values}) + "\n")
+
+
+def bench_naive(frames: int, response_id: str, conversation_id: str) -> float:
+    """Encode frames the way the router did before: one dict per chunk."""
+    started = time.perf_counter()
+    for _ in range(frames):
+        response = {
+            "id": response_id,
+            "content": CHUNK,
+            "conversation_id": conversation_id,
+            "role": "assistant",
+        }
+        f"data: {json.dumps(response)}\n\n".encode()
+    return time.perf_counter() - started
+
+
+def bench_encoder(frames: int, response_id: str, conversation_id: str) -> float:
+    """Encode frames with the pre-encoded envelope."""
+    encoder = SSEEncoder(response_id, conversation_id)
+    started = time.perf_counter()
+    for _ in range(frames):
+        encoder.frame(CHUNK)
+    return time.perf_counter() - started
+
+
+async def _burst(chunks: int, interval: float) -> AsyncGenerator[str, None]:
+    for index in range(chunks):
+        if interval and index:
+            await asyncio.sleep(interval)
+        yield CHUNK
+
+
+async def bench_coalesce(chunks: int, interval: float, window: float) -> dict:
+    """Measure frames sent for a stream of evenly spaced chunks."""
+    started = time.perf_counter()
+    first = None
+    frames = 0
+    async for _ in coalesce(_burst(chunks, interval), flush_interval_seconds=window):
+        if first is None:
+            first = time.perf_counter() - started
+        frames += 1
+    return {
+        "chunks": chunks,
+        "frames": frames,
+        "first_frame_ms": (first or 0.0) * 1000,
+        "total_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def main() -> None:
+    """Run every case and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200_000)
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--chunk-interval", type=float, default=0.001)
+    parser.add_argument("--window", type=float, default=0.02)
+    args = parser.parse_args()
+
+    response_id, conversation_id = str(uuid.uuid4()), str(uuid.uuid4())
+    for case, bench in (("naive", bench_naive), ("encoder", bench_encoder)):
+        seconds = bench(args.frames, response_id, conversation_id)
+        _report(
+            f"encode_{case}",
+            frames=args.frames,
+            frames_per_second=args.frames / seconds,
+        )
+
+    for window in (0.0, args.window):
+        result = asyncio.run(bench_coalesce(args.chunks, args.chunk_interval, window))
+        _report("coalesce", window_seconds=window, **result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Startup time of the API: import, readiness and first requests, offline.
+
+Every run starts fresh processes. It times ``import api.main`` in one, then
+starts a server on the fake provider and times it until it answers health
+checks, followed by its first and second chat requests. The first request
+pays for anything deferred to first use. Every case prints one JSON line
+with the median, minimum and maximum over ``--runs`` runs; pass
+``--baseline`` with the output of an earlier run to add the change against
+it. Run with ``uv run python benchmarks/bench_startup.py``.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from api.bench import local_server
+
+_IMPORT = (
+    "import time; started = time.perf_counter(); import api.main; "
+    "print(time.perf_counter() - started)"
+)
+
+Baseline = dict[str, float]
+
+
+def _load_baseline(path: Path | None) -> Baseline:
+    if path is None:
+        return {}
+    results = (json.loads(line) for line in path.read_text().splitlines() if line)
+    return {r["case"]: r["median_ms"] for r in results}
+
+
+def time_import() -> float:
+    """Return the seconds taken to import the application in a new process."""
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", _IMPORT], check=True, capture_output=True, text=True
+    ).stdout
+    return float(output)
+
+
+def time_server() -> dict[str, float]:
+    """Return the seconds a new server takes to be ready and to answer."""
+    timings = {}
+    started = time.perf_counter()
+    with local_server() as url, httpx.Client(base_url=url, timeout=60) as client:
+        timings["server_ready"] = time.perf_counter() - started
+        for case in ("first_request", "second_request"):
+            sent = time.perf_counter()
+            client.post("/api/chat/", json={"message": "hi"}).raise_for_status()
+            timings[case] = time.perf_counter() - sent
+    return timings
+
+
+def main() -> None:
+    """Time every case over the runs and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", type=Path)
+    args = parser.parse_args()
+    baseline = _load_baseline(args.baseline)
+
+    samples: dict[str, list[float]] = {}
+    for _ in range(args.runs):
+        samples.setdefault("import_api_main", []).append(time_import())
+        for case, seconds in time_server().items():
+            samples.setdefault(case, []).append(seconds)
+
+    for case, seconds in samples.items():
+        result = {
+            "benchmark": "startup",
+            "case": case,
+            "runs": args.runs,
+            "median_ms": statistics.median(seconds) * 1000,
+            "min_ms": min(seconds) * 1000,
+            "max_ms": max(seconds) * 1000,
+        }
+        previous = baseline.get(case)
+        if previous is not None:
+            result["baseline_median_ms"] = previous
+            result["change"] = result["median_ms"] / previous - 1
+        sys.stdout.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
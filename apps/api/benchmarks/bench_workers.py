@@ -0,0 +1,132 @@
+"""Throughput of the API against the number of worker processes, offline.
+
+Starts a local server on the fake provider, streaming without delays so that
+the server is CPU-bound, for every worker count, and drives it with closed
+loop streaming users from several client processes. Every worker count
+prints one JSON line with its throughput, its speedup and scaling efficiency
+against the first count, and response latency percentiles. Run with
+``uv run python benchmarks/bench_workers.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from typing import Any
+
+import httpx
+
+from api.bench import (
+    FAKE_LLM_CONFIG_ENV,
+    LoadResult,
+    load_message,
+    local_server,
+    percentiles,
+    stream_turn,
+)
+
+
+async def _client(url: str, args: argparse.Namespace) -> LoadResult:
+    result = LoadResult()
+    deadline = time.monotonic() + args.duration
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    async def user(number: int) -> None:
+        user_id = f"{os.getpid()}-{number}"
+        headers = {"X-Client-Id": f"user-{user_id}"}
+        conversation = 0
+        while time.monotonic() < deadline:
+            conversation_id = uuid.uuid4().hex
+            for turn in range(args.turns):
+                message = load_message(user_id, conversation, turn, args.message_chars)
+                payload = {"message": message, "conversation_id": conversation_id}
+                result.requests += 1
+                try:
+                    await stream_turn(client, payload, headers, result)
+                except httpx.HTTPError:
+                    result.errors += 1
+            conversation += 1
+
+    async with httpx.AsyncClient(
+        base_url=url, limits=limits, timeout=args.timeout
+    ) as client:
+        await asyncio.gather(*(user(n) for n in range(args.concurrency)))
+    return result
+
+
+def _run_client(url: str, args: argparse.Namespace) -> LoadResult:
+    return asyncio.run(_client(url, args))
+
+
+def run_level(workers: int, args: argparse.Namespace) -> dict[str, Any]:
+    """Load a server with ``workers`` workers and summarize its throughput."""
+    fake_config = {"response_chars": args.response_chars, "chunk_chars": 4}
+    env = {FAKE_LLM_CONFIG_ENV: json.dumps(fake_config)}
+    context = multiprocessing.get_context("spawn")
+    with (
+        local_server(env=env, workers=workers) as url,
+        context.Pool(args.clients) as pool,
+    ):
+        started = time.perf_counter()
+        results = pool.starmap(_run_client, [(url, args)] * args.clients)
+        elapsed = time.perf_counter() - started
+
+    response_seconds = [s for r in results for s in r.response_seconds]
+    return {
+        "workers": workers,
+        "requests": sum(r.requests for r in results),
+        "errors": sum(r.errors for r in results),
+        "requests_per_second": len(response_seconds) / elapsed,
+        "response_ms": percentiles(response_seconds),
+    }
+
+
+def _worker_counts(value: str) -> list[int]:
+    return [int(count) for count in value.split(",")]
+
+
+def _default_worker_counts() -> list[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def main() -> None:
+    """Run the benchmark for every worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--workers",
+        type=_worker_counts,
+        default=_default_worker_counts(),
+        help="comma-separated worker counts; powers of two up to the CPUs",
+    )
+    parser.add_argument("--clients", type=int, default=2, help="client processes")
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="users per client process"
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--message-chars", type=int, default=200)
+    parser.add_argument("--response-chars", type=int, default=400)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    first = None
+    for workers in args.workers:
+        report = run_level(workers, args)
+        first = first or report["requests_per_second"]
+        speedup = report["requests_per_second"] / first
+        report["speedup"] = speedup
+        report["efficiency"] = speedup * args.workers[0] / workers
+        sys.stdout.write(json.dumps(report) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
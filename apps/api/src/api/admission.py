@@ -0,0 +1,233 @@
+"""Admission control with priority classes and fair queueing."""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Self
+
+
+class Priority(IntEnum):
+    """Request classes, served in ascending order."""
+
+    INTERACTIVE = 0
+    STANDARD = 1
+    BATCH = 2
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a request cannot be queued or waited too long."""
+
+    def __init__(self, message: str, retry_after_seconds: int) -> None:
+        """Create the error with the suggested ``Retry-After`` in seconds."""
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+@dataclass
+class AdmissionStats:
+    """Counters describing admission, for monitoring and autoscaling."""
+
+    in_flight: int = 0
+    queued: int = 0
+    queued_by_priority: dict[str, int] = field(default_factory=dict)
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        """Return the mean queueing time of admitted requests."""
+        return self.wait_seconds / self.admitted if self.admitted else 0.0
+
+
+class Slot:
+    """An admitted request's claim on capacity, released exactly once."""
+
+    def __init__(self, controller: "AdmissionController") -> None:
+        """Bind the slot to its controller."""
+        self._controller = controller
+        self._acquired_at = controller.clock()
+        self._released = False
+
+    def release(self) -> None:
+        """Return the capacity to the controller."""
+        if not self._released:
+            self._released = True
+            self._controller.release(self._controller.clock() - self._acquired_at)
+
+    async def __aenter__(self) -> Self:
+        """Hold the slot for the enclosed block."""
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Release the slot."""
+        self.release()
+
+
+class _FairQueue:
+    """Waiters served round-robin across clients, then their conversations."""
+
+    def __init__(self) -> None:
+        self._clients: OrderedDict[
+            str, OrderedDict[str, deque[asyncio.Future[None]]]
+        ] = OrderedDict()
+        self.size = 0
+
+    def push(
+        self, client: str, conversation: str, waiter: asyncio.Future[None]
+    ) -> None:
+        flows = self._clients.setdefault(client, OrderedDict())
+        flows.setdefault(conversation, deque()).append(waiter)
+        self.size += 1
+
+    def pop(self) -> asyncio.Future[None]:
+        client, flows = next(iter(self._clients.items()))
+        conversation, waiters = next(iter(flows.items()))
+        waiter = waiters.popleft()
+        self.size -= 1
+        # The served flow and client move behind the others
+        if waiters:
+            flows.move_to_end(conversation)
+        else:
+            del flows[conversation]
+        if flows:
+            self._clients.move_to_end(client)
+        else:
+            del self._clients[client]
+        return waiter
+
+    def remove(
+        self, client: str, conversation: str, waiter: asyncio.Future[None]
+    ) -> None:
+        flows = self._clients.get(client)
+        waiters = flows.get(conversation) if flows is not None else None
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self.size -= 1
+        if not waiters:
+            del flows[conversation]
+        if not flows:
+            del self._clients[client]
+
+
+class AdmissionController:
+    """Bound concurrent requests and queue the excess by priority.
+
+    At most ``max_in_flight`` requests run at once. Others wait in a queue
+    of at most ``max_queue`` requests, where higher priority classes are
+    always served first and, within a class, clients take turns and each
+    client's conversations take turns. Requests are rejected when the queue
+    is full or after waiting ``queue_timeout_seconds``, with a retry delay
+    estimated from recent request durations.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 256,
+        queue_timeout_seconds: float | None = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize an idle controller."""
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.clock = clock
+        self._queues = {priority: _FairQueue() for priority in Priority}
+        self._in_flight = 0
+        self._mean_hold_seconds = 1.0
+        self._stats = AdmissionStats()
+
+    @property
+    def queued(self) -> int:
+        """Return the number of waiting requests."""
+        return sum(queue.size for queue in self._queues.values())
+
+    def retry_after(self) -> int:
+        """Estimate the seconds until a new request could be admitted."""
+        backlog = (self.queued + 1) / self.max_in_flight
+        return max(1, math.ceil(backlog * self._mean_hold_seconds))
+
+    async def acquire(
+        self,
+        priority: Priority = Priority.STANDARD,
+        client: str = "",
+        conversation: str = "",
+        *,
+        bounded: bool = True,
+    ) -> Slot:
+        """Wait for capacity and return the slot to release afterwards.
+
+        Unbounded requests may wait even when the queue is full, for callers
+        that already limit their own concurrency.
+        """
+        if self._in_flight < self.max_in_flight and not self.queued:
+            self._in_flight += 1
+            return self._admit(0.0)
+        if bounded and self.queued >= self.max_queue:
+            self._stats.rejected += 1
+            msg = "Server is at capacity"
+            raise AdmissionRejectedError(msg, self.retry_after())
+
+        queue = self._queues[priority]
+        waiter = asyncio.get_running_loop().create_future()
+        queue.push(client, conversation, waiter)
+        started = self.clock()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+        except TimeoutError:
+            queue.remove(client, conversation, waiter)
+            if waiter.done():
+                # Capacity was handed over just as the wait expired
+                self.release(None)
+            self._stats.timed_out += 1
+            msg = "Timed out waiting for capacity"
+            raise AdmissionRejectedError(msg, self.retry_after()) from None
+        except asyncio.CancelledError:
+            queue.remove(client, conversation, waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            raise
+        return self._admit(self.clock() - started)
+
+    def release(self, held_seconds: float | None) -> None:
+        """Return capacity and hand it to the next waiter, if any."""
+        if held_seconds is not None:
+            self._mean_hold_seconds += 0.1 * (held_seconds - self._mean_hold_seconds)
+        for queue in self._queues.values():
+            while queue.size:
+                waiter = queue.pop()
+                if not waiter.done():
+                    # The slot passes to the waiter without becoming free
+                    waiter.set_result(None)
+                    return
+        self._in_flight -= 1
+
+    def stats(self) -> AdmissionStats:
+        """Return a snapshot of the counters."""
+        return AdmissionStats(
+            in_flight=self._in_flight,
+            queued=self.queued,
+            queued_by_priority={
+                priority.name.lower(): queue.size
+                for priority, queue in self._queues.items()
+            },
+            admitted=self._stats.admitted,
+            rejected=self._stats.rejected,
+            timed_out=self._stats.timed_out,
+            wait_seconds=self._stats.wait_seconds,
+            max_wait_seconds=self._stats.max_wait_seconds,
+        )
+
+    def _admit(self, waited: float) -> Slot:
+        self._stats.admitted += 1
+        self._stats.wait_seconds += waited
+        self._stats.max_wait_seconds = max(self._stats.max_wait_seconds, waited)
+        return Slot(self)
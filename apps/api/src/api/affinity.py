@@ -0,0 +1,553 @@
+"""Conversation-affinity proxy in front of several API worker processes.
+
+Conversation state lives in the memory of the worker that served it, so
+every request of a conversation must reach the same worker. The proxy
+consistent-hashes ``conversation_id`` to a worker and forwards requests to
+it over a Unix socket, streaming responses back as they are produced.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+import uuid
+from bisect import bisect
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from functools import partial
+from http import HTTPStatus
+from typing import Any
+
+import anyio
+import h11
+from starlette.types import Receive, Scope, Send
+
+# Requests naming a worker explicitly, e.g. to scrape its /metrics
+WORKER_HEADER = b"x-worker"
+
+_HOP_BY_HOP = frozenset(
+    {
+        b"connection",
+        b"keep-alive",
+        b"proxy-authenticate",
+        b"proxy-authorization",
+        b"te",
+        b"trailer",
+        b"transfer-encoding",
+        b"upgrade",
+        # Set by the proxy's own server
+        b"date",
+        b"server",
+    }
+)
+
+_RESPONSE_PATH = "/api/chat/stream/"
+
+# Namespace of the conversation ids derived from idempotency keys
+_IDEMPOTENT_CONVERSATIONS = uuid.UUID("0b5e3d4c-6f1a-4c2e-9d7b-3a8f2e1c5d90")
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to nodes.
+
+    Every node owns ``replicas`` points on the ring, so keys spread evenly
+    and changing the number of nodes only moves the keys of the nodes that
+    were added or removed. Hashes are stable across processes.
+    """
+
+    def __init__(self, nodes: int, replicas: int = 128) -> None:
+        """Place ``nodes`` nodes, numbered from zero, on the ring."""
+        points = sorted(
+            (self._hash(f"{node}:{replica}"), node)
+            for node in range(nodes)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest)
+
+    def node(self, key: str) -> int:
+        """Return the node owning ``key``."""
+        index = bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class _Upstream:
+    """One keep-alive HTTP/1.1 connection to a worker."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.connection = h11.Connection(h11.CLIENT)
+        self.released_at = 0.0
+
+    async def send(self, event: Any) -> None:  # noqa: ANN401
+        if data := self.connection.send(event):
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def next_event(self) -> Any:  # noqa: ANN401
+        while True:
+            event = self.connection.next_event()
+            if event is not h11.NEED_DATA:
+                return event
+            self.connection.receive_data(await self.reader.read(65536))
+
+    @property
+    def reusable(self) -> bool:
+        return (
+            self.connection.our_state is h11.DONE
+            and self.connection.their_state is h11.DONE
+        )
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class WorkerClient:
+    """Pool of keep-alive connections to the Unix socket of one worker.
+
+    The worker closes connections left idle past its keep-alive timeout, so
+    connections idle for ``idle_timeout`` seconds are not reused, and a
+    request whose reused connection fails before any response is sent again
+    on a new one.
+    """
+
+    def __init__(
+        self, path: str, max_idle: int = 64, idle_timeout: float | None = None
+    ) -> None:
+        """Create an empty pool for the worker listening on ``path``."""
+        self.path = path
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        # Oldest first
+        self._idle: list[_Upstream] = []
+
+    async def _acquire(self) -> tuple[_Upstream, bool]:
+        """Return a connection and whether it was reused."""
+        if self._idle:
+            upstream = self._idle.pop()
+            idle = time.monotonic() - upstream.released_at
+            if self.idle_timeout is None or idle < self.idle_timeout:
+                return upstream, True
+            # The others have been idle even longer
+            upstream.close()
+            self.close()
+        reader, writer = await asyncio.open_unix_connection(self.path)
+        return _Upstream(reader, writer), False
+
+    def _release(self, upstream: _Upstream) -> None:
+        if upstream.reusable and len(self._idle) < self.max_idle:
+            upstream.connection.start_next_cycle()
+            upstream.released_at = time.monotonic()
+            self._idle.append(upstream)
+        else:
+            upstream.close()
+
+    async def _start(
+        self,
+        method: str,
+        target: bytes,
+        headers: list[tuple[bytes, bytes]],
+        body: bytes,
+    ) -> tuple[_Upstream, h11.Response]:
+        """Send a request and return its connection and response head."""
+        while True:
+            upstream, reused = await self._acquire()
+            try:
+                await upstream.send(
+                    h11.Request(
+                        method=method,
+                        target=target,
+                        headers=[
+                            *headers,
+                            (b"content-length", str(len(body)).encode()),
+                        ],
+                    )
+                )
+                await upstream.send(h11.Data(data=body))
+                await upstream.send(h11.EndOfMessage())
+                event = await upstream.next_event()
+                while isinstance(event, h11.InformationalResponse):
+                    event = await upstream.next_event()
+            except (OSError, h11.ProtocolError):
+                upstream.close()
+                if not reused:
+                    raise
+                # Closed by the worker while idle; the others may be too
+                self.close()
+                continue
+            except BaseException:
+                upstream.close()
+                raise
+            return upstream, event
+
+    async def request(  # noqa: PLR0913
+        self,
+        method: str,
+        target: bytes,
+        headers: list[tuple[bytes, bytes]],
+        body: bytes,
+        *,
+        on_response: Callable[[int, list[tuple[bytes, bytes]]], Awaitable[None]],
+        on_data: Callable[[bytes], Awaitable[None]],
+    ) -> None:
+        """Send a request and pass on the response as it arrives.
+
+        Connections whose exchange was interrupted, for example because the
+        client went away, are closed so the worker sees the disconnect.
+        """
+        upstream, event = await self._start(method, target, headers, body)
+        try:
+            await on_response(event.status_code, list(event.headers))
+            while not isinstance(
+                event := await upstream.next_event(), h11.EndOfMessage
+            ):
+                if isinstance(event, h11.Data):
+                    await on_data(bytes(event.data))
+        except BaseException:
+            upstream.close()
+            raise
+        self._release(upstream)
+
+    def close(self) -> None:
+        """Close idle connections."""
+        for upstream in self._idle:
+            upstream.close()
+        self._idle.clear()
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise anyio.get_cancelled_exc_class()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+class AffinityProxy:
+    """ASGI application routing each conversation to the same worker.
+
+    Chat requests without a ``conversation_id`` are given a new one here, so
+    that their follow-ups hash to the worker that started them. Resumed
+    streams go to the worker that produced the response, and batches are
+    split by worker with their results merged into one NDJSON stream.
+    Other requests are spread across workers in turn, unless an
+    ``X-Worker`` header names one.
+    """
+
+    def __init__(
+        self,
+        sockets: Sequence[str],
+        max_responses: int = 65_536,
+        lifespan: Callable[[], Any] | None = None,
+        idle_timeout: float | None = None,
+    ) -> None:
+        """Route requests to workers listening on ``sockets``.
+
+        ``lifespan`` is an async context manager factory run while the
+        proxy is serving, for example to supervise the worker processes.
+        ``idle_timeout`` should be below the workers' keep-alive timeout.
+        """
+        self.workers = [
+            WorkerClient(path, idle_timeout=idle_timeout) for path in sockets
+        ]
+        self.ring = HashRing(len(self.workers))
+        self.max_responses = max_responses
+        self._lifespan = lifespan
+        self._turn = itertools.cycle(range(len(self.workers)))
+        # Response id -> worker holding its buffer, for resumed streams
+        self._responses: OrderedDict[str, int] = OrderedDict()
+
+    def worker_for(self, conversation_id: str) -> int:
+        """Return the worker owning a conversation."""
+        return self.ring.node(conversation_id)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve one ASGI connection."""
+        if scope["type"] == "lifespan":
+            await self._serve_lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._serve_http(scope, receive, send)
+
+    async def _serve_lifespan(self, receive: Receive, send: Send) -> None:
+        await receive()
+        if self._lifespan is None:
+            await send({"type": "lifespan.startup.complete"})
+            await receive()
+        else:
+            async with self._lifespan():
+                await send({"type": "lifespan.startup.complete"})
+                await receive()
+        for worker in self.workers:
+            worker.close()
+        await send({"type": "lifespan.shutdown.complete"})
+
+    async def _serve_http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = await _read_body(receive)
+        async with anyio.create_task_group() as task_group:
+
+            async def forward() -> None:
+                await self._route(scope, body, send)
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(forward)
+            # Cancel the exchange, closing the worker connection, on disconnect
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            task_group.cancel_scope.cancel()
+
+    async def _route(self, scope: Scope, body: bytes, send: Send) -> None:
+        method, path = scope["method"], scope["path"]
+        headers = [
+            (k, v)
+            for k, v in scope["headers"]
+            if k not in _HOP_BY_HOP and k != b"content-length"
+        ]
+        named = dict(headers)
+        explicit = named.get(WORKER_HEADER)
+
+        worker = None
+        if explicit is not None and explicit.isdigit():
+            worker = int(explicit) % len(self.workers)
+        elif method == "POST" and path in ("/api/chat/", "/api/chat/stream"):
+            payload = _json_object(body)
+            # Invalid requests go to any worker, to be rejected there
+            if payload is not None and _routable(payload):
+                if not payload.get("conversation_id"):
+                    payload["conversation_id"] = _new_conversation_id(
+                        named.get(b"idempotency-key")
+                    )
+                    body = json.dumps(payload).encode()
+                worker = self.worker_for(payload["conversation_id"])
+        elif method == "POST" and path == "/api/chat/batch":
+            await self._route_batch(scope, headers, body, send)
+            return
+        elif method == "GET" and path.startswith(_RESPONSE_PATH):
+            worker = self._responses.get(path.removeprefix(_RESPONSE_PATH))
+        if worker is None:
+            worker = next(self._turn)
+        await self._exchange(worker, scope, headers, body, send)
+
+    async def _exchange(
+        self,
+        worker: int,
+        scope: Scope,
+        headers: list[tuple[bytes, bytes]],
+        body: bytes,
+        send: Send,
+    ) -> None:
+        """Forward a request to a worker and relay its response."""
+        target = scope["raw_path"]
+        if scope["query_string"]:
+            target += b"?" + scope["query_string"]
+        started = False
+
+        async def on_response(status: int, response: list[tuple[bytes, bytes]]) -> None:
+            nonlocal started
+            response = [(k, v) for k, v in response if k not in _HOP_BY_HOP]
+            response_id = dict(response).get(b"x-response-id")
+            if response_id is not None:
+                self._remember(response_id.decode(), worker)
+            started = True
+            await send(
+                {"type": "http.response.start", "status": status, "headers": response}
+            )
+
+        async def on_data(data: bytes) -> None:
+            await send({"type": "http.response.body", "body": data, "more_body": True})
+
+        try:
+            await self.workers[worker].request(
+                scope["method"],
+                target,
+                headers,
+                body,
+                on_response=on_response,
+                on_data=on_data,
+            )
+        except (OSError, h11.ProtocolError):
+            if not started:
+                await _send_json(
+                    send, HTTPStatus.BAD_GATEWAY, {"detail": "Worker unavailable"}
+                )
+                return
+            # The worker failed mid-response; end it where it stopped
+        await send({"type": "http.response.body", "body": b""})
+
+    def _remember(self, response_id: str, worker: int) -> None:
+        self._responses[response_id] = worker
+        if len(self._responses) > self.max_responses:
+            self._responses.popitem(last=False)
+
+    async def _route_batch(
+        self,
+        scope: Scope,
+        headers: list[tuple[bytes, bytes]],
+        body: bytes,
+        send: Send,
+    ) -> None:
+        """Split a batch by worker and merge the results as they complete."""
+        payload = _json_object(body)
+        items = payload.get("items") if payload is not None else None
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict) and _routable(item) for item in items
+        ):
+            # Invalid batches are rejected, unchanged, by any worker
+            await self._exchange(next(self._turn), scope, headers, body, send)
+            return
+        groups: dict[int, list[int]] = {}
+        for index, item in enumerate(items):
+            if not item.get("conversation_id"):
+                item["conversation_id"] = str(uuid.uuid4())
+            worker = self.worker_for(item["conversation_id"])
+            groups.setdefault(worker, []).append(index)
+        body = json.dumps(payload).encode()
+        if len(groups) <= 1:
+            await self._exchange(next(iter(groups), 0), scope, headers, body, send)
+            return
+
+        # Results are re-indexed, so sub-batches must arrive uncompressed
+        headers = [(k, v) for k, v in headers if k != b"accept-encoding"]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": HTTPStatus.OK,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            }
+        )
+        lock = asyncio.Lock()
+
+        async def emit(result: dict[str, Any]) -> None:
+            line = json.dumps(result).encode() + b"\n"
+            async with lock:
+                await send(
+                    {"type": "http.response.body", "body": line, "more_body": True}
+                )
+
+        async with anyio.create_task_group() as task_group:
+            for worker, indexes in groups.items():
+                run = partial(
+                    self._sub_batch,
+                    worker,
+                    indexes,
+                    scope=scope,
+                    headers=headers,
+                    payload=payload,
+                    emit=emit,
+                )
+                task_group.start_soon(run)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _sub_batch(  # noqa: PLR0913
+        self,
+        worker: int,
+        indexes: list[int],
+        *,
+        scope: Scope,
+        headers: list[tuple[bytes, bytes]],
+        payload: dict[str, Any],
+        emit: Callable[[dict[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Run the items at ``indexes`` on one worker, emitting their results."""
+        items = payload["items"]
+        body = json.dumps({**payload, "items": [items[i] for i in indexes]})
+        status = HTTPStatus.OK
+        pending = b""
+
+        async def on_response(code: int, _: list[tuple[bytes, bytes]]) -> None:
+            nonlocal status
+            status = HTTPStatus(code)
+
+        async def on_data(data: bytes) -> None:
+            nonlocal pending
+            pending += data
+            if status != HTTPStatus.OK:
+                return
+            *lines, pending = pending.split(b"\n")
+            for line in filter(None, lines):
+                result = json.loads(line)
+                result["index"] = indexes[result["index"]]
+                await emit(result)
+
+        try:
+            await self.workers[worker].request(
+                "POST",
+                scope["raw_path"],
+                headers,
+                body.encode(),
+                on_response=on_response,
+                on_data=on_data,
+            )
+        except (OSError, h11.ProtocolError):
+            error = "Worker unavailable"
+        else:
+            if status == HTTPStatus.OK:
+                return
+            error = _error_detail(pending, status)
+        for i in indexes:
+            await emit(
+                {
+                    "index": i,
+                    "conversation_id": items[i]["conversation_id"],
+                    "content": None,
+                    "error": error,
+                    "latency_seconds": 0.0,
+                }
+            )
+
+
+def _json_object(body: bytes) -> dict[str, Any] | None:
+    """Return the JSON object in a request body, or None if there is none."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _new_conversation_id(idempotency_key: bytes | None) -> str:
+    """Return an id for a new conversation.
+
+    Retries of a request carry its idempotency key, and get the same id so
+    that they reach the worker remembering the request, and match it there.
+    """
+    if idempotency_key is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(_IDEMPOTENT_CONVERSATIONS, idempotency_key.hex()))
+
+
+def _routable(payload: dict[str, Any]) -> bool:
+    """Return whether a chat request's conversation id is empty or a string."""
+    conversation_id = payload.get("conversation_id")
+    return not conversation_id or isinstance(conversation_id, str)
+
+
+def _error_detail(body: bytes, status: HTTPStatus) -> str:
+    """Return the detail of a FastAPI error response."""
+    try:
+        detail = json.loads(body)["detail"]
+    except (ValueError, KeyError, TypeError):
+        return status.phrase
+    return detail if isinstance(detail, str) else json.dumps(detail)
+
+
+async def _send_json(send: Send, status: int, content: dict[str, Any]) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(content).encode()})
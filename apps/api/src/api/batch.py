@@ -0,0 +1,66 @@
+"""Concurrent execution of batched chat requests."""
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable, Sequence
+
+from api.models import BatchChatResult, ChatRequest
+
+ChatHandler = Callable[[str, str], Awaitable[str]]
+
+
+async def run_batch(
+    items: Sequence[ChatRequest],
+    handler: ChatHandler,
+    concurrency: int,
+    new_conversation_id: Callable[[], str],
+) -> AsyncGenerator[BatchChatResult, None]:
+    """Run chat requests with at most ``concurrency`` in flight.
+
+    Results are yielded in completion order, each tagged with the index of
+    its request. A failing request yields a result with ``error`` set
+    instead of stopping the batch. Closing the generator cancels the
+    requests still running.
+    """
+    pending: asyncio.Queue[tuple[int, ChatRequest]] = asyncio.Queue()
+    for index, item in enumerate(items):
+        pending.put_nowait((index, item))
+    # Each worker puts None once it runs out of requests
+    results: asyncio.Queue[BatchChatResult | None] = asyncio.Queue()
+
+    async def worker() -> None:
+        while not pending.empty():
+            index, item = pending.get_nowait()
+            conversation_id = item.conversation_id or new_conversation_id()
+            started = time.perf_counter()
+            content = error = None
+            try:
+                content = await handler(item.message, conversation_id)
+            except Exception as e:  # noqa: BLE001
+                error = f"{type(e).__name__}: {e}"
+            results.put_nowait(
+                BatchChatResult(
+                    index=index,
+                    conversation_id=conversation_id,
+                    content=content,
+                    error=error,
+                    latency_seconds=time.perf_counter() - started,
+                )
+            )
+        results.put_nowait(None)
+
+    workers = [
+        asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))
+    ]
+    try:
+        remaining = len(workers)
+        while remaining:
+            result = await results.get()
+            if result is None:
+                remaining -= 1
+            else:
+                yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
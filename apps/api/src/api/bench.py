@@ -0,0 +1,352 @@
+"""Load generator for the chat API, installed as ``api-bench``.
+
+Simulated users hold conversations through the complete-response and
+streaming endpoints at increasing concurrency. Unless ``--url`` names a
+running server, a local one is started on the offline fake provider. Every
+concurrency level prints one JSON line with throughput, latency
+percentiles, and the server's CPU time and memory read from ``/metrics``.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from agents.llm import FakeProvider, LLMFactory, LLMProvider
+from fastapi import FastAPI
+
+# JSON object of FakeProvider arguments for the server started by api-bench
+FAKE_LLM_CONFIG_ENV = "FAKE_LLM_CONFIG"
+
+PERCENTILES = (50, 90, 99)
+
+_PROCESS_METRICS = ("process_cpu_seconds_total", "process_resident_memory_bytes")
+
+
+def create_app(provider: LLMProvider) -> FastAPI:
+    """Build the API application serving every request from ``provider``."""
+    LLMFactory.register_provider(provider)
+    os.environ["LLM_PROVIDER"] = provider.provider_name
+    # The router reads the settings, and so the provider, on import
+    from api.main import app  # noqa: PLC0415
+
+    return app
+
+
+def create_fake_app() -> FastAPI:
+    """Build the API application on the fake provider.
+
+    Used as a uvicorn app factory; the provider is paced by the
+    ``FAKE_LLM_CONFIG`` environment variable.
+    """
+    config = json.loads(os.environ.get(FAKE_LLM_CONFIG_ENV, "{}"))
+    return create_app(FakeProvider(**config))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            msg = f"Server exited with status {process.returncode}"
+            raise RuntimeError(msg)
+        with suppress(httpx.TransportError):
+            if httpx.get(f"{url}/health").is_success:
+                return
+        time.sleep(0.1)
+    msg = f"Server did not start within {timeout} seconds"
+    raise RuntimeError(msg)
+
+
+@contextmanager
+def local_server(
+    app_factory: str = "api.bench:create_fake_app",
+    env: dict[str, str] | None = None,
+    extra_args: list[str] | None = None,
+    startup_timeout: float = 30.0,
+    workers: int = 1,
+) -> Iterator[str]:
+    """Run the API from a uvicorn app factory in a child process.
+
+    ``env`` adds to the environment of the server, and the context yields
+    its URL once it answers health checks. With several ``workers``, the
+    server runs behind the conversation-affinity proxy of ``api.workers``.
+    """
+    port = _free_port()
+    if workers > 1:
+        command = [
+            sys.executable,
+            "-m",
+            "api.workers",
+            app_factory,
+            "--factory",
+            "--log-level",
+            "warning",
+        ]
+        env = {
+            "SERVER_HOST": "127.0.0.1",
+            "SERVER_PORT": str(port),
+            "SERVER_WORKERS": str(workers),
+            **(env or {}),
+        }
+    else:
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app_factory,
+            "--factory",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            *(extra_args or []),
+        ]
+    process = subprocess.Popen(command, env={**os.environ, **(env or {})})  # noqa: S603
+    url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_ready(url, process, startup_timeout)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """Return nearest-rank percentiles of latencies in milliseconds."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        f"p{q}": ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)] * 1000
+        for q in PERCENTILES
+    }
+
+
+def parse_metrics(text: str, names: tuple[str, ...]) -> dict[str, float]:
+    """Return the values of unlabelled metrics from the Prometheus text format."""
+    values = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in names:
+            values[name] = float(value)
+    return values
+
+
+@dataclass
+class LoadResult:
+    """Latencies and failures collected over one load level."""
+
+    requests: int = 0
+    errors: int = 0
+    first_token_seconds: list[float] = field(default_factory=list)
+    response_seconds: list[float] = field(default_factory=list)
+
+
+async def stream_turn(
+    client: httpx.AsyncClient,
+    payload: dict[str, Any],
+    headers: dict[str, str],
+    result: LoadResult,
+) -> None:
+    """Send one streamed turn, recording its first-token and total latency."""
+    started = time.perf_counter()
+    first = None
+    request = client.stream("POST", "/api/chat/stream", json=payload, headers=headers)
+    async with request as response:
+        if response.status_code != httpx.codes.OK:
+            result.errors += 1
+            return
+        async for line in response.aiter_lines():
+            if first is None and line.startswith("data:"):
+                first = time.perf_counter() - started
+    if first is not None:
+        result.first_token_seconds.append(first)
+    result.response_seconds.append(time.perf_counter() - started)
+
+
+async def complete_turn(
+    client: httpx.AsyncClient,
+    payload: dict[str, Any],
+    headers: dict[str, str],
+    result: LoadResult,
+) -> None:
+    """Send one complete-response turn, recording its latency."""
+    started = time.perf_counter()
+    response = await client.post("/api/chat/", json=payload, headers=headers)
+    if response.status_code != httpx.codes.OK:
+        result.errors += 1
+        return
+    result.response_seconds.append(time.perf_counter() - started)
+
+
+def load_message(user: int | str, conversation: int, turn: int, chars: int) -> str:
+    """Return a message unique to one turn of a user, padded to ``chars``.
+
+    Identical concurrent prompts would be coalesced into one provider call,
+    measuring request coalescing instead of serving capacity.
+    """
+    return f"[{user}.{conversation}.{turn}] ".ljust(chars, "x")
+
+
+async def simulate_user(
+    client: httpx.AsyncClient, user: int, args: argparse.Namespace, result: LoadResult
+) -> None:
+    """Hold ``args.conversations`` conversations of ``args.turns`` turns each."""
+    headers = {"X-Client-Id": f"user-{user}"}
+    for conversation in range(args.conversations):
+        conversation_id = uuid.uuid4().hex
+        for turn in range(args.turns):
+            message = load_message(user, conversation, turn, args.message_chars)
+            payload = {"message": message, "conversation_id": conversation_id}
+            streamed = args.mode == "stream" or (args.mode == "mixed" and turn % 2)
+            send = stream_turn if streamed else complete_turn
+            result.requests += 1
+            try:
+                await send(client, payload, headers, result)
+            except httpx.HTTPError:
+                result.errors += 1
+
+
+async def _process_metrics(client: httpx.AsyncClient) -> dict[str, float]:
+    response = await client.get("/metrics")
+    return parse_metrics(response.text, _PROCESS_METRICS)
+
+
+async def _sample_memory(
+    client: httpx.AsyncClient, interval: float, samples: list[float]
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        with suppress(httpx.HTTPError):
+            metrics = await _process_metrics(client)
+            samples.append(metrics["process_resident_memory_bytes"])
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    load: Callable[[LoadResult], Awaitable[object]],
+    sample_interval: float,
+) -> dict[str, Any]:
+    """Apply a load to the server and summarize its latency and resource use."""
+    result = LoadResult()
+    memory: list[float] = []
+    before = await _process_metrics(client)
+    sampler = asyncio.create_task(_sample_memory(client, sample_interval, memory))
+    started = time.perf_counter()
+    await load(result)
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    after = await _process_metrics(client)
+
+    completed = len(result.response_seconds)
+    cpu = after["process_cpu_seconds_total"] - before["process_cpu_seconds_total"]
+    rss_start = before["process_resident_memory_bytes"]
+    rss_end = after["process_resident_memory_bytes"]
+    return {
+        "requests": result.requests,
+        "errors": result.errors,
+        "seconds": elapsed,
+        "requests_per_second": completed / elapsed,
+        "first_token_ms": percentiles(result.first_token_seconds),
+        "response_ms": percentiles(result.response_seconds),
+        "server_cpu_ms_per_request": cpu / completed * 1000 if completed else None,
+        "server_cpu_utilization": cpu / elapsed,
+        "rss_start_bytes": rss_start,
+        "rss_end_bytes": rss_end,
+        "rss_growth_bytes": rss_end - rss_start,
+        "rss_samples_bytes": memory,
+    }
+
+
+async def run_level(
+    client: httpx.AsyncClient, users: int, args: argparse.Namespace
+) -> dict[str, Any]:
+    """Run ``users`` simulated users to completion and summarize the load."""
+
+    async def load(result: LoadResult) -> None:
+        await asyncio.gather(
+            *(simulate_user(client, user, args, result) for user in range(users))
+        )
+
+    return {"users": users, **await measure(client, load, args.sample_interval)}
+
+
+async def run(url: str, args: argparse.Namespace) -> None:
+    """Run every concurrency level against ``url``, printing each result."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=url, limits=limits, timeout=args.timeout
+    ) as client:
+        for users in args.users:
+            report = await run_level(client, users, args)
+            sys.stdout.write(json.dumps(report) + "\n")
+            sys.stdout.flush()
+
+
+def _user_counts(value: str) -> list[int]:
+    return [int(count) for count in value.split(",")]
+
+
+def main() -> None:
+    """Parse the options, start a local server if needed and apply the load."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running server; a local one by default")
+    parser.add_argument(
+        "--users",
+        type=_user_counts,
+        default=[1, 8, 32, 128],
+        help="comma-separated concurrency levels",
+    )
+    parser.add_argument("--conversations", type=int, default=2)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--message-chars", type=int, default=200)
+    parser.add_argument(
+        "--mode", choices=("stream", "complete", "mixed"), default="stream"
+    )
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    fake = parser.add_argument_group("fake provider of the local server")
+    fake.add_argument("--response-chars", type=int, default=400)
+    fake.add_argument("--chunk-chars", type=int, default=4)
+    fake.add_argument("--chunks-per-second", type=float, default=50.0)
+    fake.add_argument("--first-token-delay", type=float, default=0.3)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args.url, args))
+        return
+    fake_config = {
+        "response_chars": args.response_chars,
+        "chunk_chars": args.chunk_chars,
+        "chunks_per_second": args.chunks_per_second,
+        "first_token_delay_seconds": args.first_token_delay,
+    }
+    with local_server(env={FAKE_LLM_CONFIG_ENV: json.dumps(fake_config)}) as url:
+        asyncio.run(run(url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
 """CLI entry point for the API server."""
 
 import uvicorn
+from agents.config import get_settings
+
+from api.workers import serve, server_options
 
 
 def main() -> None:
-    """Run the API server."""
+    """Run the API server, with an affinity proxy if several workers are set."""
+    settings = get_settings()
+    if settings.server_workers > 1:
+        serve(settings)
+        return
     uvicorn.run(
-        "api.main:app", host="0.0.0.0", port=8001, reload=False, log_level="info"
+        "api.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        reload=False,
+        log_level="info",
+        **server_options(settings),
     )
 
 
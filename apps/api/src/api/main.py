@@ -1,14 +1,29 @@
 """FastAPI main application for chat API."""
 
-from fastapi import FastAPI
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from agents.telemetry import CONTENT_TYPE, REGISTRY
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from .middleware import RequestIdMiddleware
 from .routers import chat
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Build the agent on startup and release its resources on shutdown."""
+    await chat.startup()
+    yield
+    await chat.shutdown()
+
+
 app = FastAPI(
     title="Chat API",
     description="Streaming chat API with LangGraph agents",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -21,8 +36,18 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "Accept"],
+    allow_headers=[
+        "Content-Type",
+        "Authorization",
+        "Accept",
+        "Idempotency-Key",
+        "Last-Event-ID",
+        "X-Client-Id",
+        "X-Request-Id",
+    ],
+    expose_headers=["X-Response-Id", "X-Request-Id", "Retry-After"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 
@@ -37,3 +62,9 @@ async def root() -> dict[str, str]:
 async def health() -> dict[str, str]:
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus metrics endpoint."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
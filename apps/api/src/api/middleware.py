@@ -0,0 +1,48 @@
+"""ASGI middleware shared by every endpoint."""
+
+import uuid
+
+from agents.telemetry import request_id_var
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Longer client-supplied ids are replaced by a generated one
+_MAX_REQUEST_ID_LENGTH = 128
+
+
+class RequestIdMiddleware:
+    """Tag every HTTP request with an id for tracing and log correlation.
+
+    The id is taken from the ``X-Request-Id`` request header or generated,
+    made available to the agent's spans and echoed in the response headers.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI application."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve a request with its id bound."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = (
+            dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        )
+        if not request_id or len(request_id) > _MAX_REQUEST_ID_LENGTH:
+            request_id = uuid.uuid4().hex
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [*message.get("headers", [])]
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
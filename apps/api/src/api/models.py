@@ -1,6 +1,6 @@
 """Pydantic models for API requests and responses."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ChatMessage(BaseModel):
@@ -23,3 +23,20 @@ class ChatResponse(BaseModel):
     content: str
     conversation_id: str
     role: str = "assistant"
+
+
+class BatchChatRequest(BaseModel):
+    """Batch chat request model."""
+
+    items: list[ChatRequest] = Field(min_length=1)
+    max_concurrency: int | None = Field(default=None, gt=0)
+
+
+class BatchChatResult(BaseModel):
+    """Result of one item of a batch chat request."""
+
+    index: int
+    conversation_id: str
+    content: str | None = None
+    error: str | None = None
+    latency_seconds: float
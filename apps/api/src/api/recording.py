@@ -0,0 +1,132 @@
+"""Opt-in recording of anonymised traffic for replaying it locally."""
+
+import json
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any
+
+from agents.telemetry import LineWriter
+
+
+class TrafficRecorder:
+    """Append the shape and timing of every chat request to a JSON-lines file.
+
+    Recordings hold no message text or identifiers. Each line gives the
+    request's arrival in seconds since recording started, its endpoint, a
+    conversation number, the turns already seen in that conversation, the
+    message length, and the delay before and the size of every response
+    chunk. Lines are written by a background thread, so that recording
+    does not delay the event loop and skew the timings it records. Without
+    a path the recorder is disabled and returns responses untouched.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_conversations: int = 65_536,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Open the recording for appending, unless ``path`` is None.
+
+        Conversation numbers are kept for the ``max_conversations`` most
+        recent conversations; an older one is numbered anew if it returns.
+        """
+        self.path = Path(path) if path is not None else None
+        self.max_conversations = max_conversations
+        self._clock = clock
+        self._started = clock()
+        self._next_number = 0
+        # Conversation id -> [conversation number, turns seen]
+        self._conversations: OrderedDict[str, list[int]] = OrderedDict()
+        self._writer = LineWriter(self.path) if self.path is not None else None
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether requests are recorded."""
+        return self._writer is not None
+
+    def _begin(
+        self, endpoint: str, message: str, conversation_id: str
+    ) -> dict[str, Any]:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = self._conversations[conversation_id] = [self._next_number, 0]
+            self._next_number += 1
+            if len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+        else:
+            self._conversations.move_to_end(conversation_id)
+        number, depth = conversation
+        conversation[1] += 1
+        return {
+            "at": round(self._clock() - self._started, 4),
+            "endpoint": endpoint,
+            "conversation": number,
+            "depth": depth,
+            "message_chars": len(message),
+            "delays": [],
+            "sizes": [],
+            "complete": False,
+        }
+
+    def _write(self, record: dict[str, Any]) -> None:
+        if self._writer is not None:
+            self._writer.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def record_stream(
+        self,
+        endpoint: str,
+        message: str,
+        conversation_id: str,
+        chunks: AsyncGenerator[str, None],
+    ) -> AsyncGenerator[str, None]:
+        """Record a streamed response as its chunks pass through."""
+        if self._writer is None:
+            return chunks
+        return self._timed(self._begin(endpoint, message, conversation_id), chunks)
+
+    async def _timed(
+        self, record: dict[str, Any], chunks: AsyncGenerator[str, None]
+    ) -> AsyncGenerator[str, None]:
+        last = self._clock()
+        try:
+            async with aclosing(chunks) as stream:
+                async for chunk in stream:
+                    now = self._clock()
+                    record["delays"].append(round(now - last, 4))
+                    record["sizes"].append(len(chunk))
+                    last = now
+                    yield chunk
+            record["complete"] = True
+        finally:
+            self._write(record)
+
+    async def record_response(
+        self,
+        endpoint: str,
+        message: str,
+        conversation_id: str,
+        response: Awaitable[str],
+    ) -> str:
+        """Record a complete response as one chunk once it is generated."""
+        if self._writer is None:
+            return await response
+        record = self._begin(endpoint, message, conversation_id)
+        started = self._clock()
+        try:
+            content = await response
+            record["delays"].append(round(self._clock() - started, 4))
+            record["sizes"].append(len(content))
+            record["complete"] = True
+        finally:
+            self._write(record)
+        return content
+
+    def close(self) -> None:
+        """Write the queued records and close the recording."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,166 @@
+"""Replay a traffic recording against the API, installed as ``api-replay``.
+
+Requests are sent at their recorded arrival times, with messages of the
+recorded length in the recorded conversations, to a local server whose fake
+provider reproduces the recorded chunk timings of every response. The result
+is printed as one JSON line, so that runs of different builds under the same
+recording can be compared.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+import httpx
+from agents.llm import ChunkProfile, FakeProvider
+from agents.llm.fake import ProfileSelector
+from fastapi import FastAPI
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from api.bench import (
+    LoadResult,
+    complete_turn,
+    create_app,
+    local_server,
+    measure,
+    stream_turn,
+)
+
+# Path of the recording replayed by the server started by api-replay
+REPLAY_RECORDING_ENV = "REPLAY_RECORDING"
+
+_MARKER = re.compile(r"\[replay (\d+)\]")
+
+
+def load_recording(path: str | Path) -> list[dict[str, Any]]:
+    """Read a recording, ordered by arrival."""
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines if line]
+    return sorted(records, key=lambda record: record["at"])
+
+
+def replay_message(index: int, chars: int) -> str:
+    """Return a message of ``chars`` characters naming recorded request ``index``."""
+    return f"[replay {index}] ".ljust(chars, "x")
+
+
+def profile_selector(
+    records: list[dict[str, Any]],
+) -> ProfileSelector:
+    """Return a selector of the recorded profile named by the user message."""
+    profiles = [
+        ChunkProfile(delays=tuple(r["delays"]), sizes=tuple(r["sizes"]))
+        for r in records
+    ]
+
+    def select(messages: list[BaseMessage]) -> ChunkProfile | None:
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                match = _MARKER.match(str(message.content))
+                return profiles[int(match.group(1))] if match else None
+        return None
+
+    return select
+
+
+def create_replay_app() -> FastAPI:
+    """Build the API application on a fake provider replaying a recording.
+
+    Used as a uvicorn app factory; the recording is named by the
+    ``REPLAY_RECORDING`` environment variable.
+    """
+    records = load_recording(os.environ[REPLAY_RECORDING_ENV])
+    return create_app(FakeProvider(profile_for=profile_selector(records)))
+
+
+async def batch_turn(
+    client: httpx.AsyncClient,
+    payload: dict[str, Any],
+    headers: dict[str, str],
+    result: LoadResult,
+) -> None:
+    """Send one turn as a single-item batch, recording its latency."""
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/chat/batch", json={"items": [payload]}, headers=headers
+    )
+    if response.status_code != httpx.codes.OK or json.loads(response.text)["error"]:
+        result.errors += 1
+        return
+    result.response_seconds.append(time.perf_counter() - started)
+
+
+SENDERS = {"stream": stream_turn, "complete": complete_turn, "batch": batch_turn}
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    records: list[dict[str, Any]],
+    speed: float,
+    result: LoadResult,
+) -> None:
+    """Send every recorded request at its arrival time divided by ``speed``."""
+    started = time.monotonic()
+    conversations: dict[int, str] = {}
+
+    async def send(index: int, record: dict[str, Any]) -> None:
+        await asyncio.sleep(started + record["at"] / speed - time.monotonic())
+        conversation = record["conversation"]
+        conversation_id = conversations.setdefault(conversation, uuid.uuid4().hex)
+        payload = {
+            "message": replay_message(index, record["message_chars"]),
+            "conversation_id": conversation_id,
+        }
+        headers = {"X-Client-Id": f"replay-{conversation}"}
+        result.requests += 1
+        try:
+            await SENDERS[record["endpoint"]](client, payload, headers, result)
+        except httpx.HTTPError:
+            result.errors += 1
+
+    await asyncio.gather(*(send(i, record) for i, record in enumerate(records)))
+
+
+async def run(
+    url: str, records: list[dict[str, Any]], args: argparse.Namespace
+) -> None:
+    """Replay the recording against ``url`` and print the summary."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=url, limits=limits, timeout=args.timeout
+    ) as client:
+        summary = await measure(
+            client,
+            lambda result: replay(client, records, args.speed, result),
+            args.sample_interval,
+        )
+    report = {"recording": str(args.recording), "speed": args.speed, **summary}
+    sys.stdout.write(json.dumps(report) + "\n")
+
+
+def main() -> None:
+    """Parse the options, start a replaying server and replay the recording."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="arrival rate multiplier"
+    )
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    records = load_recording(args.recording)
+    env = {REPLAY_RECORDING_ENV: str(args.recording.resolve())}
+    with local_server("api.replay:create_replay_app", env) as url:
+        asyncio.run(run(url, records, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Replayable buffers of streamed responses for resuming dropped streams."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from typing import Any
+
+from api.streaming import HEARTBEAT
+
+logger = logging.getLogger(__name__)
+
+# Time a new response waits for its first follower before it is cancelled
+FIRST_FOLLOWER_SECONDS = 5.0
+
+
+class StreamGapError(LookupError):
+    """Raised when frames a follower needs were dropped from the buffer."""
+
+
+class ResponseBuffer:
+    """Sequence-numbered chunks of one response in a bounded ring buffer.
+
+    The response is generated by a producer task independent of any client
+    connection, and any number of followers can replay the buffered chunks
+    and then receive new ones as they arrive. Sequence numbers start at 1.
+    """
+
+    def __init__(
+        self, response_id: str, conversation_id: str, max_frames: int = 4096
+    ) -> None:
+        """Initialize an empty buffer."""
+        self.response_id = response_id
+        self.conversation_id = conversation_id
+        self.frames: deque[str] = deque(maxlen=max_frames)
+        self.first_seq = 1
+        self.next_seq = 1
+        self.done = False
+        self.error: str | None = None
+        self.finished_at: float | None = None
+        self.followers = 0
+        self.on_idle: Callable[[ResponseBuffer], None] | None = None
+        self._changed = asyncio.Event()
+
+    def available(self, after: int) -> bool:
+        """Return whether every frame after sequence ``after`` is still held."""
+        return after + 1 >= self.first_seq
+
+    def append(self, content: str) -> None:
+        """Add a chunk, dropping the oldest one when the buffer is full."""
+        if len(self.frames) == self.frames.maxlen:
+            self.first_seq += 1
+        self.frames.append(content)
+        self.next_seq += 1
+        self._notify()
+
+    def finish(self, error: str | None = None) -> None:
+        """Mark the response as complete, optionally with an error."""
+        self.done = True
+        self.error = error
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    async def follow(
+        self, after: int = 0, heartbeat_seconds: float | None = None
+    ) -> AsyncGenerator[Any, None]:
+        """Yield ``(seq, content)`` for every chunk after sequence ``after``.
+
+        Buffered chunks are replayed first, then new chunks are yielded until
+        the response is done. ``HEARTBEAT`` is yielded whenever no chunk
+        arrived for ``heartbeat_seconds``.
+        """
+        self.followers += 1
+        seq = after + 1
+        try:
+            while True:
+                if seq < self.first_seq:
+                    msg = f"Frames after {after} are no longer buffered"
+                    raise StreamGapError(msg)
+                while seq < self.next_seq:
+                    yield seq, self.frames[seq - self.first_seq]
+                    seq += 1
+                if self.done:
+                    return
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), heartbeat_seconds)
+                except TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self.followers -= 1
+            if not self.followers and self.on_idle is not None:
+                self.on_idle(self)
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class ResumableStreams:
+    """Run streamed responses in the background and keep them replayable.
+
+    A response keeps generating for ``grace_seconds`` after its last
+    follower left, so a client that reconnects in time picks up the live
+    generation instead of starting a new one; after that it is cancelled.
+    The default of zero cancels it as soon as the client leaves, paying for
+    no tokens nobody reads. Finished responses stay replayable for
+    ``ttl_seconds``, and at most ``max_responses`` responses are indexed at
+    once.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_responses: int = 1024,
+        max_frames: int = 4096,
+        ttl_seconds: float = 60.0,
+        grace_seconds: float = 0.0,
+    ) -> None:
+        """Initialize an empty registry."""
+        self.max_responses = max_responses
+        self.max_frames = max_frames
+        self.ttl_seconds = ttl_seconds
+        self.grace_seconds = grace_seconds
+        self._buffers: OrderedDict[str, ResponseBuffer] = OrderedDict()
+        # Finish times of the finished responses, oldest first
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._reapers: dict[str, asyncio.TimerHandle] = {}
+
+    def __len__(self) -> int:
+        """Return the number of resumable responses."""
+        return len(self._buffers)
+
+    def start(
+        self,
+        response_id: str,
+        conversation_id: str,
+        source: AsyncIterator[str],
+        on_finish: Callable[[], None] | None = None,
+    ) -> ResponseBuffer:
+        """Start producing a response from ``source`` into a new buffer.
+
+        ``on_finish`` is called once the producer stops for any reason. A
+        response nobody follows is cancelled after ``FIRST_FOLLOWER_SECONDS``
+        or the grace period, whichever is longer.
+        """
+        self._prune()
+        while len(self._buffers) >= self.max_responses:
+            # A running response keeps going, it just cannot be resumed
+            oldest, _ = self._buffers.popitem(last=False)
+            self._finished.pop(oldest, None)
+        self._finished.pop(response_id, None)
+        buffer = ResponseBuffer(response_id, conversation_id, self.max_frames)
+        buffer.on_idle = self._schedule_reap
+        self._buffers[response_id] = buffer
+        self._tasks[response_id] = asyncio.create_task(
+            self._produce(buffer, source, on_finish)
+        )
+        self._schedule_reap(buffer, max(self.grace_seconds, FIRST_FOLLOWER_SECONDS))
+        return buffer
+
+    def get(self, response_id: str) -> ResponseBuffer | None:
+        """Return the buffer of a resumable response."""
+        self._prune()
+        return self._buffers.get(response_id)
+
+    async def aclose(self) -> None:
+        """Cancel every running response."""
+        for reaper in self._reapers.values():
+            reaper.cancel()
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._buffers.clear()
+        self._finished.clear()
+
+    async def _produce(
+        self,
+        buffer: ResponseBuffer,
+        source: AsyncIterator[str],
+        on_finish: Callable[[], None] | None,
+    ) -> None:
+        error = None
+        try:
+            async for chunk in source:
+                buffer.append(chunk)
+        except asyncio.CancelledError:
+            error = "Response generation was cancelled"
+            raise
+        except Exception as e:
+            logger.exception("Streaming response %s failed", buffer.response_id)
+            error = str(e)
+        finally:
+            buffer.finish(error)
+            indexed = self._buffers.get(buffer.response_id) is buffer
+            if indexed and buffer.finished_at is not None:
+                self._finished[buffer.response_id] = buffer.finished_at
+            self._tasks.pop(buffer.response_id, None)
+            reaper = self._reapers.pop(buffer.response_id, None)
+            if reaper is not None:
+                reaper.cancel()
+            if on_finish is not None:
+                on_finish()
+
+    def _schedule_reap(
+        self, buffer: ResponseBuffer, delay: float | None = None
+    ) -> None:
+        """Cancel an abandoned response unless a follower returns in time.
+
+        The delay defaults to the grace period.
+        """
+        if buffer.response_id not in self._tasks:
+            return
+        reaper = self._reapers.pop(buffer.response_id, None)
+        if reaper is not None:
+            reaper.cancel()
+        loop = asyncio.get_running_loop()
+        self._reapers[buffer.response_id] = loop.call_later(
+            self.grace_seconds if delay is None else delay, self._reap, buffer
+        )
+
+    def _reap(self, buffer: ResponseBuffer) -> None:
+        self._reapers.pop(buffer.response_id, None)
+        task = self._tasks.get(buffer.response_id)
+        if task is not None and not buffer.followers:
+            task.cancel()
+
+    def _prune(self) -> None:
+        """Forget finished responses older than the TTL.
+
+        Only the expired responses are visited.
+        """
+        deadline = time.monotonic() - self.ttl_seconds
+        while self._finished:
+            response_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > deadline:
+                break
+            del self._finished[response_id]
+            del self._buffers[response_id]
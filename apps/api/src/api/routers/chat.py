@@ -1,64 +1,450 @@
 """Chat router for streaming chat endpoints."""
 
-import json
+import time
 import uuid
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
+from contextlib import aclosing
+from dataclasses import asdict
+from functools import cache, partial
+from typing import TYPE_CHECKING, Annotated, Any
 
-from agents.chat import LLMChatAgent
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from agents.cache import IdempotencyConflictError
+from agents.config import get_settings
+from agents.memory import ConversationBusyError
+from agents.telemetry import REGISTRY, RingBufferExporter
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
 
-from api.models import ChatRequest, ChatResponse
+from api.admission import AdmissionController, AdmissionRejectedError, Priority, Slot
+from api.batch import run_batch
+from api.models import BatchChatRequest, ChatRequest, ChatResponse
+from api.recording import TrafficRecorder
+from api.resume import ResponseBuffer, ResumableStreams, StreamGapError
+from api.streaming import (
+    ENCODERS,
+    HEARTBEAT,
+    DisconnectAwareStreamingResponse,
+    coalesce,
+    compress_stream,
+    negotiate_encoding,
+    negotiate_media_type,
+)
+
+if TYPE_CHECKING:
+    from agents.chat import LLMChatAgent
 
 router = APIRouter()
 
-# Shared agent instance to maintain conversation memory
-_agent = LLMChatAgent()
+_settings = get_settings()
+
+# Recent and running streamed responses, replayable after a dropped connection
+_streams = ResumableStreams(
+    max_responses=_settings.stream_resume_max_responses,
+    max_frames=_settings.stream_resume_max_frames,
+    ttl_seconds=_settings.stream_resume_ttl_seconds,
+    grace_seconds=_settings.stream_resume_grace_seconds,
+)
+
+# Global in-flight limit with a priority queue in front of the agent
+_admission = AdmissionController(
+    max_in_flight=_settings.admission_max_in_flight,
+    max_queue=_settings.admission_max_queue,
+    queue_timeout_seconds=_settings.admission_queue_timeout_seconds,
+)
+
+# Anonymised request shapes and chunk timings, when recording is enabled
+_recorder = TrafficRecorder(_settings.traffic_recording_path)
+
+_ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "api_admission_wait_seconds", "Time requests waited for admission", ["priority"]
+)
+
+
+@cache
+def get_agent() -> "LLMChatAgent":
+    """Return the shared agent, which holds conversation memory.
+
+    Building the agent imports LangGraph and the provider SDK, creates the
+    LLM client and compiles the graph, so it happens on first use or in the
+    application's startup rather than on import.
+    """
+    from agents.chat import LLMChatAgent  # noqa: PLC0415
+
+    return LLMChatAgent()
+
+
+def _register_metrics() -> None:
+    """Report admission and resumable stream state on every collection."""
+    REGISTRY.gauge(
+        "api_admission_in_flight", "Requests holding an admission slot"
+    ).set_function(lambda: _admission.stats().in_flight)
+    queued = REGISTRY.gauge(
+        "api_admission_queued", "Requests waiting for admission", ["priority"]
+    )
+    for priority in Priority:
+        name = priority.name.lower()
+        queued.set_function(
+            partial(lambda name: _admission.stats().queued_by_priority[name], name),
+            priority=name,
+        )
+    rejected = REGISTRY.counter(
+        "api_admission_rejected_total", "Requests refused admission", ["reason"]
+    )
+    rejected.set_function(lambda: _admission.stats().rejected, reason="queue_full")
+    rejected.set_function(lambda: _admission.stats().timed_out, reason="timeout")
+    REGISTRY.gauge(
+        "api_resumable_responses", "Streamed responses that can be resumed"
+    ).set_function(lambda: len(_streams))
+
+
+_register_metrics()
+
 
+async def startup() -> None:
+    """Build the shared agent and start its background maintenance.
 
-async def generate_chat_stream(
-    message: str, conversation_id: str
-) -> AsyncGenerator[str, None]:
-    """Generate streaming chat responses."""
-    # Create initial response
-    response_id = str(uuid.uuid4())
+    Building it here means the first request does not wait for it.
+    """
+    await get_agent().start()
 
-    async for chunk in _agent.stream_response(message, conversation_id):
-        response = {
-            "id": response_id,
-            "content": chunk,
-            "conversation_id": conversation_id,
-            "role": "assistant",
-        }
-        yield f"data: {json.dumps(response)}\n\n"
 
+async def shutdown() -> None:
+    """Flush and release the shared agent's resources and LLM connections."""
+    await _streams.aclose()
+    if get_agent.cache_info().currsize:
+        await get_agent().aclose()
+        get_agent.cache_clear()
+    _recorder.close()
+    from agents.llm import LLMFactory  # noqa: PLC0415
+
+    await LLMFactory.aclose()
+
+
+def start_chat_stream(
+    message: str,
+    conversation_id: str,
+    response_id: str | None = None,
+    on_finish: Callable[[], None] | None = None,
+) -> ResponseBuffer:
+    """Start generating a streamed chat response in the background.
+
+    The response is generated into a replayable buffer, so a client that
+    loses the connection can resume it. Chunks arriving in quick succession
+    are merged into one frame, as configured in the settings.
+    """
+    generated = get_agent().stream_response(message, conversation_id)
+    chunks = coalesce(
+        _recorder.record_stream("stream", message, conversation_id, generated),
+        flush_interval_seconds=_settings.stream_flush_interval_seconds,
+        flush_chars=_settings.stream_flush_chars,
+    )
+    return _streams.start(
+        response_id or str(uuid.uuid4()), conversation_id, chunks, on_finish
+    )
+
+
+async def follow_stream(
+    buffer: ResponseBuffer, media_type: str, after: int = 0
+) -> AsyncGenerator[bytes, None]:
+    """Encode the frames of a buffered response after sequence ``after``.
+
+    Every frame carries its sequence number as the event id, and idle
+    streams receive keep-alive frames where the format has them.
+    """
+    encoder = ENCODERS[media_type](buffer.response_id, buffer.conversation_id)
+    heartbeat_seconds = _settings.stream_heartbeat_seconds
+    frames = buffer.follow(after, heartbeat_seconds if encoder.HEARTBEAT else None)
+    try:
+        async for item in frames:
+            if item is HEARTBEAT:
+                yield encoder.HEARTBEAT
+            else:
+                seq, content = item
+                yield encoder.frame(content, seq)
+    except StreamGapError as e:
+        yield encoder.error(str(e))
+    finally:
+        await frames.aclose()
+
+    if buffer.error is not None:
+        # For example another turn started after the check in stream_chat
+        yield encoder.error(buffer.error)
     # Send end marker
-    yield "data: [DONE]\n\n"
+    if encoder.DONE:
+        yield encoder.DONE
+
+
+def _streaming_response(
+    body: AsyncGenerator[bytes, None],
+    media_type: str,
+    accept_encoding: str | None,
+    response_id: str | None = None,
+) -> DisconnectAwareStreamingResponse:
+    """Wrap encoded frames in a response, compressing them if accepted."""
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if response_id is not None:
+        headers["X-Response-Id"] = response_id
+    encoding = (
+        negotiate_encoding(accept_encoding)
+        if _settings.stream_compression_enabled
+        else None
+    )
+    if encoding is not None:
+        body = compress_stream(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return DisconnectAwareStreamingResponse(
+        body, media_type=media_type, headers=headers
+    )
+
+
+def _client_key(http_request: Request, client_id: str | None) -> str:
+    """Return the identity requests are queued fairly by."""
+    if client_id:
+        return client_id
+    return http_request.client.host if http_request.client else ""
+
+
+async def _acquire(
+    priority: Priority, client: str, conversation_id: str, *, bounded: bool = True
+) -> Slot:
+    """Acquire an admission slot, recording the time spent waiting."""
+    started = time.perf_counter()
+    slot = await _admission.acquire(priority, client, conversation_id, bounded=bounded)
+    _ADMISSION_WAIT_SECONDS.observe(
+        time.perf_counter() - started, priority=priority.name.lower()
+    )
+    return slot
+
+
+async def _admit(priority: Priority, client: str, conversation_id: str) -> Slot:
+    """Acquire an admission slot or raise 429 with ``Retry-After``."""
+    try:
+        return await _acquire(priority, client, conversation_id)
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_seconds)},
+        ) from e
+
+
+def _negotiate(accept: str | None) -> str:
+    """Return the streaming format for an Accept header or raise 406."""
+    media_type = negotiate_media_type(accept)
+    if media_type is None:
+        detail = f"Supported formats: {', '.join(ENCODERS)}"
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=detail)
+    return media_type
 
 
 @router.post("/stream")
-async def stream_chat(request: ChatRequest) -> StreamingResponse:
-    """Stream chat response endpoint."""
+async def stream_chat(
+    request: ChatRequest,
+    http_request: Request,
+    accept: Annotated[str | None, Header()] = None,
+    accept_encoding: Annotated[str | None, Header()] = None,
+    x_client_id: Annotated[str | None, Header()] = None,
+) -> DisconnectAwareStreamingResponse:
+    """Stream chat response endpoint.
+
+    The ``Accept`` header selects Server-Sent Events (the default), NDJSON
+    or plain text, and ``Accept-Encoding`` enables gzip or brotli
+    compression flushed after every frame. The ``X-Response-Id`` header
+    names the response for resuming it. When the client disconnects and
+    does not resume in time, generation stops and the partial answer is
+    kept in history. Streams are admitted ahead of other traffic and return
+    429 with ``Retry-After`` when the server is saturated.
+    """
+    media_type = _negotiate(accept)
     conversation_id = request.conversation_id or str(uuid.uuid4())
+    try:
+        get_agent().locks.check(conversation_id)
+    except ConversationBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
 
-    return StreamingResponse(
-        generate_chat_stream(request.message, conversation_id),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-        },
-    )
+    client = _client_key(http_request, x_client_id)
+    slot = await _admit(Priority.INTERACTIVE, client, conversation_id)
+    # The slot is held until generation stops, not until the client leaves
+    try:
+        buffer = start_chat_stream(
+            request.message, conversation_id, on_finish=slot.release
+        )
+    except BaseException:
+        slot.release()
+        raise
+    body = follow_stream(buffer, media_type)
+    return _streaming_response(body, media_type, accept_encoding, buffer.response_id)
+
+
+@router.get("/stream/{response_id}")
+async def resume_stream(
+    response_id: str,
+    last_event_id: Annotated[str | None, Header()] = None,
+    accept: Annotated[str | None, Header()] = None,
+    accept_encoding: Annotated[str | None, Header()] = None,
+) -> DisconnectAwareStreamingResponse:
+    """Resume a streamed response after the frame named by ``Last-Event-ID``.
+
+    Missed frames are replayed from the buffer and the stream then follows
+    the live generation, without starting a new LLM call. Unknown or
+    expired responses return 404, and 410 when the missed frames were
+    already dropped from the buffer.
+    """
+    media_type = _negotiate(accept)
+    buffer = _streams.get(response_id)
+    if buffer is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired response"
+        )
+    try:
+        after = int(last_event_id or 0)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID"
+        ) from e
+    if not buffer.available(after):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE, detail="Missed frames are gone"
+        )
+
+    body = follow_stream(buffer, media_type, after)
+    return _streaming_response(body, media_type, accept_encoding, response_id)
+
+
+async def generate_batch_results(
+    request: BatchChatRequest, client: str = ""
+) -> AsyncGenerator[bytes, None]:
+    """Run a batch through the agent and encode results as NDJSON lines.
+
+    Every item is admitted at batch priority, behind interactive traffic.
+    """
+    limit = _settings.batch_max_concurrency
+    concurrency = min(request.max_concurrency or limit, limit)
+
+    async def handler(message: str, conversation_id: str) -> str:
+        # The batch bounds its own concurrency, so its items may always queue
+        slot = await _acquire(Priority.BATCH, client, conversation_id, bounded=False)
+        async with slot:
+            response = get_agent().get_response(message, conversation_id)
+            return await _recorder.record_response(
+                "batch", message, conversation_id, response
+            )
+
+    results = run_batch(request.items, handler, concurrency, lambda: str(uuid.uuid4()))
+    async with aclosing(results):
+        async for result in results:
+            yield result.model_dump_json().encode() + b"\n"
+
+
+@router.post("/batch")
+async def batch_chat(
+    request: BatchChatRequest,
+    http_request: Request,
+    accept_encoding: Annotated[str | None, Header()] = None,
+    x_client_id: Annotated[str | None, Header()] = None,
+) -> DisconnectAwareStreamingResponse:
+    """Batch chat endpoint.
+
+    Runs every item through the agent with bounded concurrency and streams
+    one NDJSON result per item as soon as it completes, in completion order.
+    Each result carries the item's ``index``, its latency and either the
+    ``content`` or an ``error``. Batches are refused with 429 while the
+    admission queue is full.
+    """
+    max_items = _settings.batch_max_items
+    if len(request.items) > max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch holds at most {max_items} items",
+        )
+    if _admission.queued >= _admission.max_queue:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Server is at capacity",
+            headers={"Retry-After": str(_admission.retry_after())},
+        )
+    body = generate_batch_results(request, _client_key(http_request, x_client_id))
+    return _streaming_response(body, "application/x-ndjson", accept_encoding)
 
 
 @router.post("/")
-async def chat(request: ChatRequest) -> ChatResponse:
-    """Non-streaming chat endpoint."""
-    conversation_id = request.conversation_id or str(uuid.uuid4())
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    idempotency_key: Annotated[str | None, Header()] = None,
+    x_client_id: Annotated[str | None, Header()] = None,
+) -> ChatResponse:
+    """Non-streaming chat endpoint.
 
-    response = await _agent.get_response(request.message, conversation_id)
+    Retries sending the same ``Idempotency-Key`` header receive the result of
+    the original request, conversation id included, instead of generating a
+    new response.
+    """
+    client = _client_key(http_request, x_client_id)
 
-    return ChatResponse(
-        content=response, conversation_id=conversation_id, role="assistant"
-    )
+    async def respond() -> ChatResponse:
+        conversation_id = request.conversation_id or str(uuid.uuid4())
+        async with await _admit(Priority.STANDARD, client, conversation_id):
+            content = await _recorder.record_response(
+                "complete",
+                request.message,
+                conversation_id,
+                get_agent().get_response(request.message, conversation_id),
+            )
+        return ChatResponse(
+            content=content, conversation_id=conversation_id, role="assistant"
+        )
+
+    try:
+        if idempotency_key is None:
+            return await respond()
+        # Retries match on the request as sent, before any id is generated
+        fingerprint = (request.conversation_id, request.message)
+        return await get_agent().idempotency.run(idempotency_key, fingerprint, respond)
+    except IdempotencyConflictError as e:
+        # The constant for 422 was renamed, its old name being deprecated
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    except ConversationBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+
+
+@router.get("/admission")
+async def admission() -> dict[str, Any]:
+    """Report in-flight requests, queue depth and queueing time.
+
+    Intended for autoscalers and dashboards.
+    """
+    stats = _admission.stats()
+    return {**asdict(stats), "mean_wait_seconds": stats.mean_wait_seconds}
+
+
+@router.get("/debug/traces")
+async def slowest_traces(
+    limit: Annotated[int, Query(gt=0, le=100)] = 10,
+) -> list[dict[str, Any]]:
+    """Return the slowest recent traces, slowest first.
+
+    Each trace lists its spans for the turn, graph nodes, checkpoint reads
+    and writes and LLM calls. Returns 404 unless tracing is enabled.
+    """
+    buffer = get_agent().tracer.exporter(RingBufferExporter)
+    if buffer is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Tracing is disabled"
+        )
+    traces = []
+    for spans in buffer.slowest(limit):
+        root = next(span for span in spans if span.parent_id is None)
+        traces.append(
+            {
+                "trace_id": root.trace_id,
+                "request_id": root.request_id,
+                "conversation_id": root.conversation_id,
+                "duration_seconds": root.duration_seconds,
+                "spans": [span.to_dict() for span in spans],
+            }
+        )
+    return traces
@@ -0,0 +1,338 @@
+"""Encoding, compression and chunk coalescing for chat streams."""
+
+import asyncio
+import contextlib
+import importlib.util
+import json
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any, ClassVar
+
+import anyio
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+# Yielded by ``coalesce`` when an idle stream needs a keep-alive comment
+HEARTBEAT = object()
+
+_END = object()
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class FrameEncoder(ABC):
+    """Encode the frames of one chat response in a streaming format.
+
+    The JSON envelope around the content is the same for every frame of a
+    response, so it is encoded once and only the content is serialized per
+    frame. Formats without an end marker or keep-alive use empty bytes.
+    """
+
+    media_type: ClassVar[str]
+    DONE: ClassVar[bytes] = b""
+    HEARTBEAT: ClassVar[bytes] = b""
+
+    def __init__(
+        self, response_id: str, conversation_id: str, role: str = "assistant"
+    ) -> None:
+        """Pre-encode the frame envelope for one response."""
+        self._prefix = f'{{"id": {json.dumps(response_id)}, "content": '.encode()
+        self._suffix = (
+            f', "conversation_id": {json.dumps(conversation_id)}, '
+            f'"role": {json.dumps(role)}}}'
+        ).encode()
+
+    @abstractmethod
+    def frame(self, content: str, event_id: int | None = None) -> bytes:
+        """Encode one content frame, tagged with ``event_id`` where supported."""
+
+    @abstractmethod
+    def error(self, detail: str) -> bytes:
+        """Encode an error reported after the stream started."""
+
+
+class SSEEncoder(FrameEncoder):
+    """Encode frames as Server-Sent Events.
+
+    Frames keep the field order ``id``, ``content``, ``conversation_id``,
+    ``role``. Given an event id, a frame carries it as the SSE ``id`` field
+    so that clients can resume with ``Last-Event-ID``.
+    """
+
+    media_type = "text/event-stream"
+    DONE = b"data: [DONE]\n\n"
+    HEARTBEAT = b": keep-alive\n\n"
+
+    def frame(self, content: str, event_id: int | None = None) -> bytes:
+        """Encode one content frame."""
+        return (
+            (b"data: " if event_id is None else b"id: %d\ndata: " % event_id)
+            + self._prefix
+            + json.dumps(content).encode()
+            + self._suffix
+            + b"\n\n"
+        )
+
+    def error(self, detail: str) -> bytes:
+        """Encode an error event."""
+        return f"event: error\ndata: {json.dumps({'detail': detail})}\n\n".encode()
+
+
+class NDJSONEncoder(FrameEncoder):
+    """Encode frames as newline-delimited JSON objects.
+
+    Content frames have the same fields as SSE frames; the end of the stream
+    and errors are objects with an ``event`` field, and keep-alives are
+    blank lines.
+    """
+
+    media_type = "application/x-ndjson"
+    DONE = b'{"event": "done"}\n'
+    HEARTBEAT = b"\n"
+
+    def frame(self, content: str, event_id: int | None = None) -> bytes:  # noqa: ARG002
+        """Encode one content frame."""
+        return self._prefix + json.dumps(content).encode() + self._suffix + b"\n"
+
+    def error(self, detail: str) -> bytes:
+        """Encode an error object."""
+        return (json.dumps({"event": "error", "detail": detail}) + "\n").encode()
+
+
+class TextEncoder(FrameEncoder):
+    """Encode frames as the bare response text."""
+
+    media_type = "text/plain"
+
+    def frame(self, content: str, event_id: int | None = None) -> bytes:  # noqa: ARG002
+        """Encode one content frame."""
+        return content.encode()
+
+    def error(self, detail: str) -> bytes:
+        """Encode an error as a trailing line."""
+        return f"\n[error] {detail}\n".encode()
+
+
+ENCODERS: dict[str, type[FrameEncoder]] = {
+    SSEEncoder.media_type: SSEEncoder,
+    NDJSONEncoder.media_type: NDJSONEncoder,
+    "application/ndjson": NDJSONEncoder,
+    TextEncoder.media_type: TextEncoder,
+}
+
+
+def _parse_accept(header: str) -> list[str]:
+    """Return the acceptable values of an Accept-style header, best first."""
+    entries = []
+    for index, part in enumerate(header.split(",")):
+        value, *params = (item.strip() for item in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, raw = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        if value and quality > 0:
+            # Higher quality first, then more specific, then header order
+            entries.append((-quality, value.count("*"), index, value.lower()))
+    return [value for *_, value in sorted(entries)]
+
+
+def negotiate_media_type(accept: str | None) -> str | None:
+    """Pick the streaming format for an Accept header.
+
+    SSE is used when the header is missing or accepts anything; ``None``
+    means no supported format is acceptable.
+    """
+    if not accept:
+        return SSEEncoder.media_type
+    for value in _parse_accept(accept):
+        if value in ENCODERS:
+            return value
+        if value == "*/*":
+            return SSEEncoder.media_type
+        if value.endswith("/*"):
+            prefix = value[:-1]
+            for media_type in ENCODERS:
+                if media_type.startswith(prefix):
+                    return media_type
+    return None
+
+
+def brotli_available() -> bool:
+    """Return whether the optional brotli package is installed."""
+    return importlib.util.find_spec("brotli") is not None
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick ``br`` or ``gzip`` for an Accept-Encoding header, or ``None``."""
+    if not accept_encoding:
+        return None
+    supported = ["br", "gzip"] if brotli_available() else ["gzip"]
+    for value in _parse_accept(accept_encoding):
+        if value in supported:
+            return value
+        if value == "*":
+            return supported[0]
+    return None
+
+
+class StreamCompressor:
+    """Compress a stream incrementally, flushing at every frame boundary.
+
+    Each call to ``compress`` returns output the client can decode at once,
+    so compression never holds back a token, while the compression context
+    is shared across frames of the whole stream.
+    """
+
+    def __init__(self, encoding: str) -> None:
+        """Start a gzip or brotli stream."""
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._gzip = zlib.compressobj(
+                GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16
+            )
+        elif encoding == "br":
+            import brotli  # noqa: PLC0415
+
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            msg = f"Unsupported content encoding: {encoding}"
+            raise ValueError(msg)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress one frame and flush it."""
+        if self.encoding == "gzip":
+            return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self) -> bytes:
+        """End the compressed stream."""
+        if self.encoding == "gzip":
+            return self._gzip.flush()
+        return self._brotli.finish()
+
+
+async def compress_stream(
+    frames: AsyncIterator[bytes], encoding: str
+) -> AsyncGenerator[bytes, None]:
+    """Compress encoded frames with ``encoding`` as they are produced."""
+    compressor = StreamCompressor(encoding)
+    try:
+        async for frame in frames:
+            if data := compressor.compress(frame):
+                yield data
+    finally:
+        await _aclose(frames)
+    yield compressor.finish()
+
+
+async def _aclose(iterator: Any) -> None:  # noqa: ANN401
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+async def _pump(chunks: AsyncIterator[str], queue: asyncio.Queue[Any]) -> None:
+    try:
+        async for chunk in chunks:
+            if chunk:
+                queue.put_nowait(chunk)
+    except Exception as e:  # noqa: BLE001
+        queue.put_nowait(e)
+    queue.put_nowait(_END)
+
+
+async def coalesce(
+    chunks: AsyncIterator[str],
+    *,
+    flush_interval_seconds: float = 0.0,
+    flush_chars: int = 4096,
+    heartbeat_seconds: float | None = None,
+) -> AsyncGenerator[Any, None]:
+    """Merge chunks arriving in quick succession into fewer, larger ones.
+
+    A chunk arriving at least ``flush_interval_seconds`` after the previous
+    flush, including the first chunk, is passed on at once. Chunks arriving
+    faster are buffered until the window ends or ``flush_chars`` characters
+    are buffered, which bounds the frame rate without delaying slow streams.
+    When nothing has been sent for ``heartbeat_seconds``, ``HEARTBEAT`` is
+    yielded instead. The source is consumed by a single task that is
+    cancelled when the coalesced stream is closed early.
+    """
+    queue: asyncio.Queue[Any] = asyncio.Queue()
+    task = asyncio.create_task(_pump(chunks, queue))
+    buffer: list[str] = []
+    buffered = 0
+    last_flush = -float("inf")
+    try:
+        while True:
+            if buffer:
+                deadline = last_flush + flush_interval_seconds
+                timeout = max(deadline - time.perf_counter(), 0)
+            else:
+                timeout = heartbeat_seconds
+            try:
+                chunk = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                chunk = None
+            if chunk is _END or isinstance(chunk, Exception):
+                break
+            if chunk is None and not buffer:
+                yield HEARTBEAT
+                continue
+
+            if chunk is not None:
+                buffer.append(chunk)
+                buffered += len(chunk)
+            now = time.perf_counter()
+            if (
+                chunk is None
+                or buffered >= flush_chars
+                or now - last_flush >= flush_interval_seconds
+            ):
+                yield "".join(buffer)
+                buffer, buffered = [], 0
+                last_flush = now
+        if buffer:
+            yield "".join(buffer)
+        if isinstance(chunk, Exception):
+            raise chunk
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+class DisconnectAwareStreamingResponse(StreamingResponse):
+    """Streaming response that stops its body as soon as the client leaves.
+
+    Starlette only watches for disconnects on servers speaking ASGI < 2.4;
+    newer servers report them on the next write, which can be long after
+    the client left while a provider is still thinking. This response always
+    listens for ``http.disconnect`` and cancels the body iterator at once,
+    which propagates the cancellation to the upstream generation.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:  # noqa: ARG002
+        """Send the streamed body until it ends or the client disconnects."""
+        async with anyio.create_task_group() as task_group:
+
+            async def stream() -> None:
+                # Servers report a disconnect seen while writing as OSError
+                with contextlib.suppress(OSError):
+                    await self.stream_response(send)
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(stream)
+            await self.listen_for_disconnect(receive)
+            task_group.cancel_scope.cancel()
+        # Run the body's cleanup now rather than when it is garbage collected
+        await _aclose(self.body_iterator)
+
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,178 @@
+"""Multi-process serving with conversation affinity.
+
+Each worker process runs the API on its own Unix socket, and an
+``AffinityProxy`` on the public address routes every conversation to one of
+them. Run ``python -m api.workers APP`` to serve another application, for
+example ``api.bench:create_fake_app --factory``.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Any
+
+import uvicorn
+from agents.config import Settings, get_settings
+
+from api.affinity import AffinityProxy
+
+logger = logging.getLogger(__name__)
+
+APP = "api.main:app"
+
+# Time allowed for every worker to start listening
+STARTUP_TIMEOUT_SECONDS = 60.0
+
+
+def server_options(settings: Settings) -> dict[str, Any]:
+    """Return the uvicorn options configured in the settings."""
+    return {
+        "loop": settings.server_loop,
+        "http": settings.server_http,
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keep_alive_seconds,
+        "limit_concurrency": settings.server_limit_concurrency,
+    }
+
+
+def _run_worker(app: str, path: str, options: dict[str, Any], factory: bool) -> None:  # noqa: FBT001
+    uvicorn.run(app, uds=path, factory=factory, **options)
+
+
+class WorkerPool:
+    """Worker processes serving an application on Unix sockets.
+
+    Workers that exit are started again by ``supervise``; the conversations
+    they held are lost, but their sockets and so their share of the hash
+    ring stay the same.
+    """
+
+    def __init__(
+        self,
+        app: str,
+        count: int,
+        socket_dir: str | Path,
+        options: dict[str, Any],
+        *,
+        factory: bool = False,
+    ) -> None:
+        """Prepare ``count`` workers with sockets in ``socket_dir``."""
+        self.app = app
+        self.factory = factory
+        self.options = options
+        self.sockets = [
+            str(Path(socket_dir) / f"worker-{i}.sock") for i in range(count)
+        ]
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[BaseProcess | None] = [None] * count
+
+    def _spawn(self, index: int) -> BaseProcess:
+        process = self._context.Process(
+            target=_run_worker,
+            args=(self.app, self.sockets[index], self.options, self.factory),
+            name=f"api-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def start(self) -> None:
+        """Start every worker."""
+        for index in range(len(self.sockets)):
+            self._processes[index] = self._spawn(index)
+
+    def restart_exited(self) -> None:
+        """Start again the workers that exited."""
+        for index, process in enumerate(self._processes):
+            if process is not None and not process.is_alive():
+                logger.warning(
+                    "Worker %d exited with code %s, restarting", index, process.exitcode
+                )
+                self._processes[index] = self._spawn(index)
+
+    def wait_ready(self, timeout: float = STARTUP_TIMEOUT_SECONDS) -> None:
+        """Block until every worker listens on its socket."""
+        deadline = time.monotonic() + timeout
+        while not all(Path(path).exists() for path in self.sockets):
+            if time.monotonic() > deadline:
+                msg = "Workers did not start listening in time"
+                raise TimeoutError(msg)
+            time.sleep(0.05)
+
+    async def supervise(self, interval: float = 1.0) -> None:
+        """Restart exited workers until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.restart_exited()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop every worker, letting it finish its requests first."""
+        processes = [p for p in self._processes if p is not None]
+        self._processes = [None] * len(self._processes)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+def serve(
+    settings: Settings,
+    app: str = APP,
+    *,
+    factory: bool = False,
+    log_level: str = "info",
+) -> None:
+    """Serve ``app`` from ``settings.server_workers`` worker processes."""
+    options = {**server_options(settings), "log_level": log_level}
+    with tempfile.TemporaryDirectory(prefix="api-workers-") as socket_dir:
+        pool = WorkerPool(
+            app, settings.server_workers, socket_dir, options, factory=factory
+        )
+
+        @asynccontextmanager
+        async def lifespan() -> AsyncIterator[None]:
+            supervisor = asyncio.create_task(pool.supervise())
+            try:
+                yield
+            finally:
+                supervisor.cancel()
+
+        proxy = AffinityProxy(
+            pool.sockets,
+            max_responses=settings.stream_resume_max_responses * len(pool.sockets),
+            lifespan=lifespan,
+            # Leave a margin before the workers close idle connections
+            idle_timeout=settings.server_keep_alive_seconds / 2,
+        )
+        pool.start()
+        try:
+            pool.wait_ready()
+            uvicorn.run(
+                proxy, host=settings.server_host, port=settings.server_port, **options
+            )
+        finally:
+            pool.stop()
+
+
+def main() -> None:
+    """Serve an application with the worker settings from the environment."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("app", nargs="?", default=APP)
+    parser.add_argument("--factory", action="store_true")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    serve(get_settings(), args.app, factory=args.factory, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
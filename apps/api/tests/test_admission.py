@@ -0,0 +1,134 @@
+"""Tests for admission control."""
+
+import asyncio
+
+import pytest
+
+from api.admission import AdmissionController, AdmissionRejectedError, Priority
+
+
+async def queue_up(
+    controller: AdmissionController, *requests: tuple[Priority, str, str]
+) -> tuple[list[str], list[asyncio.Task[None]]]:
+    """Queue requests that record their name once admitted."""
+    order: list[str] = []
+
+    async def request(priority: Priority, client: str, conversation: str) -> None:
+        async with await controller.acquire(priority, client, conversation):
+            order.append(f"{client}/{conversation}")
+
+    tasks = [asyncio.create_task(request(*r)) for r in requests]
+    await asyncio.sleep(0)
+    return order, tasks
+
+
+class TestAdmissionController:
+    """Test cases for AdmissionController."""
+
+    @pytest.mark.asyncio
+    async def test_admits_up_to_limit(self) -> None:
+        """Test that requests within the limit are admitted immediately."""
+        controller = AdmissionController(max_in_flight=2)
+
+        slots = [await controller.acquire() for _ in range(2)]
+
+        assert controller.stats().in_flight == 2
+        for slot in slots:
+            slot.release()
+            slot.release()
+        assert controller.stats().in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_priority_served_first(self) -> None:
+        """Test that interactive requests overtake queued batch requests."""
+        controller = AdmissionController(max_in_flight=1)
+        slot = await controller.acquire()
+        order, tasks = await queue_up(
+            controller,
+            (Priority.BATCH, "a", "1"),
+            (Priority.STANDARD, "b", "1"),
+            (Priority.INTERACTIVE, "c", "1"),
+        )
+
+        slot.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["c/1", "b/1", "a/1"]
+
+    @pytest.mark.asyncio
+    async def test_fair_across_clients_and_conversations(self) -> None:
+        """Test that clients, then their conversations, take turns."""
+        controller = AdmissionController(max_in_flight=1)
+        slot = await controller.acquire()
+        order, tasks = await queue_up(
+            controller,
+            *[(Priority.STANDARD, "a", "1")] * 2,
+            (Priority.STANDARD, "a", "2"),
+            (Priority.STANDARD, "b", "1"),
+        )
+
+        slot.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["a/1", "b/1", "a/2", "a/1"]
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self) -> None:
+        """Test that a full queue rejects with a retry delay."""
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        slot = await controller.acquire()
+        _, tasks = await queue_up(controller, (Priority.STANDARD, "a", "1"))
+
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            await controller.acquire()
+
+        assert excinfo.value.retry_after_seconds >= 1
+        assert controller.stats().rejected == 1
+        slot.release()
+        await asyncio.gather(*tasks)
+
+    @pytest.mark.asyncio
+    async def test_unbounded_ignores_queue_limit(self) -> None:
+        """Test that unbounded requests may queue beyond the limit."""
+        controller = AdmissionController(max_in_flight=1, max_queue=0)
+        slot = await controller.acquire()
+        waiting = asyncio.create_task(controller.acquire(bounded=False))
+        await asyncio.sleep(0)
+
+        slot.release()
+
+        (await waiting).release()
+        assert controller.stats().in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_times_out(self) -> None:
+        """Test that a request waiting too long is rejected."""
+        controller = AdmissionController(max_in_flight=1, queue_timeout_seconds=0.01)
+        slot = await controller.acquire()
+
+        with pytest.raises(AdmissionRejectedError):
+            await controller.acquire()
+
+        stats = controller.stats()
+        assert stats.timed_out == 1
+        assert stats.queued == 0
+        slot.release()
+        assert controller.stats().in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self) -> None:
+        """Test that a cancelled request does not take the next slot."""
+        controller = AdmissionController(max_in_flight=1)
+        slot = await controller.acquire()
+        cancelled = asyncio.create_task(controller.acquire())
+        order, tasks = await queue_up(controller, (Priority.STANDARD, "a", "1"))
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+
+        slot.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["a/1"]
+        stats = controller.stats()
+        assert stats.in_flight == 0
+        assert stats.admitted == 2
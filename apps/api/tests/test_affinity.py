@@ -0,0 +1,267 @@
+"""Tests for the conversation-affinity proxy."""
+
+import asyncio
+import json
+from collections import Counter
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+import pytest_asyncio
+import uvicorn
+from starlette.types import Receive, Scope, Send
+
+from api.affinity import AffinityProxy, HashRing
+
+
+def _valid(path: str, request: Any) -> bool:  # noqa: ANN401
+    """Return whether FastAPI would accept a chat request body."""
+    if not isinstance(request, dict):
+        return False
+    items = request.get("items") if path == "/api/chat/batch" else [request]
+    return isinstance(items, list) and all(
+        isinstance(item, dict) and isinstance(item.get("conversation_id", ""), str)
+        for item in items
+    )
+
+
+def _worker_app(number: int) -> Any:  # noqa: ANN401
+    """Return an ASGI app answering with its number and the request it got."""
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        headers = [(b"content-type", b"application/json")]
+        try:
+            request = json.loads(body) if body else None
+        except ValueError:
+            request = None
+        if scope["method"] == "POST" and not _valid(scope["path"], request):
+            # Rejected as by FastAPI, echoing the body received
+            content = json.dumps({"worker": number, "body": body.decode()}).encode()
+            await send(
+                {"type": "http.response.start", "status": 422, "headers": headers}
+            )
+            await send({"type": "http.response.body", "body": content})
+            return
+        if scope["path"] == "/api/chat/batch":
+            items = request["items"]
+            content = b"".join(
+                json.dumps(
+                    {
+                        "index": i,
+                        "conversation_id": item["conversation_id"],
+                        "content": str(number),
+                        "error": None,
+                    }
+                ).encode()
+                + b"\n"
+                for i, item in enumerate(items)
+            )
+        else:
+            if scope["path"] == "/api/chat/stream":
+                headers.append((b"x-response-id", f"response-{number}".encode()))
+            content = json.dumps({"worker": number, "request": request}).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
+
+    return app
+
+
+@pytest_asyncio.fixture
+async def proxy(tmp_path: Path) -> AsyncIterator[AffinityProxy]:
+    """Run three workers on Unix sockets and yield a proxy in front of them.
+
+    The workers close connections after one idle second.
+    """
+    sockets = [str(tmp_path / f"worker-{i}.sock") for i in range(3)]
+    servers = [
+        uvicorn.Server(
+            uvicorn.Config(
+                _worker_app(i),
+                uds=path,
+                log_level="warning",
+                lifespan="off",
+                timeout_keep_alive=1,
+            )
+        )
+        for i, path in enumerate(sockets)
+    ]
+    tasks = [asyncio.create_task(server.serve()) for server in servers]
+    while not all(server.started for server in servers):  # noqa: ASYNC110
+        await asyncio.sleep(0.01)
+    proxy = AffinityProxy(sockets)
+    yield proxy
+    for worker in proxy.workers:
+        worker.close()
+    for server in servers:
+        server.should_exit = True
+    await asyncio.gather(*tasks)
+
+
+def _client(proxy: AffinityProxy) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=proxy)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+class TestHashRing:
+    """Test cases for HashRing."""
+
+    def test_stable_and_even(self) -> None:
+        """Test that keys map the same way every time and spread evenly."""
+        keys = [f"conversation-{i}" for i in range(4000)]
+        ring = HashRing(4)
+        counts = Counter(ring.node(key) for key in keys)
+
+        assert [HashRing(4).node(key) for key in keys] == [ring.node(k) for k in keys]
+        assert set(counts) == {0, 1, 2, 3}
+        assert min(counts.values()) > 700
+
+    def test_adding_a_node_only_moves_keys_to_it(self) -> None:
+        """Test that growing the ring keeps every other assignment."""
+        keys = [f"conversation-{i}" for i in range(1000)]
+        before, after = HashRing(3), HashRing(4)
+
+        moved = [key for key in keys if before.node(key) != after.node(key)]
+
+        assert moved
+        assert all(after.node(key) == 3 for key in moved)
+
+
+class TestAffinityProxy:
+    """Test cases for AffinityProxy."""
+
+    @pytest.mark.asyncio
+    async def test_conversation_sticks_to_its_worker(
+        self, proxy: AffinityProxy
+    ) -> None:
+        """Test that a new conversation gets an id that routes its follow-ups."""
+        async with _client(proxy) as client:
+            first = (await client.post("/api/chat/", json={"message": "hi"})).json()
+            conversation_id = first["request"]["conversation_id"]
+            payload = {"message": "again", "conversation_id": conversation_id}
+            followups = [
+                (await client.post(path, json=payload)).json()["worker"]
+                for path in ("/api/chat/", "/api/chat/stream", "/api/chat/")
+            ]
+
+        expected = proxy.worker_for(conversation_id)
+        assert first["worker"] == expected
+        assert followups == [expected] * 3
+
+    @pytest.mark.asyncio
+    async def test_retries_reach_the_same_worker(self, proxy: AffinityProxy) -> None:
+        """Test that retries of a new conversation share its id and worker."""
+        async with _client(proxy) as client:
+            responses = [
+                (
+                    await client.post(
+                        "/api/chat/",
+                        json={"message": "hi"},
+                        headers={"Idempotency-Key": key},
+                    )
+                ).json()
+                for key in [f"key-{i}" for i in range(8)] * 2
+            ]
+
+        first, retries = responses[:8], responses[8:]
+        assert retries == first
+        assert len({r["request"]["conversation_id"] for r in first}) == 8
+        assert len({r["worker"] for r in first}) > 1
+
+    @pytest.mark.asyncio
+    async def test_resume_and_explicit_worker(self, proxy: AffinityProxy) -> None:
+        """Test routing of resumed streams and of the X-Worker header."""
+        async with _client(proxy) as client:
+            payload = {"message": "hi", "conversation_id": "c"}
+            stream = await client.post("/api/chat/stream", json=payload)
+            response_id = stream.headers["x-response-id"]
+            resumed = await client.get(f"/api/chat/stream/{response_id}")
+            pinned = [
+                (await client.get("/metrics", headers={"X-Worker": str(i)})).json()
+                for i in range(3)
+            ]
+
+        assert resumed.json()["worker"] == proxy.worker_for("c")
+        assert [response["worker"] for response in pinned] == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_batch_is_split_and_reindexed(self, proxy: AffinityProxy) -> None:
+        """Test that batch items run on their workers under their own index."""
+        ids = [f"conversation-{i}" for i in range(12)]
+        items = [{"message": "hi", "conversation_id": c} for c in ids]
+        async with _client(proxy) as client:
+            response = await client.post("/api/chat/batch", json={"items": items})
+
+        results = sorted(
+            (json.loads(line) for line in response.text.splitlines()),
+            key=lambda result: result["index"],
+        )
+        assert response.status_code == httpx.codes.OK
+        assert len({proxy.worker_for(c) for c in ids}) > 1
+        assert [r["conversation_id"] for r in results] == ids
+        assert [r["content"] for r in results] == [
+            str(proxy.worker_for(c)) for c in ids
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("path", "body"),
+        [
+            ("/api/chat/", b"not json"),
+            ("/api/chat/stream", b"[1]"),
+            ("/api/chat/", b'{"message": "hi", "conversation_id": 7}'),
+            ("/api/chat/batch", b"[1]"),
+            ("/api/chat/batch", b'{"items": "hi"}'),
+            ("/api/chat/batch", b'{"items": [1, 2]}'),
+        ],
+    )
+    async def test_invalid_body_is_forwarded_unchanged(
+        self, proxy: AffinityProxy, path: str, body: bytes
+    ) -> None:
+        """Test that requests the proxy cannot route are left to a worker."""
+        async with _client(proxy) as client:
+            response = await client.post(
+                path, content=body, headers={"content-type": "application/json"}
+            )
+
+        assert response.status_code == httpx.codes.UNPROCESSABLE_ENTITY
+        assert response.json()["body"] == body.decode()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("idle_timeout", [None, 0.5])
+    async def test_idle_connection_closed_by_worker(
+        self, proxy: AffinityProxy, idle_timeout: float | None
+    ) -> None:
+        """Test requests after the workers closed idle pooled connections."""
+        proxy = AffinityProxy(
+            [worker.path for worker in proxy.workers], idle_timeout=idle_timeout
+        )
+        headers = {"X-Worker": "0"}
+        async with _client(proxy) as client:
+            first = await client.get("/health", headers=headers)
+            await asyncio.sleep(1.5)
+            second = await client.get("/health", headers=headers)
+        for worker in proxy.workers:
+            worker.close()
+
+        assert first.status_code == httpx.codes.OK
+        assert second.status_code == httpx.codes.OK
+        assert second.json()["worker"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unavailable_worker(self, tmp_path: Path) -> None:
+        """Test that a worker that cannot be reached gives a 502."""
+        proxy = AffinityProxy([str(tmp_path / "missing.sock")])
+        async with _client(proxy) as client:
+            response = await client.get("/health")
+
+        assert response.status_code == httpx.codes.BAD_GATEWAY
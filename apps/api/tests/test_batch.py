@@ -0,0 +1,72 @@
+"""Tests for batched chat request execution."""
+
+import asyncio
+import itertools
+
+import pytest
+
+from api.batch import run_batch
+from api.models import ChatRequest
+
+
+class TestRunBatch:
+    """Test cases for run_batch."""
+
+    @pytest.mark.asyncio
+    async def test_results_in_completion_order(self) -> None:
+        """Test that faster items are reported first with their index."""
+        delays = {"slow": 0.05, "fast": 0.0}
+
+        async def handler(message: str, conversation_id: str) -> str:
+            await asyncio.sleep(delays[message])
+            return f"{message}:{conversation_id}"
+
+        items = [
+            ChatRequest(message="slow", conversation_id="a"),
+            ChatRequest(message="fast"),
+        ]
+        ids = (f"new-{n}" for n in itertools.count())
+
+        results = [r async for r in run_batch(items, handler, 2, lambda: next(ids))]
+
+        assert [r.index for r in results] == [1, 0]
+        assert results[0].content == "fast:new-0"
+        assert results[1].latency_seconds >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self) -> None:
+        """Test that no more than the limit run at once."""
+        running = peak = 0
+
+        async def handler(message: str, conversation_id: str) -> str:  # noqa: ARG001
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return message
+
+        items = [ChatRequest(message=str(n)) for n in range(10)]
+
+        results = [r async for r in run_batch(items, handler, 3, lambda: "c")]
+
+        assert len(results) == 10
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_errors_reported_per_item(self) -> None:
+        """Test that a failing item does not stop the batch."""
+
+        async def handler(message: str, conversation_id: str) -> str:  # noqa: ARG001
+            if message == "bad":
+                msg = "boom"
+                raise RuntimeError(msg)
+            return "ok"
+
+        items = [ChatRequest(message="bad"), ChatRequest(message="good")]
+
+        results = {r.index: r async for r in run_batch(items, handler, 1, lambda: "c")}
+
+        assert results[0].error == "RuntimeError: boom"
+        assert results[0].content is None
+        assert results[1].content == "ok"
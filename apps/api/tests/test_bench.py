@@ -0,0 +1,67 @@
+"""Tests for the api-bench load generator."""
+
+import argparse
+import json
+
+import httpx
+import pytest
+
+from api.bench import LoadResult, parse_metrics, percentiles, simulate_user
+
+
+class TestLoadGenerator:
+    """Test cases for the load generator helpers."""
+
+    def test_percentiles(self) -> None:
+        """Test nearest-rank percentiles in milliseconds."""
+        values = [n / 1000 for n in range(1, 101)]
+
+        assert percentiles(values) == {"p50": 50.0, "p90": 90.0, "p99": 99.0}
+        assert percentiles([]) == {}
+
+    def test_parse_metrics(self) -> None:
+        """Test that only the requested unlabelled metrics are read."""
+        text = (
+            "# HELP process_cpu_seconds_total CPU time\n"
+            "process_cpu_seconds_total 1.5\n"
+            'api_admission_queued{priority="batch"} 3\n'
+        )
+
+        assert parse_metrics(text, ("process_cpu_seconds_total",)) == {
+            "process_cpu_seconds_total": 1.5
+        }
+
+    @pytest.mark.asyncio
+    async def test_simulated_user(self) -> None:
+        """Test that mixed users alternate endpoints within a conversation."""
+        paths: list[str] = []
+        conversations: set[str] = set()
+        messages: set[str] = set()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            paths.append(request.url.path)
+            payload = json.loads(request.read())
+            conversations.add(payload["conversation_id"])
+            messages.add(payload["message"])
+            assert request.headers["X-Client-Id"] == "user-3"
+            if request.url.path.endswith("/stream"):
+                return httpx.Response(200, text='data: {"content": "hi"}\n\n')
+            return httpx.Response(200, json={"content": "hi"})
+
+        args = argparse.Namespace(
+            conversations=2, turns=2, message_chars=40, mode="mixed"
+        )
+        result = LoadResult()
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            await simulate_user(c, 3, args, result)
+
+        assert paths == ["/api/chat/", "/api/chat/stream"] * 2
+        assert len(conversations) == 2
+        # Unique messages, so that concurrent users are not coalesced
+        assert len(messages) == 4
+        assert all(len(message) == 40 for message in messages)
+        assert result.requests == 4
+        assert result.errors == 0
+        assert len(result.first_token_seconds) == 2
+        assert len(result.response_seconds) == 4
@@ -1,15 +1,27 @@
 """Tests for chat router endpoints."""
 
+import asyncio
+import json
+import os
+import subprocess
 import sys
+import time
+from collections.abc import AsyncGenerator
 from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
 import pytest
+from agents.llm import FakeChatModel
+from agents.memory import ConversationBusyError
+from agents.telemetry import RingBufferExporter, Tracer
 from fastapi.testclient import TestClient
 
 # Add packages to path for testing
 sys.path.insert(0, str(Path(__file__).parent / "../../../packages"))
 
+from api.admission import AdmissionRejectedError
 from api.main import app
+from api.routers import chat
 
 
 class TestChatRouter:
@@ -20,6 +32,24 @@ class TestChatRouter:
         """Create a test client."""
         return TestClient(app)
 
+    def test_agent_built_on_startup_not_import(self) -> None:
+        """Test that importing the app needs no API key and builds no agent."""
+        script = (
+            "import sys\n"
+            "from fastapi.testclient import TestClient\n"
+            "from api.main import app\n"
+            "from api.routers import chat\n"
+            "assert 'langgraph' not in sys.modules\n"
+            "assert 'langchain_core' not in sys.modules\n"
+            "assert chat.get_agent.cache_info().currsize == 0\n"
+            "chat.get_settings().google_api_key = 'test'\n"
+            "with TestClient(app):\n"
+            "    assert chat.get_agent.cache_info().currsize == 1\n"
+            "assert chat.get_agent.cache_info().currsize == 0\n"
+        )
+        env = {k: v for k, v in os.environ.items() if k != "GOOGLE_API_KEY"}
+        subprocess.run([sys.executable, "-c", script], env=env, check=True)  # noqa: S603
+
     def test_root_endpoint(self, client: TestClient) -> None:
         """Test root endpoint."""
         response = client.get("/")
@@ -84,3 +114,216 @@ class TestChatRouter:
         content = response.text
         assert "data:" in content
         assert len(content) > 0
+
+    def test_chat_endpoint_idempotent_retry(self, client: TestClient) -> None:
+        """Test that a retry gets the original response and conversation."""
+        agent = chat.get_agent()
+        turns = agent.stats().turns
+        headers = {"Idempotency-Key": "retry-without-conversation"}
+
+        with patch.object(agent, "llm", FakeChatModel(response_chars=20)):
+            first, retry = (
+                client.post("/api/chat/", json={"message": "Hi"}, headers=headers)
+                for _ in range(2)
+            )
+            conflict = client.post(
+                "/api/chat/", json={"message": "Bye"}, headers=headers
+            )
+
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+        assert agent.stats().turns == turns + 1
+        assert conflict.status_code == 422
+
+    def test_chat_endpoint_busy_conversation(self, client: TestClient) -> None:
+        """Test that a rejected concurrent turn returns 409."""
+        busy = AsyncMock(side_effect=ConversationBusyError("busy"))
+
+        with patch.object(chat.get_agent(), "get_response", busy):
+            response = client.post("/api/chat/", json={"message": "Hello"})
+
+        assert response.status_code == 409
+
+    def test_stream_chat_ndjson_gzip(self, client: TestClient) -> None:
+        """Test that the stream honours Accept and Accept-Encoding."""
+
+        async def stream(*args, **kwargs) -> AsyncGenerator[str, None]:  # noqa: ARG001, ANN002, ANN003
+            yield "Hello"
+
+        with patch.object(chat.get_agent(), "stream_response", stream):
+            response = client.post(
+                "/api/chat/stream",
+                json={"message": "Hi", "conversation_id": "ndjson"},
+                headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["content-encoding"] == "gzip"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["content"] == "Hello"
+        assert lines[-1] == {"event": "done"}
+
+    def test_stream_chat_not_acceptable(self, client: TestClient) -> None:
+        """Test that unsupported formats return 406."""
+        response = client.post(
+            "/api/chat/stream",
+            json={"message": "Hi"},
+            headers={"Accept": "application/xml"},
+        )
+
+        assert response.status_code == 406
+
+    def test_resume_stream(self, client: TestClient) -> None:
+        """Test that a stream can be replayed from its Last-Event-ID."""
+
+        async def stream(*args, **kwargs) -> AsyncGenerator[str, None]:  # noqa: ARG001, ANN002, ANN003
+            yield "Hello"
+            await asyncio.sleep(0.05)
+            yield " world"
+
+        with patch.object(chat.get_agent(), "stream_response", stream):
+            response = client.post(
+                "/api/chat/stream", json={"message": "Hi", "conversation_id": "resume"}
+            )
+        response_id = response.headers["x-response-id"]
+        assert "id: 1\n" in response.text
+
+        resumed = client.get(
+            f"/api/chat/stream/{response_id}", headers={"Last-Event-ID": "1"}
+        )
+
+        assert resumed.status_code == 200
+        assert "id: 1\n" not in resumed.text
+        assert "id: 2\n" in resumed.text
+        assert '"content": " world"' in resumed.text
+        assert resumed.text.endswith("data: [DONE]\n\n")
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_generation(self) -> None:
+        """Test that a stream nobody follows stops within the grace period."""
+        cancelled = asyncio.Event()
+        sent_frame = asyncio.Event()
+
+        async def stream(*args, **kwargs) -> AsyncGenerator[str, None]:  # noqa: ARG001, ANN002, ANN003
+            try:
+                yield "Hello"
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        body = json.dumps({"message": "Hi", "conversation_id": "dropped"}).encode()
+        received = iter([{"type": "http.request", "body": body}])
+
+        async def receive() -> dict:
+            message = next(received, None)
+            if message is not None:
+                return message
+            await sent_frame.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            if message.get("body"):
+                sent_frame.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/chat/stream",
+            "raw_path": b"/api/chat/stream",
+            "query_string": b"",
+            "headers": [(b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 1),
+            "server": ("test", 80),
+        }
+        grace = chat._streams.grace_seconds  # noqa: SLF001
+        with patch.object(chat.get_agent(), "stream_response", stream):
+            await app(scope, receive, send)
+            await asyncio.wait_for(cancelled.wait(), grace + 1)
+
+        assert grace == 0
+
+    def test_resume_unknown_stream(self, client: TestClient) -> None:
+        """Test that resuming an unknown response returns 404."""
+        response = client.get("/api/chat/stream/missing")
+
+        assert response.status_code == 404
+
+    def test_stream_chat_at_capacity(self, client: TestClient) -> None:
+        """Test that a saturated server returns 429 with Retry-After."""
+        rejected = AsyncMock(side_effect=AdmissionRejectedError("full", 3))
+
+        with patch("api.routers.chat._admission.acquire", rejected):
+            response = client.post("/api/chat/stream", json={"message": "Hi"})
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "3"
+
+    def test_admission_stats(self, client: TestClient) -> None:
+        """Test that admission counters are reported."""
+        response = client.get("/api/chat/admission")
+
+        assert response.status_code == 200
+        assert {"in_flight", "queued", "mean_wait_seconds"} <= response.json().keys()
+
+    def test_metrics_endpoint(self, client: TestClient) -> None:
+        """Test that metrics are exposed in the Prometheus text format."""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE agent_turns_total counter" in response.text
+        assert "api_admission_in_flight 0" in response.text.splitlines()
+
+    def test_request_id_echoed(self, client: TestClient) -> None:
+        """Test that the request id is taken from the header or generated."""
+        given = client.get("/health", headers={"X-Request-Id": "req-1"})
+        generated = client.get("/health")
+
+        assert given.headers["x-request-id"] == "req-1"
+        assert len(generated.headers["x-request-id"]) == 32
+
+    def test_slowest_traces(self, client: TestClient) -> None:
+        """Test that recent traces are listed slowest first."""
+        tracer = Tracer([RingBufferExporter()])
+        for name in ("fast", "slow"):
+            with tracer.span(name, conversation_id=name):
+                time.sleep(0.01 if name == "slow" else 0)
+
+        with patch.object(chat.get_agent(), "tracer", tracer):
+            response = client.get("/api/chat/debug/traces", params={"limit": 1})
+
+        assert response.status_code == 200
+        (trace,) = response.json()
+        assert trace["conversation_id"] == "slow"
+        assert trace["spans"][0]["name"] == "slow"
+
+    def test_traces_disabled(self, client: TestClient) -> None:
+        """Test that the traces endpoint is unavailable without tracing."""
+        with patch.object(chat.get_agent(), "tracer", Tracer()):
+            response = client.get("/api/chat/debug/traces")
+
+        assert response.status_code == 404
+
+    def test_batch_chat(self, client: TestClient) -> None:
+        """Test that batch results stream back as NDJSON lines."""
+        respond = AsyncMock(side_effect=lambda message, _cid: message.upper())
+
+        with patch.object(chat.get_agent(), "get_response", respond):
+            response = client.post(
+                "/api/chat/batch",
+                json={"items": [{"message": "a"}, {"message": "b"}]},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        results = sorted(
+            (json.loads(line) for line in response.text.splitlines()),
+            key=lambda r: r["index"],
+        )
+        assert [r["content"] for r in results] == ["A", "B"]
+        assert all(r["error"] is None for r in results)
@@ -0,0 +1,74 @@
+"""Tests for the traffic recorder."""
+
+import itertools
+import json
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+
+from api.recording import TrafficRecorder
+
+
+async def _chunks(*chunks: str) -> AsyncGenerator[str, None]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _response(content: str) -> str:
+    return content
+
+
+class TestTrafficRecorder:
+    """Test cases for TrafficRecorder."""
+
+    @pytest.mark.asyncio
+    async def test_disabled_passes_through(self) -> None:
+        """Test that without a path responses are returned untouched."""
+        recorder = TrafficRecorder()
+        chunks = _chunks("a")
+
+        assert not recorder.enabled
+        assert recorder.record_stream("stream", "hi", "c", chunks) is chunks
+        assert await recorder.record_response("complete", "hi", "c", _response("x"))
+
+    @pytest.mark.asyncio
+    async def test_records_shapes_without_content(self, tmp_path: Path) -> None:
+        """Test that lines hold timings and sizes but no text or ids."""
+        path = tmp_path / "traffic.jsonl"
+        ticks = itertools.count()
+        recorder = TrafficRecorder(path, clock=lambda: float(next(ticks)))
+
+        stream = recorder.record_stream("stream", "hello", "secret", _chunks("ab", "c"))
+        assert [chunk async for chunk in stream] == ["ab", "c"]
+        await recorder.record_response("complete", "hey", "other", _response("xyz"))
+        await recorder.record_response("batch", "yo", "secret", _response("q"))
+        recorder.close()
+
+        text = path.read_text()
+        records = [json.loads(line) for line in text.splitlines()]
+        assert "secret" not in text
+        assert "hello" not in text
+        assert [r["endpoint"] for r in records] == ["stream", "complete", "batch"]
+        assert [r["conversation"] for r in records] == [0, 1, 0]
+        assert [r["depth"] for r in records] == [0, 0, 1]
+        assert records[0]["message_chars"] == len("hello")
+        assert records[0]["sizes"] == [2, 1]
+        assert records[0]["delays"] == [1.0, 1.0]
+        assert records[1]["sizes"] == [3]
+        assert all(r["complete"] for r in records)
+
+    @pytest.mark.asyncio
+    async def test_interrupted_stream_is_recorded(self, tmp_path: Path) -> None:
+        """Test that a stream closed early is recorded as incomplete."""
+        path = tmp_path / "traffic.jsonl"
+        recorder = TrafficRecorder(path)
+
+        stream = recorder.record_stream("stream", "hi", "c", _chunks("a", "b"))
+        await anext(stream)
+        await stream.aclose()
+        recorder.close()
+
+        record = json.loads(path.read_text())
+        assert record["sizes"] == [1]
+        assert not record["complete"]
@@ -0,0 +1,43 @@
+"""Tests for replaying traffic recordings."""
+
+import json
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from api.replay import load_recording, profile_selector, replay_message
+
+
+class TestReplay:
+    """Test cases for the replay tool."""
+
+    def test_recording_is_ordered_by_arrival(self, tmp_path: Path) -> None:
+        """Test that records are replayed in arrival order."""
+        path = tmp_path / "traffic.jsonl"
+        lines = [json.dumps({"at": at}) for at in (0.5, 0.1, 0.3)]
+        path.write_text("\n".join(lines) + "\n")
+
+        assert [r["at"] for r in load_recording(path)] == [0.1, 0.3, 0.5]
+
+    def test_profile_follows_latest_user_message(self) -> None:
+        """Test that the marker of the newest user message picks the profile."""
+        records = [
+            {"delays": [0.1], "sizes": [5]},
+            {"delays": [0.2, 0.01], "sizes": [3, 4]},
+        ]
+        select = profile_selector(records)
+        message = replay_message(1, 40)
+
+        profile = select(
+            [
+                SystemMessage("prompt"),
+                HumanMessage(replay_message(0, 40)),
+                AIMessage("answer"),
+                HumanMessage(message),
+            ]
+        )
+
+        assert len(message) == 40
+        assert profile is not None
+        assert profile.sizes == (3, 4)
+        assert select([HumanMessage("no marker")]) is None
@@ -0,0 +1,162 @@
+"""Tests for resumable streamed responses."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest
+
+from api.resume import ResponseBuffer, ResumableStreams, StreamGapError
+from api.streaming import HEARTBEAT
+
+
+async def collect(stream: AsyncGenerator) -> list:
+    """Return every item of a stream."""
+    return [item async for item in stream]
+
+
+class TestResponseBuffer:
+    """Test cases for ResponseBuffer."""
+
+    @pytest.mark.asyncio
+    async def test_replays_after_sequence(self) -> None:
+        """Test that followers receive the frames after their last one."""
+        buffer = ResponseBuffer("r", "c")
+        for chunk in ("a", "b", "c"):
+            buffer.append(chunk)
+        buffer.finish()
+
+        assert await collect(buffer.follow(1)) == [(2, "b"), (3, "c")]
+
+    @pytest.mark.asyncio
+    async def test_follows_live_chunks(self) -> None:
+        """Test that a follower receives chunks appended while it waits."""
+        buffer = ResponseBuffer("r", "c")
+        follower = asyncio.create_task(collect(buffer.follow()))
+        await asyncio.sleep(0)
+
+        buffer.append("a")
+        await asyncio.sleep(0)
+        buffer.append("b")
+        buffer.finish()
+
+        assert await follower == [(1, "a"), (2, "b")]
+
+    @pytest.mark.asyncio
+    async def test_ring_drops_oldest(self) -> None:
+        """Test that resuming before the oldest held frame fails."""
+        buffer = ResponseBuffer("r", "c", max_frames=2)
+        for chunk in ("a", "b", "c"):
+            buffer.append(chunk)
+        buffer.finish()
+
+        assert not buffer.available(0)
+        assert buffer.available(1)
+        with pytest.raises(StreamGapError):
+            await anext(buffer.follow(0))
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_while_idle(self) -> None:
+        """Test that idle followers receive heartbeats."""
+        buffer = ResponseBuffer("r", "c")
+
+        assert await anext(buffer.follow(0, heartbeat_seconds=0.01)) is HEARTBEAT
+
+
+class TestResumableStreams:
+    """Test cases for ResumableStreams."""
+
+    @pytest.mark.asyncio
+    async def test_generation_survives_reconnect(self) -> None:
+        """Test that a follower can leave and resume the same generation."""
+        release = asyncio.Event()
+        calls = 0
+
+        async def source() -> AsyncGenerator[str, None]:
+            nonlocal calls
+            calls += 1
+            yield "a"
+            await release.wait()
+            yield "b"
+
+        streams = ResumableStreams(grace_seconds=1)
+        buffer = streams.start("r", "c", source())
+        first = buffer.follow()
+        assert await anext(first) == (1, "a")
+        await first.aclose()
+
+        release.set()
+        resumed = await collect(streams.get("r").follow(1))
+
+        assert resumed == [(2, "b")]
+        assert calls == 1
+        assert buffer.error is None
+
+    @pytest.mark.asyncio
+    async def test_abandoned_generation_is_cancelled(self) -> None:
+        """Test that generation stops when nobody resumes within the grace."""
+        cancelled = asyncio.Event()
+
+        async def source() -> AsyncGenerator[str, None]:
+            try:
+                yield "a"
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        streams = ResumableStreams(grace_seconds=0)
+        buffer = streams.start("r", "c", source())
+        follower = buffer.follow()
+        await anext(follower)
+        await follower.aclose()
+
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        assert buffer.done
+        assert buffer.error is not None
+
+    @pytest.mark.asyncio
+    async def test_oldest_responses_forgotten(self) -> None:
+        """Test that the registry keeps at most max_responses responses."""
+
+        async def source() -> AsyncGenerator[str, None]:
+            yield "a"
+
+        streams = ResumableStreams(max_responses=2)
+        for response_id in ("r1", "r2", "r3"):
+            streams.start(response_id, "c", source())
+
+        assert streams.get("r1") is None
+        assert len(streams) == 2
+        await streams.aclose()
+
+    @pytest.mark.asyncio
+    async def test_expired_responses_forgotten(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that only finished responses are forgotten after the TTL."""
+        now = 100.0
+        monkeypatch.setattr("api.resume.time.monotonic", lambda: now)
+        release = asyncio.Event()
+
+        async def source() -> AsyncGenerator[str, None]:
+            yield "a"
+
+        async def running() -> AsyncGenerator[str, None]:
+            await release.wait()
+            yield "a"
+
+        streams = ResumableStreams(ttl_seconds=10)
+        streams.start("live", "c", running())
+        for response_id in ("r1", "r2"):
+            buffer = streams.start(response_id, "c", source())
+            await collect(buffer.follow())
+            now += 6
+
+        assert streams.get("r1") is None
+        assert streams.get("r2") is not None
+        now += 6
+        assert streams.get("r2") is None
+        assert streams.get("live") is not None
+        release.set()
+        await streams.aclose()
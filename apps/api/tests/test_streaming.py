@@ -0,0 +1,251 @@
+"""Tests for SSE encoding and stream chunk coalescing."""
+
+import asyncio
+import json
+import zlib
+from collections.abc import AsyncGenerator
+
+import pytest
+
+from api.streaming import (
+    HEARTBEAT,
+    DisconnectAwareStreamingResponse,
+    NDJSONEncoder,
+    SSEEncoder,
+    StreamCompressor,
+    TextEncoder,
+    coalesce,
+    compress_stream,
+    negotiate_encoding,
+    negotiate_media_type,
+)
+
+
+async def timed(*items: tuple[float, str]) -> AsyncGenerator[str, None]:
+    """Yield each chunk after its delay in seconds."""
+    for delay, chunk in items:
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+async def collect(stream: AsyncGenerator) -> list:
+    """Return every item of a stream."""
+    return [item async for item in stream]
+
+
+class TestSSEEncoder:
+    """Test cases for SSEEncoder."""
+
+    def test_frame_matches_json_envelope(self) -> None:
+        """Test that frames decode to the same payload as a plain dict."""
+        encoder = SSEEncoder("r-1", 'conv "1"')
+
+        frame = encoder.frame('He said "hi"\n')
+
+        assert frame.startswith(b"data: ")
+        assert frame.endswith(b"\n\n")
+        assert json.loads(frame[6:]) == {
+            "id": "r-1",
+            "content": 'He said "hi"\n',
+            "conversation_id": 'conv "1"',
+            "role": "assistant",
+        }
+
+    def test_error_event(self) -> None:
+        """Test that errors are sent as a named event."""
+        frame = SSEEncoder("r", "c").error("busy")
+
+        assert frame == b'event: error\ndata: {"detail": "busy"}\n\n'
+
+
+class TestFormats:
+    """Test cases for the NDJSON and text encoders and negotiation."""
+
+    def test_ndjson_lines(self) -> None:
+        """Test that NDJSON frames are one JSON object per line."""
+        encoder = NDJSONEncoder("r", "c")
+
+        lines = (encoder.frame("hi") + encoder.error("x") + encoder.DONE).splitlines()
+
+        assert [json.loads(line) for line in lines] == [
+            {"id": "r", "content": "hi", "conversation_id": "c", "role": "assistant"},
+            {"event": "error", "detail": "x"},
+            {"event": "done"},
+        ]
+
+    def test_text_is_bare_content(self) -> None:
+        """Test that the text format sends only the content."""
+        encoder = TextEncoder("r", "c")
+
+        assert encoder.frame("héllo") == "héllo".encode()
+        assert encoder.DONE == encoder.HEARTBEAT == b""
+
+    @pytest.mark.parametrize(
+        ("accept", "expected"),
+        [
+            (None, "text/event-stream"),
+            ("*/*", "text/event-stream"),
+            ("application/x-ndjson", "application/x-ndjson"),
+            ("text/event-stream;q=0.5, text/plain", "text/plain"),
+            ("application/json, application/*;q=0.8", "application/x-ndjson"),
+            ("text/plain;q=0, text/*", "text/event-stream"),
+            ("application/xml", None),
+        ],
+    )
+    def test_negotiate_media_type(self, accept: str | None, expected: str) -> None:
+        """Test Accept header negotiation with quality values and wildcards."""
+        assert negotiate_media_type(accept) == expected
+
+    def test_negotiate_encoding(self) -> None:
+        """Test Accept-Encoding negotiation."""
+        assert negotiate_encoding(None) is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("deflate, gzip;q=0.5") == "gzip"
+        assert negotiate_encoding("gzip;q=0") is None
+
+
+class TestStreamCompressor:
+    """Test cases for streaming compression."""
+
+    def test_gzip_frames_decode_immediately(self) -> None:
+        """Test that every compressed frame decodes without later data."""
+        compressor = StreamCompressor("gzip")
+        decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+        for frame in (b"data: one\n\n", b"data: two\n\n"):
+            assert decoder.decompress(compressor.compress(frame)) == frame
+        decoder.decompress(compressor.finish())
+
+        assert decoder.eof
+
+    def test_unknown_encoding_rejected(self) -> None:
+        """Test that unsupported encodings are rejected."""
+        with pytest.raises(ValueError, match="deflate"):
+            StreamCompressor("deflate")
+
+    @pytest.mark.asyncio
+    async def test_compress_stream_round_trip(self) -> None:
+        """Test that a compressed stream decodes to the original frames."""
+
+        async def frames() -> AsyncGenerator[bytes, None]:
+            for index in range(50):
+                yield f"data: frame {index}\n\n".encode()
+
+        body = b"".join(await collect(compress_stream(frames(), "gzip")))
+
+        assert zlib.decompress(body, zlib.MAX_WBITS | 16) == b"".join(
+            [item async for item in frames()]
+        )
+
+
+class TestCoalesce:
+    """Test cases for coalesce."""
+
+    @pytest.mark.asyncio
+    async def test_disabled_window_passes_chunks_through(self) -> None:
+        """Test that a zero window keeps every chunk as its own frame."""
+        chunks = await collect(coalesce(timed((0, "a"), (0, "b"), (0, ""))))
+
+        assert chunks == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_fast_chunks_are_merged_after_first(self) -> None:
+        """Test that the first chunk is sent at once and the burst is merged."""
+        source = timed((0, "a"), (0, "b"), (0, "c"), (0.2, "d"))
+
+        chunks = await collect(coalesce(source, flush_interval_seconds=0.05))
+
+        assert chunks == ["a", "bc", "d"]
+
+    @pytest.mark.asyncio
+    async def test_size_threshold_flushes_early(self) -> None:
+        """Test that a full buffer is flushed before the window ends."""
+        source = timed((0, "a"), (0, "bb"), (0, "cc"), (0, "d"))
+
+        chunks = await collect(
+            coalesce(source, flush_interval_seconds=10, flush_chars=4)
+        )
+
+        assert chunks == ["a", "bbcc", "d"]
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_on_idle_stream(self) -> None:
+        """Test that idle streams yield heartbeats between chunks."""
+        source = timed((0.05, "late"))
+
+        chunks = await collect(coalesce(source, heartbeat_seconds=0.01))
+
+        assert chunks[0] is HEARTBEAT
+        assert chunks[-1] == "late"
+
+    @pytest.mark.asyncio
+    async def test_error_flushes_buffer_then_raises(self) -> None:
+        """Test that buffered chunks are delivered before a source error."""
+
+        async def failing() -> AsyncGenerator[str, None]:
+            yield "a"
+            yield "b"
+            msg = "boom"
+            raise RuntimeError(msg)
+
+        stream = coalesce(failing(), flush_interval_seconds=10)
+
+        assert await anext(stream) == "a"
+        assert await anext(stream) == "b"
+        with pytest.raises(RuntimeError, match="boom"):
+            await anext(stream)
+
+    @pytest.mark.asyncio
+    async def test_closing_cancels_source(self) -> None:
+        """Test that closing the coalesced stream stops the source."""
+        closed = asyncio.Event()
+
+        async def endless() -> AsyncGenerator[str, None]:
+            try:
+                while True:
+                    yield "x"
+                    await asyncio.sleep(0.01)
+            finally:
+                closed.set()
+
+        stream = coalesce(endless())
+        await anext(stream)
+        await stream.aclose()
+
+        assert closed.is_set()
+
+
+class TestDisconnectAwareStreamingResponse:
+    """Test cases for DisconnectAwareStreamingResponse."""
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_body(self) -> None:
+        """Test that a disconnect stops a body waiting for its next chunk."""
+        closed = asyncio.Event()
+        first_sent = asyncio.Event()
+        sent = []
+
+        async def body() -> AsyncGenerator[bytes, None]:
+            try:
+                yield b"first"
+                await asyncio.sleep(10)
+                yield b"never"
+            finally:
+                closed.set()
+
+        async def receive() -> dict:
+            # The client leaves once the first chunk was sent
+            await first_sent.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+            if message.get("body"):
+                first_sent.set()
+
+        response = DisconnectAwareStreamingResponse(body())
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        await asyncio.wait_for(response(scope, receive, send), 1)
+
+        assert closed.is_set()
+        assert sent[1]["body"] == b"first"
@@ -0,0 +1,65 @@
+"""Benchmark per-turn history windowing cost against conversation length.
+
+Compares the previous copy-and-rebuild trimming with ConversationHistory
+windows. Run with ``uv run python benchmarks/bench_history.py``.
+"""
+
+import timeit
+from functools import partial
+
+from agents.memory import ConversationHistory
+
+MEMORY_LIMIT = 20
+LENGTHS = (10, 100, 1_000, 10_000)
+TURNS = 2_000
+
+
+def _messages(length: int) -> list[dict[str, str]]:
+    roles = ("user", "assistant")
+    return [{"role": roles[i % 2], "content": f"message {i}"} for i in range(length)]
+
+
+def legacy_turn(stored: list[dict[str, str]], message: str) -> list[dict[str, str]]:
+    """Reproduce the copy, scan and rebuild trimming used before windowing."""
+    messages = stored.copy()
+    if not any(msg["role"] == "system" for msg in messages):
+        messages.insert(0, {"role": "system", "content": "prompt"})
+    messages.append({"role": "user", "content": message})
+    if len(messages) > MEMORY_LIMIT:
+        system_messages = [msg for msg in messages if msg["role"] == "system"]
+        non_system_messages = [msg for msg in messages if msg["role"] != "system"]
+        limit = MEMORY_LIMIT - len(system_messages)
+        messages = system_messages + non_system_messages[-limit:]
+    return messages
+
+
+def windowed_turn(history: ConversationHistory, message: str) -> list[dict[str, str]]:
+    """Build the prompt window and append the turn as the agent does."""
+    user_message = {"role": "user", "content": message}
+    window = [*history.window(MEMORY_LIMIT - 1), user_message]
+    history.append(user_message)
+    return window
+
+
+def main() -> None:
+    """Print the per-turn cost of both strategies for each history length."""
+    print(f"{'messages':>10} {'legacy us/turn':>16} {'window us/turn':>16}")
+    for length in LENGTHS:
+        stored = _messages(length)
+        # Legacy storage was never trimmed, so it grows with the conversation
+        legacy = timeit.timeit(partial(legacy_turn, stored, "hi"), number=TURNS)
+
+        history = ConversationHistory(max_messages=length)
+        history.append({"role": "system", "content": "prompt"})
+        for message in stored:
+            history.append(message)
+        windowed = timeit.timeit(partial(windowed_turn, history, "hi"), number=TURNS)
+
+        print(
+            f"{length:>10} {legacy / TURNS * 1e6:>16.2f} "
+            f"{windowed / TURNS * 1e6:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark semantic index lookup latency as the index grows.
+
+Requires numpy (``pip install 'agents[semantic]'``). Run with
+``uv run python benchmarks/bench_semantic.py``.
+"""
+
+import time
+
+import numpy as np
+
+from agents.cache.semantic import SemanticIndex
+
+DIM = 128
+SIZES = (1_000, 10_000, 100_000)
+LOOKUPS = 500
+
+
+def main() -> None:
+    """Print mean and p99 lookup latency and self-recall for each index size."""
+    rng = np.random.default_rng(0)
+    print(f"{'entries':>10} {'bits':>5} {'mean ms':>9} {'p99 ms':>9} {'recall':>8}")
+    for size in SIZES:
+        vectors = rng.standard_normal((size, DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index = SemanticIndex(DIM, capacity=size)
+        for i, vector in enumerate(vectors):
+            index.add(vector, str(i))
+
+        # Query slightly perturbed copies of stored entries
+        targets = rng.integers(0, size, LOOKUPS)
+        noise = rng.standard_normal((LOOKUPS, DIM)).astype(np.float32) * 0.02
+        queries = vectors[targets] + noise
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        latencies = []
+        found = 0
+        for target, query in zip(targets, queries, strict=True):
+            started = time.perf_counter()
+            value, _ = index.search(query)
+            latencies.append(time.perf_counter() - started)
+            found += value == str(target)
+
+        print(
+            f"{size:>10} {index.hash_bits:>5} {np.mean(latencies) * 1e3:>9.3f} "
+            f"{np.percentile(latencies, 99) * 1e3:>9.3f} {found / LOOKUPS:>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,25 @@
-"""Agents package for LangGraph StateGraph implementations."""
+"""Agents package for LangGraph StateGraph implementations.
 
-from .base import BaseAgent, ConversationState
-from .chat import ChatAgent, LLMChatAgent
+Agents are imported on first access, so that using a subpackage such as
+``agents.config`` or ``agents.telemetry`` does not load LangGraph.
+"""
+
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .base import BaseAgent, ConversationState
+    from .chat import ChatAgent, LLMChatAgent
 
 __all__ = ["BaseAgent", "ChatAgent", "ConversationState", "LLMChatAgent"]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "BaseAgent": ".base",
+        "ChatAgent": ".chat",
+        "ConversationState": ".base",
+        "LLMChatAgent": ".chat",
+    },
+)
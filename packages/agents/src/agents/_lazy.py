@@ -0,0 +1,28 @@
+"""Package exports imported on first access."""
+
+import importlib
+import sys
+from collections.abc import Callable
+from typing import Any
+
+
+def lazy_exports(package: str, exports: dict[str, str]) -> Callable[[str], Any]:
+    """Return a module ``__getattr__`` importing each export when first used.
+
+    ``exports`` maps every exported name to the module defining it, relative
+    to ``package``, optionally followed by ``:attribute`` when the export is
+    an alias. Imported values are kept on the package, so each is resolved
+    once.
+    """
+
+    def __getattr__(name: str) -> Any:  # noqa: ANN401, N807
+        target = exports.get(name)
+        if target is None:
+            msg = f"module {package!r} has no attribute {name!r}"
+            raise AttributeError(msg)
+        module, _, attribute = target.partition(":")
+        value = getattr(importlib.import_module(module, package), attribute or name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    return __getattr__
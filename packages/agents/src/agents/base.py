@@ -1,7 +1,7 @@
 """Base agent classes for LangGraph StateGraph implementations."""
 
 from collections.abc import AsyncGenerator
-from typing import Any, TypedDict
+from typing import Any, NotRequired, TypedDict
 
 from pydantic import BaseModel
 
@@ -13,6 +13,7 @@ class ConversationState(TypedDict):
     conversation_id: str
     current_response: str
     current_message: str
+    failed: NotRequired[bool]
 
 
 class BaseAgent(BaseModel):
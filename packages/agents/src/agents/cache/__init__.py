@@ -0,0 +1,57 @@
+"""Response caching and request coalescing package."""
+
+from typing import TYPE_CHECKING
+
+from agents._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .errors import IdempotencyConflictError
+    from .factory import (
+        create_cached_llm,
+        create_coalescing_llm,
+        create_idempotency_registry,
+        create_semantic_cache,
+    )
+    from .response import CachedChatModel, ResponseCache, ResponseCacheStats
+    from .singleflight import (
+        Broadcaster,
+        CoalescingChatModel,
+        IdempotencyRegistry,
+        SingleFlight,
+        SingleFlightStats,
+    )
+
+__all__ = [
+    "Broadcaster",
+    "CachedChatModel",
+    "CoalescingChatModel",
+    "IdempotencyConflictError",
+    "IdempotencyRegistry",
+    "ResponseCache",
+    "ResponseCacheStats",
+    "SingleFlight",
+    "SingleFlightStats",
+    "create_cached_llm",
+    "create_coalescing_llm",
+    "create_idempotency_registry",
+    "create_semantic_cache",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "Broadcaster": ".singleflight",
+        "CachedChatModel": ".response",
+        "CoalescingChatModel": ".singleflight",
+        "IdempotencyConflictError": ".errors",
+        "IdempotencyRegistry": ".singleflight",
+        "ResponseCache": ".response",
+        "ResponseCacheStats": ".response",
+        "SingleFlight": ".singleflight",
+        "SingleFlightStats": ".singleflight",
+        "create_cached_llm": ".factory",
+        "create_coalescing_llm": ".factory",
+        "create_idempotency_registry": ".factory",
+        "create_semantic_cache": ".factory",
+    },
+)
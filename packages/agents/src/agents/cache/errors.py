@@ -0,0 +1,5 @@
+"""Errors raised by the caches, importable without loading LangChain."""
+
+
+class IdempotencyConflictError(ValueError):
+    """Raised when an idempotency key is reused for a different request."""
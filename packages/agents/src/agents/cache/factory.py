@@ -0,0 +1,94 @@
+"""Factory for layering caches around LLM instances based on configuration."""
+
+from typing import TYPE_CHECKING, Any
+
+from agents.config import Settings
+from agents.llm.factory import LLMFactory
+
+from .response import CachedChatModel, ResponseCache
+from .singleflight import CoalescingChatModel, IdempotencyRegistry, SingleFlight
+
+if TYPE_CHECKING:
+    from .semantic import SemanticCache
+
+
+def create_cached_llm(
+    llm: Any,  # noqa: ANN401
+    settings: Settings,
+    cache: ResponseCache | None = None,
+) -> Any:  # noqa: ANN401
+    """Wrap an LLM with the response cache when enabled and deterministic."""
+    if not settings.response_cache_enabled:
+        return llm
+
+    llm_config = LLMFactory.get_llm_config(settings)
+    temperature = float(llm_config["temperature"])
+    if temperature > settings.response_cache_max_temperature:
+        # Sampled responses are not repeatable, so caching them would be wrong
+        return llm
+
+    if cache is None:
+        cache = ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            directory=settings.response_cache_dir,
+            disk_ttl_seconds=settings.response_cache_ttl_seconds,
+            prune_interval_seconds=settings.response_cache_prune_interval_seconds,
+        )
+    return CachedChatModel(
+        llm,
+        cache,
+        provider=settings.llm_provider,
+        model=str(llm_config["model"]),
+        params={"temperature": temperature, "max_tokens": llm_config["max_tokens"]},
+    )
+
+
+def create_coalescing_llm(
+    llm: Any,  # noqa: ANN401
+    settings: Settings,
+    flight: SingleFlight | None = None,
+) -> Any:  # noqa: ANN401
+    """Wrap an LLM so identical concurrent requests share one upstream call."""
+    if not settings.request_coalescing_enabled:
+        return llm
+
+    llm_config = LLMFactory.get_llm_config(settings)
+    return CoalescingChatModel(
+        llm,
+        provider=settings.llm_provider,
+        model=str(llm_config["model"]),
+        params={
+            "temperature": float(llm_config["temperature"]),
+            "max_tokens": llm_config["max_tokens"],
+        },
+        flight=flight,
+    )
+
+
+def create_idempotency_registry(settings: Settings) -> IdempotencyRegistry:
+    """Create the registry that deduplicates retried requests."""
+    return IdempotencyRegistry(
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        max_keys=settings.idempotency_max_keys,
+    )
+
+
+def create_semantic_cache(settings: Settings) -> "SemanticCache | None":
+    """Create the opt-in semantic cache, or None when it is disabled."""
+    if not settings.semantic_cache_enabled:
+        return None
+
+    try:
+        from .semantic import HashingEmbedder, SemanticCache  # noqa: PLC0415
+    except ImportError as e:
+        msg = (
+            "numpy is required for the semantic cache. "
+            "Install with: pip install 'agents[semantic]'"
+        )
+        raise ImportError(msg) from e
+
+    return SemanticCache(
+        HashingEmbedder(settings.semantic_cache_dim),
+        threshold=settings.semantic_cache_threshold,
+        capacity=settings.semantic_cache_max_entries,
+    )
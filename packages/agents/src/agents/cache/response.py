@@ -0,0 +1,255 @@
+"""Two-tier response cache for deterministic LLM requests."""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+from agents.llm.wrappers import ChatModelWrapper
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    params: dict[str, Any],
+    messages: list[BaseMessage],
+) -> str:
+    """Hash the provider, model, parameters and rendered message window."""
+    payload = {
+        "provider": provider,
+        "model": model,
+        "params": params,
+        "messages": [[message.type, message.content] for message in messages],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+@dataclass
+class ResponseCacheStats:
+    """Counters describing response cache behaviour."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    entries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups served from either tier."""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+class ResponseCache:
+    """Memory LRU in front of an optional on-disk tier of JSON files.
+
+    Entries are the chunk sequences of complete responses, so a cached answer
+    can be replayed as a stream. Disk reads and writes run in worker threads
+    and disk entries older than ``disk_ttl_seconds`` are ignored; once
+    started, the cache deletes them every ``prune_interval_seconds``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        directory: str | Path | None = None,
+        disk_ttl_seconds: float | None = 86_400.0,
+        prune_interval_seconds: float = 3600.0,
+    ) -> None:
+        """Initialize the cache, creating the disk directory if configured."""
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory is not None else None
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self._entries: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+        self._stats = ResponseCacheStats()
+        self._pruner: asyncio.Task[None] | None = None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    async def get(self, key: str) -> tuple[str, ...] | None:
+        """Return the cached chunks for a key, promoting disk hits to memory."""
+        chunks = self._entries.get(key)
+        if chunks is not None:
+            self._entries.move_to_end(key)
+            self._stats.memory_hits += 1
+            return chunks
+
+        if self.directory is not None:
+            chunks = await asyncio.to_thread(self._read, key)
+            if chunks is not None:
+                self._remember(key, chunks)
+                self._stats.disk_hits += 1
+                return chunks
+
+        self._stats.misses += 1
+        return None
+
+    async def put(self, key: str, chunks: list[str]) -> None:
+        """Store the chunks of a complete response in both tiers."""
+        stored = tuple(chunks)
+        self._remember(key, stored)
+        self._stats.stores += 1
+        if self.directory is not None:
+            await asyncio.to_thread(self._write, key, stored)
+
+    def stats(self) -> ResponseCacheStats:
+        """Return a snapshot of the cache counters."""
+        return ResponseCacheStats(
+            memory_hits=self._stats.memory_hits,
+            disk_hits=self._stats.disk_hits,
+            misses=self._stats.misses,
+            stores=self._stats.stores,
+            entries=len(self._entries),
+        )
+
+    def prune(self) -> int:
+        """Delete expired disk entries and return how many were removed."""
+        if self.directory is None or self.disk_ttl_seconds is None:
+            return 0
+        cutoff = time.time() - self.disk_ttl_seconds
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            with contextlib.suppress(FileNotFoundError):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+    async def start(self) -> None:
+        """Start pruning the disk tier in the background if not already running.
+
+        Expired entries are deleted right away, then at every interval.
+        """
+        if self.directory is None or self.disk_ttl_seconds is None:
+            return
+        pruner = self._pruner
+        if (
+            pruner is None
+            or pruner.done()
+            or pruner.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._pruner = asyncio.create_task(self._prune_loop())
+
+    async def aclose(self) -> None:
+        """Stop the background pruning."""
+        if self._pruner is not None:
+            self._pruner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._pruner
+            self._pruner = None
+
+    async def _prune_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.prune)
+            except OSError:
+                logger.exception("Failed to prune the response cache")
+            await asyncio.sleep(self.prune_interval_seconds)
+
+    def _remember(self, key: str, chunks: tuple[str, ...]) -> None:
+        self._entries[key] = chunks
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> tuple[str, ...] | None:
+        path = self._path(key)
+        try:
+            if (
+                self.disk_ttl_seconds is not None
+                and time.time() - path.stat().st_mtime > self.disk_ttl_seconds
+            ):
+                return None
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return tuple(data["chunks"])
+
+    def _write(self, key: str, chunks: tuple[str, ...]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            json.dump({"chunks": chunks}, tmp)
+        Path(tmp_name).replace(path)
+
+
+class CachedChatModel(ChatModelWrapper):
+    """Chat model wrapper that serves repeated requests from a response cache."""
+
+    def __init__(
+        self,
+        llm: Any,  # noqa: ANN401
+        cache: ResponseCache,
+        provider: str,
+        model: str,
+        params: dict[str, Any],
+    ) -> None:
+        """Wrap a chat model with a response cache."""
+        super().__init__(llm)
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.params = params
+
+    def cache_key(self, messages: list[BaseMessage]) -> str:
+        """Return the cache key for a message window."""
+        return make_cache_key(self.provider, self.model, self.params, messages)
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs: Any) -> Any:  # noqa: ANN401
+        """Return a cached response or generate and cache a new one."""
+        key = self.cache_key(messages)
+        chunks = await self.cache.get(key)
+        if chunks is not None:
+            return AIMessage(content="".join(chunks))
+
+        response = await self.llm.ainvoke(messages, **kwargs)
+        content = response.content if hasattr(response, "content") else str(response)
+        await self.cache.put(key, [content])
+        return response
+
+    async def astream(
+        self,
+        messages: list[BaseMessage],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncIterator[Any]:
+        """Replay cached chunks or stream and cache a new response."""
+        key = self.cache_key(messages)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            for content in cached:
+                yield AIMessageChunk(content=content)
+            return
+
+        chunks: list[str] = []
+        async with aclosing(self.llm.astream(messages, **kwargs)) as stream:
+            async for chunk in stream:
+                content = chunk.content if hasattr(chunk, "content") else str(chunk)
+                if content:
+                    chunks.append(content)
+                yield chunk
+        # Only responses that streamed to completion are cached
+        await self.cache.put(key, chunks)
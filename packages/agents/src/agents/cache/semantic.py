@@ -0,0 +1,268 @@
+"""Semantic response cache backed by a partitioned NumPy similarity index."""
+
+import hashlib
+import itertools
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import numpy.typing as npt
+
+Vector = npt.NDArray[np.float32]
+
+_WORD = re.compile(r"\w+")
+
+# Target rows per partition when the number of hash bits is derived
+_PARTITION_ROWS = 512
+
+
+class Embedder(ABC):
+    """Abstract base class for text embedders."""
+
+    @property
+    @abstractmethod
+    def dim(self) -> int:
+        """Return the embedding dimensionality."""
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> Vector:
+        """Return a ``len(texts) x dim`` matrix of embeddings."""
+
+    async def aembed(self, texts: list[str]) -> Vector:
+        """Embed texts from async code; remote embedders should override this."""
+        return self.embed(texts)
+
+
+@lru_cache(maxsize=65_536)
+def _feature(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest())
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic local embedder using signed feature hashing.
+
+    Words and word bigrams are hashed into a fixed number of buckets, which
+    makes texts sharing most of their wording land close together. It needs
+    no model or network access, so it suits tests and simple deployments.
+    """
+
+    def __init__(self, dim: int = 128) -> None:
+        """Initialize the embedder."""
+        self._dim = dim
+
+    @property
+    def dim(self) -> int:
+        """Return the embedding dimensionality."""
+        return self._dim
+
+    def embed(self, texts: list[str]) -> Vector:
+        """Return L2-normalised hashed bag-of-words vectors."""
+        vectors = np.zeros((len(texts), self._dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.lower())
+            features = [(word, 1.0) for word in words]
+            features += [(f"{a} {b}", 0.5) for a, b in itertools.pairwise(words)]
+            for token, weight in features:
+                feature = _feature(token)
+                sign = 1.0 if feature & 1 else -1.0
+                vectors[row, (feature >> 1) % self._dim] += sign * weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+@dataclass
+class SemanticCacheStats:
+    """Counters describing semantic cache behaviour."""
+
+    lookups: int = 0
+    hits: int = 0
+    evictions: int = 0
+    entries: int = 0
+    last_lookup_seconds: float = 0.0
+    max_lookup_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups that returned a cached answer."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class _Partition:
+    """Contiguous rows of the index that share a hash code."""
+
+    __slots__ = ("ids", "size", "vectors")
+
+    def __init__(self, dim: int) -> None:
+        self.vectors = np.empty((16, dim), dtype=np.float32)
+        self.ids = np.empty(16, dtype=np.int64)
+        self.size = 0
+
+    def add(self, entry_id: int, vector: Vector) -> int:
+        if self.size == len(self.ids):
+            self.vectors = np.resize(
+                self.vectors, (self.size * 2, self.vectors.shape[1])
+            )
+            self.ids = np.resize(self.ids, self.size * 2)
+        row = self.size
+        self.vectors[row] = vector
+        self.ids[row] = entry_id
+        self.size += 1
+        return row
+
+    def remove(self, row: int) -> int | None:
+        """Remove a row by moving the last row into it; return the moved id."""
+        self.size -= 1
+        if row == self.size:
+            return None
+        self.vectors[row] = self.vectors[self.size]
+        self.ids[row] = self.ids[self.size]
+        return int(self.ids[row])
+
+
+class SemanticIndex:
+    """Bounded cosine-similarity index over unit vectors.
+
+    Rows are partitioned by the sign pattern of ``hash_bits`` random
+    hyperplanes. A lookup scores the query against every row of its own
+    partition and of the partitions one bit away with a single matrix-vector
+    product each, so only a fraction of the index is scanned. By default the
+    number of bits grows with the capacity to keep partitions small; set
+    ``hash_bits`` to 0 for an exact scan. When full, the least recently used
+    entry is evicted.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        capacity: int = 10_000,
+        hash_bits: int | None = None,
+        seed: int = 0,
+    ) -> None:
+        """Initialize an empty index."""
+        self.dim = dim
+        self.capacity = capacity
+        if hash_bits is None:
+            hash_bits = max(0, round(math.log2(max(capacity / _PARTITION_ROWS, 1))))
+        self.hash_bits = hash_bits
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((hash_bits, dim)).astype(np.float32)
+        self._powers = 1 << np.arange(hash_bits)
+        self._partitions = [_Partition(dim) for _ in range(1 << hash_bits)]
+        self._probe_masks = [0, *(1 << bit for bit in range(hash_bits))]
+        self._location = np.full((capacity, 2), -1, dtype=np.int64)
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._values: list[str | None] = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+        self._tick = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Return the number of indexed entries."""
+        return self.capacity - len(self._free)
+
+    def search(
+        self, vector: Vector, min_score: float = -1.0
+    ) -> tuple[str | None, float]:
+        """Return the most similar stored value and its cosine similarity.
+
+        Only matches scoring at least ``min_score`` refresh the entry's recency.
+        """
+        code = self._code(vector)
+        best_score = -1.0
+        best_id = -1
+        for mask in self._probe_masks:
+            partition = self._partitions[code ^ mask]
+            if not partition.size:
+                continue
+            scores = partition.vectors[: partition.size] @ vector
+            row = int(scores.argmax())
+            if scores[row] > best_score:
+                best_score = float(scores[row])
+                best_id = int(partition.ids[row])
+        if best_id < 0:
+            return None, -1.0
+        if best_score >= min_score:
+            self._touch(best_id)
+        return self._values[best_id], best_score
+
+    def add(self, vector: Vector, value: str) -> None:
+        """Index a unit vector, evicting the least recently used entry if full."""
+        if not self._free:
+            self._evict()
+        entry_id = self._free.pop()
+        code = self._code(vector)
+        row = self._partitions[code].add(entry_id, vector)
+        self._location[entry_id] = (code, row)
+        self._values[entry_id] = value
+        self._touch(entry_id)
+
+    def _code(self, vector: Vector) -> int:
+        return int(((self._planes @ vector) > 0) @ self._powers)
+
+    def _touch(self, entry_id: int) -> None:
+        self._tick += 1
+        self._last_used[entry_id] = self._tick
+
+    def _evict(self) -> None:
+        entry_id = int(self._last_used.argmin())
+        code, row = (int(value) for value in self._location[entry_id])
+        moved = self._partitions[code].remove(row)
+        if moved is not None:
+            self._location[moved, 1] = row
+        self._location[entry_id] = -1
+        self._values[entry_id] = None
+        self._free.append(entry_id)
+        self.evictions += 1
+
+
+class SemanticCache:
+    """Serve stored answers for messages similar to previously answered ones."""
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        threshold: float = 0.9,
+        capacity: int = 10_000,
+        hash_bits: int | None = None,
+    ) -> None:
+        """Initialize the cache."""
+        self.embedder = embedder
+        self.threshold = threshold
+        self.index = SemanticIndex(embedder.dim, capacity, hash_bits)
+        self._stats = SemanticCacheStats()
+
+    async def lookup(self, message: str) -> str | None:
+        """Return a stored answer for a similar message above the threshold."""
+        vector = (await self.embedder.aembed([message]))[0]
+        started = time.perf_counter()
+        answer, score = self.index.search(vector, self.threshold)
+        elapsed = time.perf_counter() - started
+
+        self._stats.lookups += 1
+        self._stats.last_lookup_seconds = elapsed
+        self._stats.max_lookup_seconds = max(self._stats.max_lookup_seconds, elapsed)
+        if answer is None or score < self.threshold:
+            return None
+        self._stats.hits += 1
+        return answer
+
+    async def store(self, message: str, answer: str) -> None:
+        """Remember the answer given to a message."""
+        vector = (await self.embedder.aembed([message]))[0]
+        self.index.add(vector, answer)
+
+    def stats(self) -> SemanticCacheStats:
+        """Return a snapshot of the cache counters."""
+        return SemanticCacheStats(
+            lookups=self._stats.lookups,
+            hits=self._stats.hits,
+            evictions=self.index.evictions,
+            entries=len(self.index),
+            last_lookup_seconds=self._stats.last_lookup_seconds,
+            max_lookup_seconds=self._stats.max_lookup_seconds,
+        )
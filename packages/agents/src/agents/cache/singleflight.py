@@ -0,0 +1,263 @@
+"""Coalescing of identical in-flight requests and idempotent retries."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from agents.llm.wrappers import ChatModelWrapper
+
+from .errors import IdempotencyConflictError
+from .response import make_cache_key
+
+_DONE = object()
+
+
+class UpstreamCancelledError(RuntimeError):
+    """Raised to subscribers when the shared upstream stream was cancelled."""
+
+
+class Broadcaster:
+    """Fan out one async stream to any number of subscribers.
+
+    A single task drains the source and pushes every item into a buffer per
+    subscriber. Items already produced are replayed to late subscribers, so
+    each one sees the whole stream. The source is cancelled once the last
+    subscriber leaves before it is exhausted.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[Any],
+        on_close: Callable[[], None] | None = None,
+    ) -> None:
+        """Start draining the source."""
+        self._items: list[Any] = []
+        self._subscribers: set[asyncio.Queue[Any]] = set()
+        self._error: BaseException | None = None
+        self._on_close = on_close
+        self.closed = False
+        self._task = asyncio.create_task(self._pump(source))
+
+    @property
+    def subscriber_count(self) -> int:
+        """Return the number of active subscribers."""
+        return len(self._subscribers)
+
+    def subscribe(self) -> AsyncIterator[Any]:
+        """Register a subscriber and return its stream of items."""
+        queue: asyncio.Queue[Any] = asyncio.Queue()
+        for item in self._items:
+            queue.put_nowait(item)
+        if self.closed:
+            queue.put_nowait(_DONE)
+        self._subscribers.add(queue)
+        return self._drain(queue)
+
+    async def _drain(self, queue: asyncio.Queue[Any]) -> AsyncIterator[Any]:
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                yield item
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and not self.closed:
+                self._task.cancel()
+
+    async def _pump(self, source: AsyncIterator[Any]) -> None:
+        try:
+            async for item in source:
+                self._items.append(item)
+                for queue in self._subscribers:
+                    queue.put_nowait(item)
+        except asyncio.CancelledError:
+            self._error = UpstreamCancelledError("upstream stream was cancelled")
+            raise
+        except Exception as e:  # noqa: BLE001
+            self._error = e
+        finally:
+            self.closed = True
+            for queue in self._subscribers:
+                queue.put_nowait(_DONE)
+            if self._on_close is not None:
+                self._on_close()
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters describing request coalescing."""
+
+    flights: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+
+
+class SingleFlight:
+    """Share one upstream call between concurrent requests with the same key."""
+
+    def __init__(self) -> None:
+        """Initialize an empty flight table."""
+        self._streams: dict[str, Broadcaster] = {}
+        self._calls: dict[str, asyncio.Future[Any]] = {}
+        self._stats = SingleFlightStats()
+
+    def stream(
+        self, key: str, factory: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """Join the in-flight stream for a key, starting it if needed."""
+        broadcaster = self._streams.get(key)
+        if broadcaster is None or broadcaster.closed:
+            broadcaster = Broadcaster(factory(), on_close=lambda: self._forget(key))
+            self._streams[key] = broadcaster
+            self._stats.flights += 1
+        else:
+            self._stats.coalesced += 1
+        return broadcaster.subscribe()
+
+    async def call(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:  # noqa: ANN401
+        """Await the in-flight call for a key, starting it if needed."""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+            self._stats.flights += 1
+        else:
+            self._stats.coalesced += 1
+        # A cancelled caller must not cancel the call shared with others
+        return await asyncio.shield(future)
+
+    def stats(self) -> SingleFlightStats:
+        """Return a snapshot of the coalescing counters."""
+        return SingleFlightStats(
+            flights=self._stats.flights,
+            coalesced=self._stats.coalesced,
+            in_flight=len(self._streams) + len(self._calls),
+        )
+
+    def _forget(self, key: str) -> None:
+        broadcaster = self._streams.get(key)
+        if broadcaster is not None and broadcaster.closed:
+            del self._streams[key]
+
+
+class CoalescingChatModel(ChatModelWrapper):
+    """Chat model wrapper that coalesces identical concurrent requests."""
+
+    def __init__(
+        self,
+        llm: Any,  # noqa: ANN401
+        provider: str,
+        model: str,
+        params: dict[str, Any],
+        flight: SingleFlight | None = None,
+    ) -> None:
+        """Wrap a chat model with request coalescing."""
+        super().__init__(llm)
+        self.provider = provider
+        self.model = model
+        self.params = params
+        self.flight = flight if flight is not None else SingleFlight()
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs: Any) -> Any:  # noqa: ANN401
+        """Share one upstream invocation between identical concurrent requests."""
+        key = make_cache_key(self.provider, self.model, self.params, messages)
+        return await self.flight.call(key, lambda: self.llm.ainvoke(messages, **kwargs))
+
+    async def astream(
+        self,
+        messages: list[BaseMessage],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncIterator[Any]:
+        """Share one upstream stream between identical concurrent requests."""
+        key = make_cache_key(self.provider, self.model, self.params, messages)
+        stream = self.flight.stream(key, lambda: self.llm.astream(messages, **kwargs))
+        async with aclosing(stream):
+            async for chunk in stream:
+                yield chunk
+
+
+@dataclass
+class _IdempotentCall:
+    fingerprint: Hashable
+    future: asyncio.Future[Any]
+    finished_at: float | None = None
+
+
+class IdempotencyRegistry:
+    """Deduplicate retried requests carrying the same idempotency key.
+
+    A retry joins the original call while it is in flight and receives its
+    result once completed, for ``ttl_seconds`` after completion. Failed calls
+    are forgotten so that a retry runs again.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize an empty registry."""
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._clock = clock
+        self._calls: OrderedDict[str, _IdempotentCall] = OrderedDict()
+        # Completion time of completed keys, in completion and so expiry order
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self.replays = 0
+
+    def __len__(self) -> int:
+        """Return the number of remembered keys."""
+        return len(self._calls)
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+    ) -> Any:  # noqa: ANN401
+        """Run a call once per key, returning the shared result to retries."""
+        self._prune()
+        call = self._calls.get(key)
+        if call is not None:
+            if call.fingerprint != fingerprint:
+                msg = f"Idempotency key {key!r} was used for a different request"
+                raise IdempotencyConflictError(msg)
+            self.replays += 1
+        else:
+            call = _IdempotentCall(fingerprint, asyncio.ensure_future(factory()))
+            call.future.add_done_callback(lambda f: self._finish(key, f))
+            self._calls[key] = call
+        return await asyncio.shield(call.future)
+
+    def _finish(self, key: str, future: asyncio.Future[Any]) -> None:
+        call = self._calls.get(key)
+        if call is None or call.future is not future:
+            return
+        if future.cancelled() or future.exception() is not None:
+            del self._calls[key]
+        else:
+            call.finished_at = self._finished[key] = self._clock()
+
+    def _prune(self) -> None:
+        """Forget expired keys, and the oldest completed ones above the limit.
+
+        Only the expired keys are visited. Keys still in flight are kept.
+        """
+        deadline = self._clock() - self.ttl_seconds
+        while self._finished:
+            key, finished_at = next(iter(self._finished.items()))
+            if len(self._calls) <= self.max_keys and finished_at >= deadline:
+                break
+            del self._finished[key]
+            del self._calls[key]
@@ -1,8 +1,26 @@
-"""Chat agents package."""
+"""Chat agents package.
 
-from .llm_agent import LLMChatAgent
+The agent and LangGraph are imported on first access of an export.
+"""
 
-# Alias for backward compatibility
-ChatAgent = LLMChatAgent
+from typing import TYPE_CHECKING
 
-__all__ = ["ChatAgent", "LLMChatAgent"]
+from agents._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .llm_agent import LLMChatAgent, TurnStats
+
+    # Alias for backward compatibility
+    ChatAgent = LLMChatAgent
+
+__all__ = ["ChatAgent", "LLMChatAgent", "TurnStats"]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        # Alias for backward compatibility
+        "ChatAgent": ".llm_agent:LLMChatAgent",
+        "LLMChatAgent": ".llm_agent",
+        "TurnStats": ".llm_agent",
+    },
+)
@@ -1,15 +1,132 @@
 """LLM-powered chat agent using LangChain and LangGraph."""
 
+import asyncio
+import time
+import weakref
 from collections.abc import AsyncGenerator
-from typing import Any, ClassVar
+from contextlib import aclosing
+from dataclasses import dataclass, replace
+from types import TracebackType
+from typing import Any, ClassVar, Self
 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 
 from agents.base import BaseAgent, ConversationState
+from agents.cache import (
+    CachedChatModel,
+    ResponseCache,
+    create_cached_llm,
+    create_coalescing_llm,
+    create_idempotency_registry,
+    create_semantic_cache,
+)
 from agents.config import get_settings
-from agents.llm import LLMFactory
+from agents.llm import LLMFactory, TurnClassifier
+from agents.memory import (
+    ConversationHistory,
+    ConversationLocks,
+    ConversationStore,
+    create_conversation_store,
+)
+from agents.telemetry import REGISTRY, Tracer, create_tracer
+
+from .tracing import TracingChatModel, TracingMemorySaver, trace_node
+
+_TURNS = REGISTRY.counter(
+    "agent_turns_total", "Conversation turns by mode and outcome", ["mode", "outcome"]
+)
+_TURN_SECONDS = REGISTRY.histogram(
+    "agent_turn_seconds", "Duration of conversation turns", ["mode"]
+)
+_FIRST_CHUNK_SECONDS = REGISTRY.histogram(
+    "agent_stream_first_chunk_seconds",
+    "Time from the start of a streamed turn to its first chunk",
+)
+_CHUNK_GAP_SECONDS = REGISTRY.histogram(
+    "agent_stream_chunk_gap_seconds",
+    "Time between consecutive chunks of a streamed turn",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+_CHARS_PER_SECOND = REGISTRY.histogram(
+    "agent_stream_chars_per_second",
+    "Characters per second streamed after the first chunk",
+    buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+_STREAMS_IN_FLIGHT = REGISTRY.gauge(
+    "agent_streams_in_flight", "Streamed turns in progress"
+)
+_CONVERSATIONS = REGISTRY.gauge(
+    "agent_conversations", "Conversations resident in the conversation store"
+)
+_CONVERSATION_BYTES = REGISTRY.gauge(
+    "agent_conversation_store_bytes", "Estimated size of resident conversations"
+)
+_PENDING_WRITES = REGISTRY.gauge(
+    "agent_conversation_pending_writes", "Conversation writes not yet persisted"
+)
+
+
+@dataclass
+class TurnStats:
+    """Counters describing the turns run by an agent."""
+
+    turns: int = 0
+    streams: int = 0
+    failed: int = 0
+    interrupted: int = 0
+
+
+def _store_stat(store: weakref.ref[ConversationStore], name: str) -> float:
+    """Return a counter of a conversation store, or 0 once it is collected."""
+    conversations = store()
+    return getattr(conversations.stats(), name) if conversations is not None else 0
+
+
+class _TurnMeter:
+    """Record the duration, outcome and chunk timing of one turn."""
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.outcome = "ok"
+        self.started = time.perf_counter()
+        self.first_at: float | None = None
+        self.last_at = 0.0
+        self.chars = 0
+
+    def chunk(self, content: str) -> None:
+        now = time.perf_counter()
+        if self.first_at is None:
+            self.first_at = now
+            _FIRST_CHUNK_SECONDS.observe(now - self.started)
+        else:
+            _CHUNK_GAP_SECONDS.observe(now - self.last_at)
+            self.chars += len(content)
+        self.last_at = now
+
+    def __enter__(self) -> Self:
+        if self.mode == "stream":
+            _STREAMS_IN_FLIGHT.inc()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is not None:
+            interrupted = issubclass(exc_type, asyncio.CancelledError | GeneratorExit)
+            self.outcome = "interrupted" if interrupted else "error"
+        if self.mode == "stream":
+            _STREAMS_IN_FLIGHT.dec()
+        _TURNS.inc(mode=self.mode, outcome=self.outcome)
+        _TURN_SECONDS.observe(time.perf_counter() - self.started, mode=self.mode)
+        if self.outcome == "ok" and self.first_at is not None:
+            elapsed = self.last_at - self.first_at
+            if elapsed > 0:
+                _CHARS_PER_SECOND.observe(self.chars / elapsed)
 
 
 class LLMChatAgent(BaseAgent):
@@ -17,22 +134,95 @@ class LLMChatAgent(BaseAgent):
 
     model_config: ClassVar[dict[str, Any]] = {"extra": "allow"}
 
-    def __init__(self, **data: Any) -> None:  # noqa: ANN401
-        """Initialize the LLM chat agent."""
+    # Appended to the partial answer of a stream that was cut off
+    INTERRUPTED_MARKER: ClassVar[str] = "[interrupted]"
+
+    def __init__(
+        self,
+        conversation_store: ConversationStore | None = None,
+        turn_classifier: TurnClassifier | None = None,
+        tracer: Tracer | None = None,
+        **data: Any,  # noqa: ANN401
+    ) -> None:
+        """Initialize the LLM chat agent.
+
+        ``turn_classifier`` replaces the heuristic that picks a model tier
+        for each turn when tiering is enabled. ``tracer`` replaces the one
+        configured by the tracing settings.
+        """
         super().__init__(**data)
         self.settings = get_settings()
-        self.llm = LLMFactory.create_llm(self.settings)
-        self.memory = MemorySaver()
+        self.tracer = create_tracer(self.settings) if tracer is None else tracer
+        self.llm = self._build_llm(turn_classifier)
+        self.token_counter = LLMFactory.create_token_counter(self.settings)
+        self.semantic_cache = create_semantic_cache(self.settings)
+        self.idempotency = create_idempotency_registry(self.settings)
+        self.memory = (
+            TracingMemorySaver(self.tracer) if self.tracer.enabled else MemorySaver()
+        )
         self.graph = self._build_graph()
-        # Keep simple conversation storage for backward compatibility
-        self.conversations: dict[str, list[dict[str, str]]] = {}
+        if conversation_store is None:
+            conversation_store = create_conversation_store(
+                self.settings, self.token_counter
+            )
+        self.conversations = conversation_store
+        self.locks = ConversationLocks(
+            stripes=self.settings.conversation_lock_stripes,
+            policy=self.settings.conversation_concurrency_policy,
+        )
+        # Drop graph checkpoints together with evicted conversations
+        self.conversations.add_eviction_listener(self.memory.delete_thread)
+        self._stats = TurnStats()
+        # The store gauges follow the most recently created agent, without
+        # keeping its store alive once the agent is gone
+        store = weakref.ref(self.conversations)
+        _CONVERSATIONS.set_function(lambda: _store_stat(store, "conversations"))
+        _CONVERSATION_BYTES.set_function(lambda: _store_stat(store, "bytes"))
+        _PENDING_WRITES.set_function(lambda: _store_stat(store, "pending_writes"))
+
+    def stats(self) -> TurnStats:
+        """Return a snapshot of the turn counters."""
+        return replace(self._stats)
+
+    async def start(self) -> None:
+        """Start background maintenance; safe to call repeatedly."""
+        await self.conversations.start()
+        if self.response_cache is not None:
+            await self.response_cache.start()
+
+    async def aclose(self) -> None:
+        """Release background resources such as pending conversation writes."""
+        await self.conversations.aclose()
+        if self.response_cache is not None:
+            await self.response_cache.aclose()
+        self.tracer.close()
+
+    def _build_llm(self, turn_classifier: TurnClassifier | None = None) -> Any:  # noqa: ANN401
+        """Create the guarded LLM wrapped in the configured routing and caches."""
+        llm = LLMFactory.create_resilient_llm(self.settings)
+        if self.settings.llm_tiering_enabled:
+            llm = LLMFactory.create_tiered_llm(self.settings, llm, turn_classifier)
+        # Cache hits are answered before reaching the coalescing layer
+        llm = create_coalescing_llm(llm, self.settings)
+        llm = create_cached_llm(llm, self.settings)
+        self.response_cache: ResponseCache | None = (
+            llm.cache if isinstance(llm, CachedChatModel) else None
+        )
+        return TracingChatModel(llm, self.tracer) if self.tracer.enabled else llm
 
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph StateGraph for conversation flow."""
         graph = StateGraph(ConversationState)
 
-        graph.add_node("process_message", self._process_message)
-        graph.add_node("generate_response", self._generate_response)
+        nodes = {
+            "process_message": self._process_message,
+            "generate_response": self._generate_response,
+        }
+        for name, node in nodes.items():
+            traced = self.tracer.enabled
+            graph.add_node(
+                name, trace_node(self.tracer, name, node) if traced else node
+            )
 
         graph.add_edge(START, "process_message")
         graph.add_edge("process_message", "generate_response")
@@ -44,21 +234,16 @@ class LLMChatAgent(BaseAgent):
         """Process incoming message and update conversation state."""
         messages = state.get("messages", [])
 
-        # Add system message if not present
-        has_system = any(msg["role"] == "system" for msg in messages)
-        if not has_system:
+        # Add system message if not present; the window always leads with it
+        if not messages or messages[0]["role"] != "system":
             messages.insert(
                 0, {"role": "system", "content": self.settings.agent_system_prompt}
             )
 
-        # Limit conversation memory
-        if len(messages) > self.settings.conversation_memory_limit:
-            # Keep system message and recent messages
-            system_messages = [msg for msg in messages if msg["role"] == "system"]
-            non_system_messages = [msg for msg in messages if msg["role"] != "system"]
-            limit = self.settings.conversation_memory_limit - len(system_messages)
-            recent_messages = non_system_messages[-limit:]
-            messages = system_messages + recent_messages
+        # Limit conversation memory, keeping the system message
+        limit = self.settings.conversation_memory_limit
+        if len(messages) > limit:
+            messages = [messages[0], *messages[len(messages) - limit + 1 :]]
 
         state["messages"] = messages
         return state
@@ -83,73 +268,120 @@ class LLMChatAgent(BaseAgent):
             content = (
                 response.content if hasattr(response, "content") else str(response)
             )
+            state["failed"] = False
         except Exception as e:  # noqa: BLE001
             content = f"I apologize, but I encountered an error: {e!s}"
+            state["failed"] = True
 
         state["current_response"] = content
         return state
 
-    async def get_response(self, message: str, conversation_id: str) -> str:
-        """Get a complete response for the given message."""
-        # Initialize conversation history if not exists
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
-
-        # Add user message to history
-        self.conversations[conversation_id].append({"role": "user", "content": message})
-
-        # Create state for the graph
-        state: ConversationState = {
-            "messages": self.conversations[conversation_id],
-            "conversation_id": conversation_id,
-            "current_response": "",
-            "current_message": message,
-        }
-
-        # Run the graph with checkpointing
-        config = {"configurable": {"thread_id": conversation_id}}
-        result = await self.graph.ainvoke(state, config=config)
-        response = result["current_response"]
-
-        # Add assistant response to history
-        self.conversations[conversation_id].append(
-            {"role": "assistant", "content": response}
-        )
-
-        return response
+    async def _load_history(self, conversation_id: str) -> ConversationHistory:
+        """Load conversation history, pinning the system prompt if missing."""
+        await self.start()
+        history = await self.conversations.get(conversation_id)
+        if history is None or history.system is None:
+            await self.conversations.append(
+                conversation_id,
+                {"role": "system", "content": self.settings.agent_system_prompt},
+            )
+            history = self.conversations[conversation_id]
+        return history
 
-    def _get_conversation_state(
+    def _prompt_window(
+        self, history: ConversationHistory, user_message: dict[str, str]
+    ) -> list[dict[str, str]]:
+        """Build the prompt from the history window and the new user message."""
+        # Leave room for the user message within the memory and token limits
+        limit = self.settings.conversation_memory_limit - 1
+        token_budget = self.settings.conversation_token_budget
+        if token_budget is not None:
+            token_budget -= history.count_tokens(user_message)
+        return [*history.window(limit, token_budget), user_message]
+
+    def _is_first_turn(self, history: ConversationHistory) -> bool:
+        """Return whether the history holds nothing besides the system prompt."""
+        return len(history) <= (history.system is not None)
+
+    async def _semantic_lookup(self, message: str, *, first_turn: bool) -> str | None:
+        """Return a semantically cached answer for an opening message."""
+        if self.semantic_cache is None or not first_turn:
+            return None
+        return await self.semantic_cache.lookup(message)
+
+    async def _semantic_store(
+        self, message: str, response: str, *, first_turn: bool
+    ) -> None:
+        """Remember the answer to an opening message in the semantic cache."""
+        if self.semantic_cache is not None and first_turn:
+            await self.semantic_cache.store(message, response)
+
+    async def get_response(
         self,
-        config: dict,  # noqa: ARG002
         message: str,
         conversation_id: str,
-    ) -> list[dict[str, str]]:
-        """Get conversation state from memory and prepare messages."""
-        # Get from simple storage for now (backward compatibility)
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
-
-        messages = self.conversations[conversation_id].copy()
-
-        # Add system message if not present
-        has_system = any(msg["role"] == "system" for msg in messages)
-        if not has_system:
-            messages.insert(
-                0, {"role": "system", "content": self.settings.agent_system_prompt}
-            )
-
-        # Add new user message
-        messages.append({"role": "user", "content": message})
+        *,
+        idempotency_key: str | None = None,
+    ) -> str:
+        """Get a complete response for the given message.
+
+        Requests retried with the same ``idempotency_key`` share the result of
+        the first one, whether it is still in flight or already completed.
+        Turns within one conversation run one at a time according to the
+        configured concurrency policy.
+        """
+        if idempotency_key is None:
+            return await self._respond(message, conversation_id)
+        return await self.idempotency.run(
+            idempotency_key,
+            (conversation_id, message),
+            lambda: self._respond(message, conversation_id),
+        )
 
-        # Limit conversation memory
-        if len(messages) > self.settings.conversation_memory_limit:
-            system_messages = [msg for msg in messages if msg["role"] == "system"]
-            non_system_messages = [msg for msg in messages if msg["role"] != "system"]
-            limit = self.settings.conversation_memory_limit - len(system_messages)
-            recent_messages = non_system_messages[-limit:]
-            messages = system_messages + recent_messages
+    async def _respond(self, message: str, conversation_id: str) -> str:
+        """Run one conversation turn once no other turn is in progress."""
+        with (
+            _TurnMeter("complete") as meter,
+            self.tracer.span("turn", conversation_id=conversation_id, mode="complete"),
+        ):
+            async with self.locks.hold(conversation_id):
+                return await self._run_turn(message, conversation_id, meter)
+
+    async def _run_turn(
+        self, message: str, conversation_id: str, meter: _TurnMeter
+    ) -> str:
+        """Run one conversation turn and record it in history."""
+        self._stats.turns += 1
+        history = await self._load_history(conversation_id)
+        user_message = {"role": "user", "content": message}
+        first_turn = self._is_first_turn(history)
+
+        response = await self._semantic_lookup(message, first_turn=first_turn)
+        if response is None:
+            # Create state for the graph
+            state: ConversationState = {
+                "messages": self._prompt_window(history, user_message),
+                "conversation_id": conversation_id,
+                "current_response": "",
+                "current_message": message,
+            }
+
+            # Run the graph with checkpointing
+            config = {"configurable": {"thread_id": conversation_id}}
+            result = await self.graph.ainvoke(state, config=config)
+            response = result["current_response"]
+            if result.get("failed"):
+                self._stats.failed += 1
+                meter.outcome = "error"
+            else:
+                await self._semantic_store(message, response, first_turn=first_turn)
+
+        # Add the completed turn to history
+        await self.conversations.append(
+            conversation_id, user_message, {"role": "assistant", "content": response}
+        )
 
-        return messages
+        return response
 
     def _convert_to_langchain_messages(self, messages: list[dict[str, str]]) -> list:
         """Convert conversation messages to LangChain format."""
@@ -163,31 +395,88 @@ class LLMChatAgent(BaseAgent):
                 langchain_messages.append(AIMessage(content=msg["content"]))
         return langchain_messages
 
+    async def _record_interrupted(
+        self, conversation_id: str, user_message: dict[str, str], parts: list[str]
+    ) -> None:
+        """Record a turn whose stream was cut off before it finished."""
+        content = "".join([*parts, "\n\n" if parts else "", self.INTERRUPTED_MARKER])
+        await self.conversations.append(
+            conversation_id, user_message, {"role": "assistant", "content": content}
+        )
+
     async def stream_response(
         self, message: str, conversation_id: str
     ) -> AsyncGenerator[str, None]:
-        """Stream response chunks for the given message."""
-        config = {"configurable": {"thread_id": conversation_id}}
-
+        """Stream response chunks for the given message.
+
+        Turns within one conversation run one at a time according to the
+        configured concurrency policy. Closing the stream early or cancelling
+        the task consuming it stops the provider stream and records the
+        partial answer, followed by ``INTERRUPTED_MARKER``, in history.
+        """
+        with (
+            _TurnMeter("stream") as meter,
+            self.tracer.span("turn", conversation_id=conversation_id, mode="stream"),
+        ):
+            async with (
+                self.locks.hold(conversation_id),
+                aclosing(self._stream_turn(message, conversation_id, meter)) as turn,
+            ):
+                async for chunk in turn:
+                    meter.chunk(chunk)
+                    yield chunk
+
+    async def _stream_turn(
+        self, message: str, conversation_id: str, meter: _TurnMeter
+    ) -> AsyncGenerator[str, None]:
+        """Stream one conversation turn and record it in history."""
+        self._stats.turns += 1
+        self._stats.streams += 1
         # Get conversation state and prepare messages
-        messages = self._get_conversation_state(config, message, conversation_id)
-        langchain_messages = self._convert_to_langchain_messages(messages)
-
-        # Stream response
-        full_response = ""
-        try:
-            async for chunk in self.llm.astream(langchain_messages):
-                content = chunk.content if hasattr(chunk, "content") else str(chunk)
-                if content:
-                    full_response += content
-                    yield content
-        except Exception as e:  # noqa: BLE001
-            error_msg = f"I apologize, but I encountered an error: {e!s}"
-            full_response = error_msg
-            yield error_msg
+        history = await self._load_history(conversation_id)
+        user_message = {"role": "user", "content": message}
+        first_turn = self._is_first_turn(history)
+
+        full_response = await self._semantic_lookup(message, first_turn=first_turn)
+        if full_response is not None:
+            yield full_response
+        else:
+            messages = self._prompt_window(history, user_message)
+            langchain_messages = self._convert_to_langchain_messages(messages)
+
+            # Stream response, joining the parts once at the end
+            parts: list[str] = []
+            try:
+                async with aclosing(self.llm.astream(langchain_messages)) as stream:
+                    async for chunk in stream:
+                        content = (
+                            chunk.content if hasattr(chunk, "content") else str(chunk)
+                        )
+                        if content:
+                            parts.append(content)
+                            yield content
+            except Exception as e:  # noqa: BLE001
+                self._stats.failed += 1
+                meter.outcome = "error"
+                error_msg = f"I apologize, but I encountered an error: {e!s}"
+                full_response = error_msg
+                yield error_msg
+            except (asyncio.CancelledError, GeneratorExit):
+                self._stats.interrupted += 1
+                # Shielded so that a repeated cancellation cannot drop the turn
+                await asyncio.shield(
+                    self._record_interrupted(conversation_id, user_message, parts)
+                )
+                raise
+            else:
+                full_response = "".join(parts)
+                await self._semantic_store(
+                    message, full_response, first_turn=first_turn
+                )
 
         # Save to conversation history
-        self.conversations[conversation_id].append({"role": "user", "content": message})
-        self.conversations[conversation_id].append(
-            {"role": "assistant", "content": full_response}
+        await self.conversations.append(
+            conversation_id,
+            user_message,
+            {"role": "assistant", "content": full_response},
         )
@@ -0,0 +1,118 @@
+"""Spans around graph nodes, checkpoints and LLM calls of a chat agent."""
+
+import functools
+import inspect
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import aclosing
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from agents.llm.wrappers import ChatModelWrapper
+from agents.telemetry import Tracer
+
+
+def trace_node(
+    tracer: Tracer, name: str, node: Callable[..., Any]
+) -> Callable[..., Any]:
+    """Wrap a graph node, sync or async, in a ``node.<name>`` span."""
+    if inspect.iscoroutinefunction(node):
+
+        @functools.wraps(node)
+        async def traced_async(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            with tracer.span(f"node.{name}"):
+                return await node(*args, **kwargs)
+
+        return traced_async
+
+    @functools.wraps(node)
+    def traced(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        with tracer.span(f"node.{name}"):
+            return node(*args, **kwargs)
+
+    return traced
+
+
+class TracingMemorySaver(MemorySaver):
+    """In-memory checkpointer recording a span for every read and write."""
+
+    def __init__(self, tracer: Tracer) -> None:
+        """Create an empty checkpointer reporting to ``tracer``."""
+        super().__init__()
+        self.tracer = tracer
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Read the latest checkpoint of a thread."""
+        with self.tracer.span("checkpoint.read"):
+            return await super().aget_tuple(config)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Write a checkpoint."""
+        with self.tracer.span("checkpoint.write"):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Write the pending writes of a node."""
+        with self.tracer.span("checkpoint.write_pending", writes=len(writes)):
+            await super().aput_writes(config, writes, task_id, task_path)
+
+
+class TracingChatModel(ChatModelWrapper):
+    """Record a span for every call to the wrapped chat model.
+
+    Stream spans last until the stream ends and note the time to the first
+    chunk and the number of chunks.
+    """
+
+    def __init__(self, llm: Any, tracer: Tracer) -> None:  # noqa: ANN401
+        """Wrap a chat model, reporting to ``tracer``."""
+        super().__init__(llm)
+        self.tracer = tracer
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs: Any) -> Any:  # noqa: ANN401
+        """Generate a complete response."""
+        with self.tracer.span("llm.invoke", messages=len(messages)):
+            return await self.llm.ainvoke(messages, **kwargs)
+
+    async def astream(
+        self,
+        messages: list[BaseMessage],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncIterator[Any]:
+        """Stream response chunks."""
+        with self.tracer.span("llm.stream", messages=len(messages)) as span:
+            started = time.perf_counter()
+            chunks = 0
+            try:
+                async with aclosing(self.llm.astream(messages, **kwargs)) as stream:
+                    async for chunk in stream:
+                        if not chunks and span is not None:
+                            span.attributes["first_chunk_seconds"] = (
+                                time.perf_counter() - started
+                            )
+                        chunks += 1
+                        yield chunk
+            finally:
+                if span is not None:
+                    span.attributes["chunks"] = chunks
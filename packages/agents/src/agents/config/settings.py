@@ -19,8 +19,90 @@ class Settings(BaseSettings):
     )
 
     # LLM Provider Settings
-    llm_provider: Literal["gemini", "openai", "anthropic"] = Field(
-        default="gemini", description="LLM provider to use"
+    llm_provider: str = Field(
+        default="gemini",
+        description="LLM provider: gemini, openai, anthropic or a registered one",
+    )
+
+    # LLM Routing Settings
+    llm_routing_providers: list[str] = Field(
+        default_factory=list,
+        description="Providers to route between by latency (empty = llm_provider)",
+    )
+    llm_hedge_delay_seconds: float | None = Field(
+        default=None,
+        gt=0,
+        description="Delay before a request is also sent to the next provider",
+    )
+    llm_routing_ewma_alpha: float = Field(
+        default=0.2, gt=0.0, le=1.0, description="Weight of new latency samples"
+    )
+    llm_routing_cooldown_seconds: float = Field(
+        default=30.0, ge=0, description="Time a failed provider is ranked last"
+    )
+
+    # LLM Resilience Settings
+    llm_first_token_timeout_seconds: float | None = Field(
+        default=30.0, gt=0, description="Deadline for the first streamed chunk"
+    )
+    llm_idle_timeout_seconds: float | None = Field(
+        default=30.0, gt=0, description="Deadline between streamed chunks"
+    )
+    llm_request_timeout_seconds: float | None = Field(
+        default=120.0, gt=0, description="Deadline for a complete response"
+    )
+    llm_max_retries: int = Field(
+        default=2, ge=0, description="Retries of a call that failed before any output"
+    )
+    llm_retry_budget_ratio: float = Field(
+        default=0.2, ge=0.0, description="Retries allowed per request on average"
+    )
+    llm_retry_backoff_seconds: float = Field(
+        default=0.1, ge=0.0, description="Initial delay between retries"
+    )
+    llm_circuit_failure_threshold: int = Field(
+        default=5, gt=0, description="Consecutive failures that open a circuit"
+    )
+    llm_circuit_reset_seconds: float = Field(
+        default=30.0, gt=0, description="Time an open circuit waits before a probe"
+    )
+    llm_fallback_provider: str | None = Field(
+        default=None, description="Provider used while the primary one is failing"
+    )
+
+    # LLM Client Pool Settings
+    llm_client_pool_enabled: bool = Field(
+        default=True, description="Share LLM clients and HTTP connections"
+    )
+    llm_pool_max_connections: int = Field(
+        default=100, gt=0, description="Maximum open connections in the shared pool"
+    )
+    llm_pool_max_keepalive_connections: int = Field(
+        default=20, ge=0, description="Maximum idle connections kept alive"
+    )
+    llm_pool_keepalive_expiry_seconds: float = Field(
+        default=30.0, gt=0, description="Idle time before a connection is closed"
+    )
+
+    # LLM Tier Settings
+    llm_tiering_enabled: bool = Field(
+        default=False, description="Send cheap turns to a smaller, faster model"
+    )
+    llm_small_provider: str | None = Field(
+        default=None, description="Provider of the small tier (None = llm_provider)"
+    )
+    llm_small_model: str | None = Field(
+        default=None, description="Model of the small tier"
+    )
+    llm_tier_max_chars: int = Field(
+        default=280, gt=0, description="Longest message still sent to the small tier"
+    )
+    llm_tier_max_messages: int = Field(
+        default=6, gt=0, description="Largest prompt still sent to the small tier"
+    )
+    llm_tier_large_keywords: list[str] | None = Field(
+        default=None,
+        description="Phrases that send a turn to the large tier (None = built-in)",
     )
 
     # Google/Gemini Settings
@@ -77,31 +159,222 @@ class Settings(BaseSettings):
     conversation_memory_limit: int = Field(
         default=20, gt=0, description="Maximum number of messages to keep in memory"
     )
+    conversation_token_budget: int | None = Field(
+        default=None,
+        gt=0,
+        description="Maximum prompt tokens for system prompt and history (None = off)",
+    )
+
+    # Conversation Store Settings
+    conversation_store: Literal["memory", "sqlite"] = Field(
+        default="memory", description="Conversation store backend"
+    )
+    conversation_store_path: str = Field(
+        default="conversations.db", description="SQLite database file path"
+    )
+    conversation_store_batch_size: int = Field(
+        default=100, gt=0, description="Maximum messages committed per SQLite batch"
+    )
+    conversation_store_flush_interval_seconds: float = Field(
+        default=0.05, gt=0, description="Maximum delay before queued writes commit"
+    )
+    conversation_store_max_conversations: int = Field(
+        default=10_000, gt=0, description="Maximum number of conversations to keep"
+    )
+    conversation_store_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        gt=0,
+        description="Approximate memory budget for stored conversations in bytes",
+    )
+    conversation_ttl_seconds: float | None = Field(
+        default=3600.0,
+        gt=0,
+        description="Idle time after which a conversation is evicted (None = never)",
+    )
+    conversation_sweep_interval_seconds: float = Field(
+        default=60.0, gt=0, description="Interval between idle conversation sweeps"
+    )
+
+    # Conversation Concurrency Settings
+    conversation_concurrency_policy: Literal["queue", "reject", "cancel"] = Field(
+        default="queue",
+        description="Handling of a new turn while the conversation is busy",
+    )
+    conversation_lock_stripes: int = Field(
+        default=64, gt=0, description="Number of stripes in the conversation lock table"
+    )
+
+    # Response Cache Settings
+    response_cache_enabled: bool = Field(
+        default=False, description="Serve repeated deterministic requests from cache"
+    )
+    response_cache_max_temperature: float = Field(
+        default=0.0, ge=0.0, description="Highest temperature considered cacheable"
+    )
+    response_cache_max_entries: int = Field(
+        default=1024, gt=0, description="Maximum responses kept in the memory tier"
+    )
+    response_cache_dir: str | None = Field(
+        default=".cache/responses",
+        description="Directory of the on-disk tier (None = memory only)",
+    )
+    response_cache_ttl_seconds: float | None = Field(
+        default=86_400.0, gt=0, description="Lifetime of on-disk cache entries"
+    )
+    response_cache_prune_interval_seconds: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Interval between deletions of expired on-disk cache entries",
+    )
+
+    # Batch Settings
+    batch_max_concurrency: int = Field(
+        default=8, gt=0, description="Concurrent items per batch request"
+    )
+    batch_max_items: int = Field(
+        default=1000, gt=0, description="Maximum items in one batch request"
+    )
+
+    # Admission Settings
+    admission_max_in_flight: int = Field(
+        default=64, gt=0, description="Requests the API runs concurrently"
+    )
+    admission_max_queue: int = Field(
+        default=256, ge=0, description="Requests waiting for admission before 429"
+    )
+    admission_queue_timeout_seconds: float | None = Field(
+        default=30.0, gt=0, description="Longest wait for admission before 429"
+    )
+
+    # Request Coalescing Settings
+    request_coalescing_enabled: bool = Field(
+        default=True, description="Share one LLM call between identical requests"
+    )
+    idempotency_ttl_seconds: float = Field(
+        default=300.0, gt=0, description="Lifetime of completed idempotent results"
+    )
+    idempotency_max_keys: int = Field(
+        default=10_000, gt=0, description="Maximum remembered idempotency keys"
+    )
+
+    # Semantic Cache Settings
+    semantic_cache_enabled: bool = Field(
+        default=False, description="Answer first turns similar to earlier ones"
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.9, ge=-1.0, le=1.0, description="Minimum cosine similarity to hit"
+    )
+    semantic_cache_max_entries: int = Field(
+        default=10_000, gt=0, description="Maximum answers kept in the index"
+    )
+    semantic_cache_dim: int = Field(
+        default=128, gt=0, description="Dimensionality of the local hash embedder"
+    )
+
+    # Streaming Settings
+    stream_flush_interval_seconds: float = Field(
+        default=0.02, ge=0, description="Window in which stream chunks are merged"
+    )
+    stream_flush_chars: int = Field(
+        default=4096, gt=0, description="Buffered characters that force a flush"
+    )
+    stream_heartbeat_seconds: float | None = Field(
+        default=15.0, gt=0, description="Idle time before a keep-alive comment"
+    )
+    stream_compression_enabled: bool = Field(
+        default=True, description="Compress streams for clients accepting gzip/br"
+    )
+    stream_resume_grace_seconds: float = Field(
+        default=0.0,
+        ge=0,
+        description=(
+            "Time a dropped stream keeps generating for the client to resume it"
+            " live; tokens generated meanwhile are paid for even if nobody"
+            " resumes (0 = stop at once, replaying only what was generated)"
+        ),
+    )
+    stream_resume_ttl_seconds: float = Field(
+        default=60.0, gt=0, description="Time a finished stream stays resumable"
+    )
+    stream_resume_max_frames: int = Field(
+        default=4096, gt=0, description="Frames buffered per resumable stream"
+    )
+    stream_resume_max_responses: int = Field(
+        default=1024, gt=0, description="Maximum resumable streams kept"
+    )
+
+    # Tracing Settings
+    tracing_enabled: bool = Field(
+        default=False, description="Record spans for turns, nodes and LLM calls"
+    )
+    tracing_buffer_traces: int = Field(
+        default=256, gt=0, description="Recent traces kept in memory"
+    )
+    tracing_export_path: str | None = Field(
+        default=None, description="JSON-lines file every span is appended to"
+    )
+
+    # Traffic Recording Settings
+    traffic_recording_path: str | None = Field(
+        default=None,
+        description="JSON-lines file anonymised request shapes and chunk timings "
+        "are appended to",
+    )
+
+    # Server Settings
+    server_host: str = Field(default="0.0.0.0", description="Address the API binds")
+    server_port: int = Field(default=8001, description="Port the API listens on")
+    server_workers: int = Field(
+        default=1,
+        ge=1,
+        description="Worker processes, each owning a share of the conversations",
+    )
+    server_loop: Literal["auto", "asyncio", "uvloop"] = Field(
+        default="auto", description="Event loop; auto uses uvloop when installed"
+    )
+    server_http: Literal["auto", "h11", "httptools"] = Field(
+        default="auto",
+        description="HTTP parser; auto uses httptools when installed",
+    )
+    server_backlog: int = Field(
+        default=2048, gt=0, description="Connections queued before accept"
+    )
+    server_keep_alive_seconds: int = Field(
+        default=5, ge=0, description="Idle time before keep-alive connections close"
+    )
+    server_limit_concurrency: int | None = Field(
+        default=None,
+        gt=0,
+        description="Connections and requests above which new requests get 503",
+    )
 
-    def get_llm_config(self) -> dict[str, str | float | int]:
-        """Get LLM configuration based on the selected provider."""
-        if self.llm_provider == "gemini":
+    def get_llm_config(
+        self, provider: str | None = None
+    ) -> dict[str, str | float | int]:
+        """Get LLM configuration for a provider, by default the selected one."""
+        provider = provider or self.llm_provider
+        if provider == "gemini":
             return {
                 "api_key": self.google_api_key,
                 "model": self.gemini_model,
                 "temperature": self.gemini_temperature,
                 "max_tokens": self.gemini_max_tokens,
             }
-        if self.llm_provider == "openai":
+        if provider == "openai":
             return {
                 "api_key": self.openai_api_key,
                 "model": self.openai_model,
                 "temperature": self.openai_temperature,
                 "max_tokens": self.openai_max_tokens,
             }
-        if self.llm_provider == "anthropic":
+        if provider == "anthropic":
             return {
                 "api_key": self.anthropic_api_key,
                 "model": self.anthropic_model,
                 "temperature": self.anthropic_temperature,
                 "max_tokens": self.anthropic_max_tokens,
             }
-        msg = f"Unsupported LLM provider: {self.llm_provider}"
+        msg = f"Unsupported LLM provider: {provider}"
         raise ValueError(msg)
 
 
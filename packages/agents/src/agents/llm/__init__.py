@@ -1,6 +1,70 @@
 """LLM provider abstraction package."""
 
-from .factory import LLMFactory
-from .providers import LLMProvider
+from typing import TYPE_CHECKING
 
-__all__ = ["LLMFactory", "LLMProvider"]
+from agents._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .factory import LLMFactory
+    from .fake import ChunkProfile, FakeChatModel, FakeProvider
+    from .pool import ClientPool, ClientPoolStats
+    from .providers import LLMProvider
+    from .resilience import (
+        CircuitBreaker,
+        CircuitOpenError,
+        CircuitState,
+        ResilientChatModel,
+        StreamTimeoutError,
+    )
+    from .router import ProviderStats, RoutingChatModel
+    from .tiers import HeuristicClassifier, TieredChatModel, TierStats, TurnClassifier
+    from .tokens import TokenCounter, estimate_tokens
+
+__all__ = [
+    "ChunkProfile",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "CircuitState",
+    "ClientPool",
+    "ClientPoolStats",
+    "FakeChatModel",
+    "FakeProvider",
+    "HeuristicClassifier",
+    "LLMFactory",
+    "LLMProvider",
+    "ProviderStats",
+    "ResilientChatModel",
+    "RoutingChatModel",
+    "StreamTimeoutError",
+    "TierStats",
+    "TieredChatModel",
+    "TokenCounter",
+    "TurnClassifier",
+    "estimate_tokens",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "ChunkProfile": ".fake",
+        "CircuitBreaker": ".resilience",
+        "CircuitOpenError": ".resilience",
+        "CircuitState": ".resilience",
+        "ClientPool": ".pool",
+        "ClientPoolStats": ".pool",
+        "FakeChatModel": ".fake",
+        "FakeProvider": ".fake",
+        "HeuristicClassifier": ".tiers",
+        "LLMFactory": ".factory",
+        "LLMProvider": ".providers",
+        "ProviderStats": ".router",
+        "ResilientChatModel": ".resilience",
+        "RoutingChatModel": ".router",
+        "StreamTimeoutError": ".resilience",
+        "TierStats": ".tiers",
+        "TieredChatModel": ".tiers",
+        "TokenCounter": ".tokens",
+        "TurnClassifier": ".tiers",
+        "estimate_tokens": ".tokens",
+    },
+)
@@ -1,12 +1,24 @@
 """LLM factory for creating LLM instances based on configuration."""
 
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from langchain_core.language_models.base import BaseLanguageModel
 
 from agents.config import Settings
 
+from .pool import ClientPool
 from .providers import AnthropicProvider, GeminiProvider, LLMProvider, OpenAIProvider
+from .resilience import CircuitBreaker, ResilientChatModel, RetryBudget
+from .router import RoutingChatModel
+from .tiers import (
+    DEFAULT_LARGE_KEYWORDS,
+    LARGE_TIER,
+    SMALL_TIER,
+    HeuristicClassifier,
+    TieredChatModel,
+    TurnClassifier,
+)
+from .tokens import TokenCounter
 
 
 class LLMFactory:
@@ -17,11 +29,25 @@ class LLMFactory:
         "openai": OpenAIProvider(),
         "anthropic": AnthropicProvider(),
     }
+    _pool: ClassVar[ClientPool | None] = None
 
     @classmethod
-    def create_llm(cls, settings: Settings) -> BaseLanguageModel:
-        """Create an LLM instance based on settings."""
-        provider_name = settings.llm_provider.lower()
+    def create_llm(cls, settings: Settings) -> BaseLanguageModel | RoutingChatModel:
+        """Create an LLM instance based on settings.
+
+        When ``llm_routing_providers`` lists several providers, a router that
+        picks the fastest healthy one per request is returned instead.
+        """
+        if settings.llm_routing_providers:
+            return cls.create_routing_llm(settings)
+        return cls.create_provider_llm(settings, settings.llm_provider)
+
+    @classmethod
+    def create_provider_llm(
+        cls, settings: Settings, provider_name: str, model: str | None = None
+    ) -> BaseLanguageModel:
+        """Create an LLM instance for a provider, optionally overriding its model."""
+        provider_name = provider_name.lower()
 
         if provider_name not in cls._providers:
             available = ", ".join(cls._providers.keys())
@@ -29,15 +55,143 @@ class LLMFactory:
             raise ValueError(msg)
 
         provider = cls._providers[provider_name]
-        llm_config = settings.get_llm_config()
+        llm_config = provider.llm_config(settings)
+        if model is not None:
+            llm_config["model"] = model
 
         # Validate API key
         api_key = llm_config.get("api_key")
-        if not api_key:
+        if provider.requires_api_key and not api_key:
             msg = f"API key not found for provider: {provider_name}"
             raise ValueError(msg)
 
-        return provider.create_llm(**llm_config)
+        if not settings.llm_client_pool_enabled:
+            return provider.create_llm(**llm_config)
+        return cls.get_pool(settings).get(provider, **llm_config)
+
+    @classmethod
+    def get_pool(cls, settings: Settings) -> ClientPool:
+        """Return the process-wide client pool, creating it on first use."""
+        if cls._pool is None:
+            cls._pool = ClientPool(
+                max_connections=settings.llm_pool_max_connections,
+                max_keepalive_connections=settings.llm_pool_max_keepalive_connections,
+                keepalive_expiry_seconds=settings.llm_pool_keepalive_expiry_seconds,
+            )
+        return cls._pool
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared client pool and its connections."""
+        if cls._pool is not None:
+            pool, cls._pool = cls._pool, None
+            await pool.aclose()
+
+    @classmethod
+    def create_resilient_llm(
+        cls, settings: Settings
+    ) -> ResilientChatModel | RoutingChatModel:
+        """Create the configured LLM guarded by breakers, deadlines and retries.
+
+        A configured ``llm_fallback_provider`` serves requests while the
+        primary provider fails; routed providers fail over to each other.
+        """
+        if settings.llm_routing_providers:
+            return cls.create_routing_llm(settings)
+
+        fallback = None
+        if settings.llm_fallback_provider:
+            fallback = cls.guard_llm(
+                cls.create_provider_llm(settings, settings.llm_fallback_provider),
+                settings,
+                settings.llm_fallback_provider,
+            )
+        return cls.guard_llm(
+            cls.create_llm(settings), settings, settings.llm_provider, fallback
+        )
+
+    @staticmethod
+    def guard_llm(
+        llm: Any,  # noqa: ANN401
+        settings: Settings,
+        provider_name: str,
+        fallback: Any = None,  # noqa: ANN401
+    ) -> ResilientChatModel:
+        """Wrap a provider's LLM with the configured resilience policies."""
+        breaker = CircuitBreaker(
+            provider_name,
+            failure_threshold=settings.llm_circuit_failure_threshold,
+            reset_timeout_seconds=settings.llm_circuit_reset_seconds,
+        )
+        return ResilientChatModel(
+            llm,
+            breaker,
+            fallback=fallback,
+            first_token_timeout_seconds=settings.llm_first_token_timeout_seconds,
+            idle_timeout_seconds=settings.llm_idle_timeout_seconds,
+            request_timeout_seconds=settings.llm_request_timeout_seconds,
+            max_retries=settings.llm_max_retries,
+            retry_budget=RetryBudget(ratio=settings.llm_retry_budget_ratio),
+            retry_backoff_seconds=settings.llm_retry_backoff_seconds,
+        )
+
+    @classmethod
+    def create_tiered_llm(
+        cls,
+        settings: Settings,
+        large: Any,  # noqa: ANN401
+        classifier: TurnClassifier | None = None,
+    ) -> TieredChatModel:
+        """Put a small, fast model tier next to the given large one.
+
+        Turns are classified with ``classifier`` or, by default, with a
+        ``HeuristicClassifier`` configured from settings.
+        """
+        if not settings.llm_small_model:
+            msg = "llm_small_model is required when llm_tiering_enabled is set"
+            raise ValueError(msg)
+        provider_name = settings.llm_small_provider or settings.llm_provider
+        small = cls.guard_llm(
+            cls.create_provider_llm(settings, provider_name, settings.llm_small_model),
+            settings,
+            f"{provider_name}:{settings.llm_small_model}",
+        )
+        if classifier is None:
+            classifier = HeuristicClassifier(
+                max_chars=settings.llm_tier_max_chars,
+                max_messages=settings.llm_tier_max_messages,
+                large_keywords=(
+                    DEFAULT_LARGE_KEYWORDS
+                    if settings.llm_tier_large_keywords is None
+                    else settings.llm_tier_large_keywords
+                ),
+            )
+        return TieredChatModel({SMALL_TIER: small, LARGE_TIER: large}, classifier)
+
+    @classmethod
+    def create_routing_llm(cls, settings: Settings) -> RoutingChatModel:
+        """Create a latency-aware router over the guarded providers."""
+        llms = {
+            name: cls.guard_llm(cls.create_provider_llm(settings, name), settings, name)
+            for name in settings.llm_routing_providers
+        }
+        return RoutingChatModel(
+            llms,
+            hedge_delay_seconds=settings.llm_hedge_delay_seconds,
+            alpha=settings.llm_routing_ewma_alpha,
+            cooldown_seconds=settings.llm_routing_cooldown_seconds,
+        )
+
+    @classmethod
+    def create_token_counter(cls, settings: Settings) -> TokenCounter:
+        """Create a token counter for the configured provider and model."""
+        provider = cls.get_provider(settings.llm_provider.lower())
+        return provider.create_token_counter(**provider.llm_config(settings))
+
+    @classmethod
+    def get_llm_config(cls, settings: Settings) -> dict[str, Any]:
+        """Return the configuration of the selected provider."""
+        return cls.get_provider(settings.llm_provider.lower()).llm_config(settings)
 
     @classmethod
     def register_provider(cls, provider: LLMProvider) -> None:
@@ -0,0 +1,177 @@
+"""Deterministic offline chat model for benchmarks and load tests."""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import dataclass
+from typing import Any, ClassVar
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.base import BaseLanguageModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from agents.config import Settings
+
+from .providers import LLMProvider
+
+_TEXT = (
+    "the quick brown fox jumps over the lazy dog while streaming tokens "
+    "arrive at a steady pace so that latency and throughput can be measured"
+)
+
+
+def fake_response(chars: int) -> str:
+    """Return ``chars`` characters of deterministic filler text."""
+    repeats = chars // (len(_TEXT) + 1) + 1
+    return " ".join([_TEXT] * repeats)[:chars]
+
+
+@dataclass(frozen=True)
+class ChunkProfile:
+    """Timing of one streamed response: the wait before each chunk and its size."""
+
+    delays: tuple[float, ...]
+    sizes: tuple[int, ...]
+
+
+# Picks the recorded profile to reproduce for a prompt, if any
+ProfileSelector = Callable[[list[BaseMessage]], ChunkProfile | None]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model answering every prompt with the same text, at a set pace.
+
+    Streams wait ``first_token_delay_seconds`` before the first chunk and
+    then send ``chunk_chars`` characters per chunk at ``chunks_per_second``,
+    or as fast as possible when that is None. When ``profile_for`` returns a
+    profile for the prompt, its delays and chunk sizes are reproduced
+    instead. Complete responses take as long as the equivalent stream.
+    """
+
+    response_chars: int = 400
+    chunk_chars: int = 4
+    chunks_per_second: float | None = None
+    first_token_delay_seconds: float = 0.0
+    profile_for: ProfileSelector | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _plan(self, messages: list[BaseMessage]) -> list[tuple[float, str]]:
+        """Return the delay before each chunk of the response and its text."""
+        profile = self.profile_for(messages) if self.profile_for else None
+        if profile is None:
+            text = fake_response(self.response_chars)
+            size = self.chunk_chars
+            # An empty response is one empty chunk, as streams need a chunk
+            chunks = [text[i : i + size] for i in range(0, len(text), size)] or [""]
+            interval = 1 / self.chunks_per_second if self.chunks_per_second else 0.0
+            delays = [self.first_token_delay_seconds] + [interval] * (len(chunks) - 1)
+            return list(zip(delays, chunks, strict=True))
+
+        text = fake_response(sum(profile.sizes))
+        plan = []
+        start = 0
+        for delay, size in zip(profile.delays, profile.sizes, strict=True):
+            plan.append((delay, text[start : start + size]))
+            start += size
+        return plan or [(0.0, "")]
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: CallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> ChatResult:
+        plan = self._plan(messages)
+        time.sleep(sum(delay for delay, _ in plan))
+        message = AIMessage(content="".join(chunk for _, chunk in plan))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> ChatResult:
+        plan = self._plan(messages)
+        await asyncio.sleep(sum(delay for delay, _ in plan))
+        message = AIMessage(content="".join(chunk for _, chunk in plan))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: CallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> Iterator[ChatGenerationChunk]:
+        for delay, chunk in self._plan(messages):
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for delay, chunk in self._plan(messages):
+            # Even without a delay, yield to the event loop as a network read would
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+
+class FakeProvider(LLMProvider):
+    """Offline provider serving ``FakeChatModel`` instances.
+
+    Register it with ``LLMFactory.register_provider(FakeProvider(...))`` and
+    select it with ``llm_provider="fake"``. It needs no API key and ignores
+    the provider settings.
+    """
+
+    requires_api_key: ClassVar[bool] = False
+
+    def __init__(
+        self,
+        *,
+        response_chars: int = 400,
+        chunk_chars: int = 4,
+        chunks_per_second: float | None = None,
+        first_token_delay_seconds: float = 0.0,
+        profile_for: ProfileSelector | None = None,
+    ) -> None:
+        """Configure the responses of the models this provider creates."""
+        self.response_chars = response_chars
+        self.chunk_chars = chunk_chars
+        self.chunks_per_second = chunks_per_second
+        self.first_token_delay_seconds = first_token_delay_seconds
+        self.profile_for = profile_for
+
+    @property
+    def provider_name(self) -> str:
+        """Return the provider name."""
+        return "fake"
+
+    def llm_config(self, settings: Settings) -> dict[str, Any]:  # noqa: ARG002
+        """Return a fixed configuration; the fake model has no settings."""
+        return {"model": "fake", "temperature": 0.0, "max_tokens": 0}
+
+    def create_llm(self, **kwargs: Any) -> BaseLanguageModel:  # noqa: ANN401, ARG002
+        """Create a fake chat model with this provider's pacing."""
+        return FakeChatModel(
+            response_chars=self.response_chars,
+            chunk_chars=self.chunk_chars,
+            chunks_per_second=self.chunks_per_second,
+            first_token_delay_seconds=self.first_token_delay_seconds,
+            profile_for=self.profile_for,
+        )
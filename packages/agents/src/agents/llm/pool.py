@@ -0,0 +1,160 @@
+"""Shared LLM clients and HTTP connection pools."""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from langchain_core.language_models.base import BaseLanguageModel
+
+from .providers import LLMProvider
+
+# httpcore trace event emitted once per newly opened TCP connection
+_CONNECT_EVENT = "connection.connect_tcp.complete"
+
+ClientKey = tuple[str, str, float, int, str]
+
+# Configuration that names the client rather than its connection
+_NAMED_CONFIG = ("model", "temperature", "max_tokens")
+
+
+@dataclass
+class ClientPoolStats:
+    """Counters describing client sharing and connection reuse."""
+
+    clients: int = 0
+    hits: int = 0
+    misses: int = 0
+    requests: int = 0
+    connections_opened: int = 0
+
+    @property
+    def connections_reused(self) -> int:
+        """Return the number of requests served on an existing connection."""
+        return max(self.requests - self.connections_opened, 0)
+
+    @property
+    def reuse_rate(self) -> float:
+        """Return the fraction of requests that needed no new connection."""
+        return self.connections_reused / self.requests if self.requests else 0.0
+
+
+class SharedTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """HTTP transport whose connection pools are shared by many clients.
+
+    Async and sync requests each go to one pool with the configured limits.
+    SDK clients close their transport when they are closed or collected, so
+    ``close`` and ``aclose`` do nothing here; the owning ``ClientPool``
+    releases the connections with ``close_pools``.
+    """
+
+    def __init__(self, limits: httpx.Limits, stats: ClientPoolStats) -> None:
+        """Create the underlying sync and async pools."""
+        self._async = httpx.AsyncHTTPTransport(limits=limits)
+        self._sync = httpx.HTTPTransport(limits=limits)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request through the shared async pool."""
+        self._stats.requests += 1
+        request.extensions["trace"] = self._atrace
+        return await self._async.handle_async_request(request)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request through the shared sync pool."""
+        self._stats.requests += 1
+        request.extensions["trace"] = self._trace
+        return self._sync.handle_request(request)
+
+    async def aclose(self) -> None:
+        """Keep the shared pools open when a client closes."""
+
+    def close(self) -> None:
+        """Keep the shared pools open when a client closes."""
+
+    async def close_pools(self) -> None:
+        """Close every pooled connection."""
+        await self._async.aclose()
+        self._sync.close()
+
+    async def _atrace(self, event: str, info: dict[str, Any]) -> None:
+        self._trace(event, info)
+
+    def _trace(self, event: str, info: dict[str, Any]) -> None:  # noqa: ARG002
+        if event == _CONNECT_EVENT:
+            self._stats.connections_opened += 1
+
+
+class ClientPool:
+    """Reuse LLM clients per configuration over shared HTTP connection pools.
+
+    Clients are keyed by provider, model, temperature and max tokens, plus a
+    hash of the rest of the configuration such as the API key and base URL,
+    so every agent with the same configuration shares one client. Providers
+    that accept a custom transport send all requests through one
+    ``SharedTransport``, which keeps TLS sessions and keep-alive connections
+    warm across clients and counts how many connections had to be opened.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_seconds: float = 30.0,
+    ) -> None:
+        """Initialize an empty pool with the given connection limits."""
+        self._stats = ClientPoolStats()
+        self.transport = SharedTransport(
+            httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry_seconds,
+            ),
+            self._stats,
+        )
+        self._clients: dict[ClientKey, BaseLanguageModel] = {}
+
+    def __len__(self) -> int:
+        """Return the number of pooled clients."""
+        return len(self._clients)
+
+    def get(self, provider: LLMProvider, **config: Any) -> BaseLanguageModel:  # noqa: ANN401
+        """Return the shared client for a provider configuration."""
+        key = (
+            provider.provider_name,
+            str(config.get("model")),
+            float(config.get("temperature", 0.0)),
+            int(config.get("max_tokens", 0)),
+            _digest({k: v for k, v in config.items() if k not in _NAMED_CONFIG}),
+        )
+        llm = self._clients.get(key)
+        if llm is not None:
+            self._stats.hits += 1
+            return llm
+
+        self._stats.misses += 1
+        llm = provider.create_llm(**config, transport=self.transport)
+        self._clients[key] = llm
+        return llm
+
+    def stats(self) -> ClientPoolStats:
+        """Return a snapshot of the pool counters."""
+        return ClientPoolStats(
+            clients=len(self._clients),
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            requests=self._stats.requests,
+            connections_opened=self._stats.connections_opened,
+        )
+
+    async def aclose(self) -> None:
+        """Forget every client and close the shared connections."""
+        self._clients.clear()
+        await self.transport.close_pools()
+
+
+def _digest(config: dict[str, Any]) -> str:
+    """Hash configuration values, so that secrets are not kept in pool keys."""
+    encoded = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode()).hexdigest()
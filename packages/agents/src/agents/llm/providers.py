@@ -1,23 +1,49 @@
 """LLM provider interface and implementations."""
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, ClassVar
 
 from langchain_core.language_models.base import BaseLanguageModel
 
+from agents.config import Settings
+
+from .tokens import TokenCounter, estimate_tokens
+
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
+    # Providers of local or fake models need no credentials
+    requires_api_key: ClassVar[bool] = True
+
     @abstractmethod
     def create_llm(self, **kwargs: Any) -> BaseLanguageModel:  # noqa: ANN401
-        """Create and return an LLM instance."""
+        """Create and return an LLM instance.
+
+        A ``transport`` keyword carries a shared ``httpx`` transport; providers
+        whose SDK accepts one should send their requests through it.
+        """
 
     @property
     @abstractmethod
     def provider_name(self) -> str:
         """Return the provider name."""
 
+    def llm_config(self, settings: Settings) -> dict[str, Any]:
+        """Return the keyword arguments for ``create_llm`` from settings.
+
+        Registered providers without a section in the settings override this
+        to supply their own configuration.
+        """
+        return settings.get_llm_config(self.provider_name)
+
+    def create_token_counter(self, **kwargs: Any) -> TokenCounter:  # noqa: ANN401, ARG002
+        """Return a token counter for the configured model.
+
+        Providers without a local tokenizer use a character-based estimate.
+        """
+        return estimate_tokens
+
 
 class GeminiProvider(LLMProvider):
     """Google Gemini LLM provider."""
@@ -31,11 +57,18 @@ class GeminiProvider(LLMProvider):
         """Create a Gemini LLM instance."""
         from langchain_google_genai import ChatGoogleGenerativeAI  # noqa: PLC0415
 
+        # From 4.0, built on the google-genai SDK, client_args configure both
+        # of its httpx clients; earlier gRPC-based releases ignore them
+        client_args = {}
+        if kwargs.get("transport") is not None:
+            client_args = {"client_args": {"transport": kwargs["transport"]}}
+
         return ChatGoogleGenerativeAI(
             model=kwargs.get("model", "gemini-2.0-flash-exp"),
             google_api_key=kwargs.get("api_key"),
             temperature=kwargs.get("temperature", 0.7),
             max_tokens=kwargs.get("max_tokens", 8192),
+            **client_args,
         )
 
 
@@ -58,13 +91,41 @@ class OpenAIProvider(LLMProvider):
             )
             raise ImportError(msg) from e
 
+        http_clients = {}
+        transport = kwargs.get("transport")
+        if transport is not None:
+            import httpx  # noqa: PLC0415
+
+            http_clients = {
+                "http_client": httpx.Client(transport=transport),
+                "http_async_client": httpx.AsyncClient(transport=transport),
+            }
+
         return ChatOpenAI(
             model=kwargs.get("model", "gpt-4o-mini"),
             api_key=kwargs.get("api_key"),
             temperature=kwargs.get("temperature", 0.7),
             max_tokens=kwargs.get("max_tokens", 4096),
+            **http_clients,
         )
 
+    def create_token_counter(self, **kwargs: Any) -> TokenCounter:  # noqa: ANN401
+        """Return an exact tiktoken counter, or the estimate if unavailable."""
+        try:
+            import tiktoken  # noqa: PLC0415
+        except ImportError:
+            return estimate_tokens
+
+        try:
+            encoding = tiktoken.encoding_for_model(kwargs.get("model", "gpt-4o-mini"))
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+
+        def count_tokens(text: str) -> int:
+            return len(encoding.encode_ordinary(text))
+
+        return count_tokens
+
 
 class AnthropicProvider(LLMProvider):
     """Anthropic Claude LLM provider."""
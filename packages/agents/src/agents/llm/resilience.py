@@ -0,0 +1,378 @@
+"""Circuit breakers, deadlines and retries around provider calls."""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from agents.telemetry import REGISTRY
+
+from .wrappers import ChatModelWrapper
+
+logger = logging.getLogger(__name__)
+
+_CALLS = REGISTRY.counter(
+    "llm_provider_calls_total", "Provider calls, counting every retry", ["provider"]
+)
+_ERRORS = REGISTRY.counter(
+    "llm_provider_errors_total", "Provider calls that failed", ["provider"]
+)
+_TIMEOUTS = REGISTRY.counter(
+    "llm_provider_timeouts_total", "Provider calls that missed a deadline", ["provider"]
+)
+_FALLBACKS = REGISTRY.counter(
+    "llm_provider_fallbacks_total",
+    "Requests sent to the fallback after the provider failed",
+    ["provider"],
+)
+_FIRST_CHUNK_SECONDS = REGISTRY.histogram(
+    "llm_provider_first_chunk_seconds",
+    "Time for a provider stream to deliver its first chunk",
+    ["provider"],
+)
+_RESPONSE_SECONDS = REGISTRY.histogram(
+    "llm_provider_response_seconds",
+    "Time for a provider to return a complete response",
+    ["provider"],
+)
+_CIRCUIT_OPEN = REGISTRY.gauge(
+    "llm_circuit_open",
+    "Whether a provider's circuit is open or half-open",
+    ["provider"],
+)
+
+# Returned by ``anext`` at the end of a stream
+_EMPTY = object()
+
+
+async def _aclose(iterator: Any) -> None:  # noqa: ANN401
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+class CircuitState(StrEnum):
+    """States of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+StateListener = Callable[[str, CircuitState, CircuitState], None]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class StreamTimeoutError(TimeoutError):
+    """Raised when a provider misses its first-token or idle deadline."""
+
+
+@dataclass
+class CircuitBreakerStats:
+    """Counters describing one circuit breaker."""
+
+    name: str
+    state: CircuitState = CircuitState.CLOSED
+    failures: int = 0
+    successes: int = 0
+    rejected: int = 0
+    opened: int = 0
+
+
+class CircuitBreaker:
+    """Fail fast while a provider keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected. Once ``reset_timeout_seconds`` have passed it turns
+    half-open and lets a single probe through: success closes the circuit,
+    failure opens it again. Listeners are called on every state change.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a closed circuit."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+        self._listeners: list[StateListener] = []
+        self._stats = CircuitBreakerStats(name)
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the current state, turning half-open once the reset elapses."""
+        if (
+            self._state is CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout_seconds
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def add_listener(self, listener: StateListener) -> None:
+        """Call ``listener(name, old_state, new_state)`` on state changes."""
+        self._listeners.append(listener)
+
+    def allow(self) -> bool:
+        """Return whether a call may go through now."""
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return True
+        now = self._clock()
+        if state is CircuitState.HALF_OPEN and (
+            # A probe that never reported back does not block the circuit forever
+            self._probe_started is None
+            or now - self._probe_started >= self.reset_timeout_seconds
+        ):
+            self._probe_started = now
+            return True
+        self._stats.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self._stats.successes += 1
+        self._consecutive_failures = 0
+        if self._state is not CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit when warranted."""
+        self._stats.failures += 1
+        self._consecutive_failures += 1
+        if (
+            self._state is CircuitState.HALF_OPEN
+            or self._consecutive_failures >= self.failure_threshold
+        ):
+            self._opened_at = self._clock()
+            if self._state is not CircuitState.OPEN:
+                self._stats.opened += 1
+                self._transition(CircuitState.OPEN)
+
+    def stats(self) -> CircuitBreakerStats:
+        """Return a snapshot of the breaker counters."""
+        return CircuitBreakerStats(
+            name=self.name,
+            state=self.state,
+            failures=self._stats.failures,
+            successes=self._stats.successes,
+            rejected=self._stats.rejected,
+            opened=self._stats.opened,
+        )
+
+    def _transition(self, state: CircuitState) -> None:
+        old, self._state = self._state, state
+        self._probe_started = None
+        logger.warning("Circuit for %s changed from %s to %s", self.name, old, state)
+        for listener in self._listeners:
+            listener(self.name, old, state)
+
+
+class RetryBudget:
+    """Token bucket that caps retries at a fraction of all requests.
+
+    Every request deposits ``ratio`` tokens, up to ``max_tokens``, and every
+    retry spends one. During an outage retries therefore stop amplifying
+    load once the burst allowance is used up.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0) -> None:
+        """Initialize a full budget."""
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.balance = max_tokens
+
+    def deposit(self) -> None:
+        """Credit the budget for a new request."""
+        self.balance = min(self.max_tokens, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend one retry if the budget allows it."""
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+@dataclass
+class ResilienceStats:
+    """Counters describing the resilience layer of one provider."""
+
+    retries: int = 0
+    timeouts: int = 0
+    fallbacks: int = 0
+    circuit: CircuitBreakerStats | None = None
+
+
+class ResilientChatModel(ChatModelWrapper):
+    """Guard a provider's chat model with deadlines, retries and a breaker.
+
+    Streams must deliver their first chunk within
+    ``first_token_timeout_seconds`` and every later chunk within
+    ``idle_timeout_seconds``; complete responses must arrive within
+    ``request_timeout_seconds``. Calls that fail before producing output are
+    retried up to ``max_retries`` times while the shared retry budget lasts.
+    When the circuit is open or every attempt failed, the request goes to
+    ``fallback`` if one is configured.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        llm: Any,  # noqa: ANN401
+        breaker: CircuitBreaker,
+        *,
+        fallback: Any = None,  # noqa: ANN401
+        first_token_timeout_seconds: float | None = None,
+        idle_timeout_seconds: float | None = None,
+        request_timeout_seconds: float | None = None,
+        max_retries: int = 2,
+        retry_budget: RetryBudget | None = None,
+        retry_backoff_seconds: float = 0.1,
+    ) -> None:
+        """Wrap a chat model with the resilience policies."""
+        super().__init__(llm)
+        self.breaker = breaker
+        self.fallback = fallback
+        self.first_token_timeout_seconds = first_token_timeout_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.request_timeout_seconds = request_timeout_seconds
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget if retry_budget is not None else RetryBudget()
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._stats = ResilienceStats()
+        _CIRCUIT_OPEN.set_function(
+            lambda: float(breaker.state is not CircuitState.CLOSED),
+            provider=breaker.name,
+        )
+
+    def stats(self) -> ResilienceStats:
+        """Return a snapshot of the counters, including the breaker's."""
+        return ResilienceStats(
+            retries=self._stats.retries,
+            timeouts=self._stats.timeouts,
+            fallbacks=self._stats.fallbacks,
+            circuit=self.breaker.stats(),
+        )
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs: Any) -> Any:  # noqa: ANN401
+        """Generate a complete response, falling back if the provider fails."""
+
+        async def call() -> Any:  # noqa: ANN401
+            started = time.perf_counter()
+            try:
+                async with asyncio.timeout(self.request_timeout_seconds):
+                    response = await self.llm.ainvoke(messages, **kwargs)
+            except TimeoutError:
+                self._stats.timeouts += 1
+                _TIMEOUTS.inc(provider=self.breaker.name)
+                raise
+            _RESPONSE_SECONDS.observe(
+                time.perf_counter() - started, provider=self.breaker.name
+            )
+            return response
+
+        try:
+            return await self._call(call)
+        except Exception:
+            if self.fallback is None:
+                raise
+            self._stats.fallbacks += 1
+            _FALLBACKS.inc(provider=self.breaker.name)
+            return await self.fallback.ainvoke(messages, **kwargs)
+
+    async def astream(
+        self,
+        messages: list[BaseMessage],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncIterator[Any]:
+        """Stream a response within the deadlines, falling back if needed."""
+        try:
+            iterator, first = await self._call(lambda: self._open(messages, kwargs))
+        except Exception:
+            if self.fallback is None:
+                raise
+            self._stats.fallbacks += 1
+            _FALLBACKS.inc(provider=self.breaker.name)
+            async with aclosing(self.fallback.astream(messages, **kwargs)) as stream:
+                async for chunk in stream:
+                    yield chunk
+            return
+
+        try:
+            while first is not _EMPTY:
+                yield first
+                first = await self._next(iterator, self.idle_timeout_seconds)
+        except Exception:
+            # Output was already delivered, so neither retry nor fall back
+            self.breaker.record_failure()
+            _ERRORS.inc(provider=self.breaker.name)
+            raise
+        finally:
+            await _aclose(iterator)
+
+    async def _call(self, call: Callable[[], Awaitable[Any]]) -> Any:  # noqa: ANN401
+        """Run a call through the breaker, retrying failures within budget."""
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                msg = f"Circuit for {self.breaker.name} is open"
+                raise CircuitOpenError(msg)
+            _CALLS.inc(provider=self.breaker.name)
+            try:
+                result = await call()
+            except Exception:
+                self.breaker.record_failure()
+                _ERRORS.inc(provider=self.breaker.name)
+                if attempt >= self.max_retries or not self.retry_budget.withdraw():
+                    raise
+                self._stats.retries += 1
+                await asyncio.sleep(self.retry_backoff_seconds * 2**attempt)
+                attempt += 1
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _open(
+        self, messages: list[BaseMessage], kwargs: dict[str, Any]
+    ) -> tuple[Any, Any]:
+        """Start a stream and wait for its first chunk."""
+        started = time.perf_counter()
+        iterator = aiter(self.llm.astream(messages, **kwargs))
+        try:
+            first = await self._next(iterator, self.first_token_timeout_seconds)
+        except BaseException:
+            await _aclose(iterator)
+            raise
+        _FIRST_CHUNK_SECONDS.observe(
+            time.perf_counter() - started, provider=self.breaker.name
+        )
+        return iterator, first
+
+    async def _next(self, iterator: Any, seconds: float | None) -> Any:  # noqa: ANN401
+        """Return the next chunk, or ``_EMPTY`` at the end of the stream."""
+        try:
+            async with asyncio.timeout(seconds):
+                return await anext(iterator, _EMPTY)
+        except TimeoutError as e:
+            self._stats.timeouts += 1
+            _TIMEOUTS.inc(provider=self.breaker.name)
+            msg = f"{self.breaker.name} sent no chunk within {seconds} seconds"
+            raise StreamTimeoutError(msg) from e
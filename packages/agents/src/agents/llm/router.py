@@ -0,0 +1,251 @@
+"""Latency-aware routing between several chat model providers."""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, replace
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from .wrappers import ChatModelWrapper
+
+_DONE = object()
+
+
+@dataclass
+class ProviderStats:
+    """Latency estimates and counters for one routed provider."""
+
+    name: str
+    requests: int = 0
+    failures: int = 0
+    hedges: int = 0
+    ttft_seconds: float | None = None
+    chars_per_second: float | None = None
+    response_chars: float | None = None
+    healthy: bool = True
+
+    @property
+    def expected_seconds(self) -> float:
+        """Estimate the time to complete a typical response."""
+        if self.ttft_seconds is None:
+            # Unmeasured providers are tried first so that they get measured
+            return 0.0
+        if not self.chars_per_second or self.response_chars is None:
+            return self.ttft_seconds
+        return self.ttft_seconds + self.response_chars / self.chars_per_second
+
+
+class _Route:
+    """A provider's chat model with its moving latency estimates."""
+
+    def __init__(self, name: str, llm: Any, alpha: float) -> None:  # noqa: ANN401
+        self.name = name
+        self.llm = llm
+        self.alpha = alpha
+        self.stats = ProviderStats(name)
+        self.unhealthy_until = 0.0
+
+    def observe(self, attr: str, sample: float) -> None:
+        current = getattr(self.stats, attr)
+        value = sample if current is None else current + self.alpha * (sample - current)
+        setattr(self.stats, attr, value)
+
+
+class _Attempt:
+    """One provider call running in its own task, buffered for the consumer."""
+
+    def __init__(
+        self,
+        route: _Route,
+        run: Callable[["_Attempt"], Awaitable[None]],
+        changed: asyncio.Event,
+    ) -> None:
+        self.route = route
+        self.queue: asyncio.Queue[Any] = asyncio.Queue()
+        self.ready = False
+        self.error: Exception | None = None
+        self.started = time.perf_counter()
+        self.first_at: float | None = None
+        self._changed = changed
+        self.task = asyncio.create_task(self._run(run))
+
+    def emit(self, item: Any) -> None:  # noqa: ANN401
+        if self.first_at is None:
+            self.first_at = time.perf_counter()
+            self._signal()
+        self.queue.put_nowait(item)
+
+    async def _run(self, run: Callable[["_Attempt"], Awaitable[None]]) -> None:
+        try:
+            await run(self)
+        except Exception as e:  # noqa: BLE001
+            self.error = e
+        self.queue.put_nowait(_DONE)
+        self._signal()
+
+    def _signal(self) -> None:
+        self.ready = True
+        self._changed.set()
+
+
+def _last_error(failed: list[_Attempt]) -> Exception:
+    error = failed[-1].error
+    assert error is not None
+    return error
+
+
+class RoutingChatModel(ChatModelWrapper):
+    """Send each request to the provider expected to answer fastest.
+
+    Every provider keeps exponentially weighted moving averages of its time
+    to first token, its output throughput and its response length, and the
+    healthy provider with the lowest expected completion time is tried
+    first. A provider that fails is skipped for ``cooldown_seconds`` and the
+    request fails over to the next one. With ``hedge_delay_seconds`` set, a
+    request whose first token has not arrived in time is also sent to the
+    next provider; the first to answer wins and the other is cancelled.
+    Attributes not related to generation are forwarded to the first provider.
+    """
+
+    def __init__(
+        self,
+        llms: dict[str, Any],
+        *,
+        hedge_delay_seconds: float | None = None,
+        alpha: float = 0.2,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Route between the given chat models keyed by provider name."""
+        if not llms:
+            msg = "At least one provider is required for routing"
+            raise ValueError(msg)
+        super().__init__(next(iter(llms.values())))
+        self.routes = [_Route(name, llm, alpha) for name, llm in llms.items()]
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+
+    def stats(self) -> dict[str, ProviderStats]:
+        """Return a snapshot of every provider's estimates and counters."""
+        now = self._clock()
+        return {
+            route.name: replace(route.stats, healthy=now >= route.unhealthy_until)
+            for route in self.routes
+        }
+
+    def ranked(self) -> list[str]:
+        """Return provider names in the order they would be tried."""
+        return [route.name for route in self._ranked()]
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs: Any) -> Any:  # noqa: ANN401
+        """Generate a complete response from the fastest available provider."""
+
+        async def run(attempt: _Attempt) -> None:
+            attempt.emit(await attempt.route.llm.ainvoke(messages, **kwargs))
+
+        attempt = await self._race(run)
+        try:
+            return await attempt.queue.get()
+        finally:
+            attempt.task.cancel()
+
+    async def astream(
+        self,
+        messages: list[BaseMessage],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncIterator[Any]:
+        """Stream a response from the fastest available provider."""
+
+        async def run(attempt: _Attempt) -> None:
+            async for chunk in attempt.route.llm.astream(messages, **kwargs):
+                attempt.emit(chunk)
+
+        attempt = await self._race(run)
+        route = attempt.route
+        chars = 0
+        try:
+            while (chunk := await attempt.queue.get()) is not _DONE:
+                content = chunk.content if hasattr(chunk, "content") else str(chunk)
+                chars += len(content) if isinstance(content, str) else 0
+                yield chunk
+        finally:
+            attempt.task.cancel()
+        if attempt.error is not None:
+            # Chunks were already yielded, so the request cannot fail over
+            self._record_failure(route)
+            raise attempt.error
+        if attempt.first_at is not None:
+            elapsed = time.perf_counter() - attempt.first_at
+            if elapsed > 0:
+                route.observe("chars_per_second", chars / elapsed)
+        route.observe("response_chars", chars)
+
+    def _ranked(self) -> list[_Route]:
+        now = self._clock()
+        return sorted(
+            self.routes,
+            key=lambda r: (now < r.unhealthy_until, r.stats.expected_seconds),
+        )
+
+    def _record_failure(self, route: _Route) -> None:
+        route.stats.failures += 1
+        route.unhealthy_until = self._clock() + self.cooldown_seconds
+
+    def _settle(
+        self, attempts: list[_Attempt], failed: list[_Attempt]
+    ) -> _Attempt | None:
+        """Return a successful attempt, moving failed ones out of the race."""
+        for attempt in [a for a in attempts if a.ready]:
+            attempts.remove(attempt)
+            if attempt.error is None:
+                if attempt.first_at is not None:
+                    ttft = attempt.first_at - attempt.started
+                    attempt.route.observe("ttft_seconds", ttft)
+                return attempt
+            failed.append(attempt)
+            self._record_failure(attempt.route)
+        return None
+
+    async def _race(self, run: Callable[[_Attempt], Awaitable[None]]) -> _Attempt:
+        """Start attempts in rank order until one produces its first output."""
+        remaining = self._ranked()
+        changed = asyncio.Event()
+        attempts: list[_Attempt] = []
+        failed: list[_Attempt] = []
+
+        def launch() -> None:
+            route = remaining.pop(0)
+            route.stats.requests += 1
+            attempts.append(_Attempt(route, run, changed))
+
+        launch()
+        hedged = self.hedge_delay_seconds is None
+        try:
+            while True:
+                changed.clear()
+                winner = self._settle(attempts, failed)
+                if winner is not None:
+                    return winner
+                if not attempts:
+                    if not remaining:
+                        raise _last_error(failed)
+                    launch()
+                    continue
+
+                timeout = None
+                if not hedged and remaining:
+                    elapsed = time.perf_counter() - attempts[0].started
+                    timeout = max(self.hedge_delay_seconds - elapsed, 0.0)
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except TimeoutError:
+                    hedged = True
+                    remaining[0].stats.hedges += 1
+                    launch()
+        finally:
+            # Losing or abandoned attempts are cancelled
+            for attempt in attempts:
+                attempt.task.cancel()
@@ -0,0 +1,167 @@
+"""Routing of conversation turns to a small or large model tier."""
+
+import re
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import aclosing
+from dataclasses import dataclass, replace
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from .wrappers import ChatModelWrapper
+
+SMALL_TIER = "small"
+LARGE_TIER = "large"
+
+TurnClassifier = Callable[[list[BaseMessage]], str]
+
+DEFAULT_LARGE_KEYWORDS = (
+    "analyze",
+    "analyse",
+    "compare",
+    "explain why",
+    "step by step",
+    "write code",
+    "debug",
+    "prove",
+    "design",
+    "summarize",
+)
+
+
+class HeuristicClassifier:
+    """Classify a turn as small or large with cheap text heuristics.
+
+    A turn goes to the large tier when the latest message is longer than
+    ``max_chars``, the prompt holds more than ``max_messages`` messages, or
+    the latest message contains one of ``large_keywords``. Everything else,
+    such as greetings and one-line questions, goes to the small tier.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 280,
+        max_messages: int = 6,
+        large_keywords: Iterable[str] = DEFAULT_LARGE_KEYWORDS,
+    ) -> None:
+        """Initialize the classifier."""
+        self.max_chars = max_chars
+        self.max_messages = max_messages
+        keywords = [re.escape(keyword) for keyword in large_keywords]
+        self._keywords = (
+            re.compile(rf"\b(?:{'|'.join(keywords)})\b", re.IGNORECASE)
+            if keywords
+            else None
+        )
+
+    def __call__(self, messages: list[BaseMessage]) -> str:
+        """Return the tier for a prompt."""
+        if not messages:
+            return SMALL_TIER
+        content = messages[-1].content
+        text = content if isinstance(content, str) else str(content)
+        if (
+            len(text) > self.max_chars
+            or len(messages) > self.max_messages
+            or (self._keywords is not None and self._keywords.search(text))
+        ):
+            return LARGE_TIER
+        return SMALL_TIER
+
+
+@dataclass
+class TierStats:
+    """Latency counters for one model tier."""
+
+    name: str
+    requests: int = 0
+    completed: int = 0
+    failures: int = 0
+    total_seconds: float = 0.0
+    first_token_seconds: float = 0.0
+    streams: int = 0
+
+    @property
+    def mean_seconds(self) -> float:
+        """Return the mean time to a complete response."""
+        return self.total_seconds / self.completed if self.completed else 0.0
+
+    @property
+    def mean_first_token_seconds(self) -> float:
+        """Return the mean time to the first streamed chunk."""
+        return self.first_token_seconds / self.streams if self.streams else 0.0
+
+
+class TieredChatModel(ChatModelWrapper):
+    """Dispatch each turn to the model tier chosen by a classifier.
+
+    Unknown tier names returned by a custom classifier fall back to the large
+    tier. Attributes not related to generation are forwarded to the large
+    tier's model.
+    """
+
+    def __init__(
+        self,
+        tiers: dict[str, Any],
+        classifier: TurnClassifier | None = None,
+    ) -> None:
+        """Route between the given models keyed by tier name."""
+        if LARGE_TIER not in tiers:
+            msg = f"A {LARGE_TIER!r} tier is required"
+            raise ValueError(msg)
+        super().__init__(tiers[LARGE_TIER])
+        self.tiers = tiers
+        self.classifier = (
+            classifier if classifier is not None else HeuristicClassifier()
+        )
+        self._stats = {name: TierStats(name) for name in tiers}
+
+    def classify(self, messages: list[BaseMessage]) -> str:
+        """Return the tier that will serve a prompt."""
+        tier = self.classifier(messages)
+        return tier if tier in self.tiers else LARGE_TIER
+
+    def stats(self) -> dict[str, TierStats]:
+        """Return a snapshot of every tier's latency counters."""
+        return {name: replace(stats) for name, stats in self._stats.items()}
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs: Any) -> Any:  # noqa: ANN401
+        """Generate a complete response from the chosen tier."""
+        tier = self.classify(messages)
+        stats = self._stats[tier]
+        stats.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await self.tiers[tier].ainvoke(messages, **kwargs)
+        except Exception:
+            stats.failures += 1
+            raise
+        stats.completed += 1
+        stats.total_seconds += time.perf_counter() - started
+        return response
+
+    async def astream(
+        self,
+        messages: list[BaseMessage],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncIterator[Any]:
+        """Stream a response from the chosen tier."""
+        tier = self.classify(messages)
+        stats = self._stats[tier]
+        stats.requests += 1
+        started = time.perf_counter()
+        first_token = True
+        try:
+            async with aclosing(self.tiers[tier].astream(messages, **kwargs)) as stream:
+                async for chunk in stream:
+                    if first_token:
+                        first_token = False
+                        stats.streams += 1
+                        stats.first_token_seconds += time.perf_counter() - started
+                    yield chunk
+        except Exception:
+            stats.failures += 1
+            raise
+        stats.completed += 1
+        stats.total_seconds += time.perf_counter() - started
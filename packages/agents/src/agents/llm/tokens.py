@@ -0,0 +1,21 @@
+"""Token counting helpers shared by providers and conversation history."""
+
+from collections.abc import Callable
+
+TokenCounter = Callable[[str], int]
+
+# Tokens spent on role markers and separators around each chat message
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Average characters per token for English text across common tokenizers
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text from its length."""
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def count_message_tokens(message: dict[str, str], counter: TokenCounter) -> int:
+    """Count the tokens a chat message occupies in a prompt."""
+    return counter(message["content"]) + MESSAGE_TOKEN_OVERHEAD
@@ -0,0 +1,40 @@
+"""Base class for layers wrapped around chat model instances."""
+
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+
+class ChatModelWrapper:
+    """Delegate to a wrapped chat model, overriding only the calls it needs.
+
+    Wrappers are stacked around the ``BaseLanguageModel`` built by
+    ``LLMFactory`` to add behaviour such as caching or failover. Anything not
+    overridden is forwarded to the wrapped model.
+    """
+
+    def __init__(self, llm: Any) -> None:  # noqa: ANN401
+        """Wrap a chat model."""
+        self.llm = llm
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs: Any) -> Any:  # noqa: ANN401
+        """Generate a complete response."""
+        return await self.llm.ainvoke(messages, **kwargs)
+
+    async def astream(
+        self,
+        messages: list[BaseMessage],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncIterator[Any]:
+        """Stream response chunks."""
+        async with aclosing(self.llm.astream(messages, **kwargs)) as stream:
+            async for chunk in stream:
+                yield chunk
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Forward attribute access to the wrapped model."""
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
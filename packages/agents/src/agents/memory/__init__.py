@@ -0,0 +1,39 @@
+"""Conversation memory package."""
+
+from typing import TYPE_CHECKING
+
+from agents._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .factory import create_conversation_store
+    from .history import ConversationHistory
+    from .locks import ConversationBusyError, ConversationLocks, LockStats
+    from .sqlite import SQLiteConversationStore
+    from .store import ConversationStore, InMemoryConversationStore, StoreStats
+
+__all__ = [
+    "ConversationBusyError",
+    "ConversationHistory",
+    "ConversationLocks",
+    "ConversationStore",
+    "InMemoryConversationStore",
+    "LockStats",
+    "SQLiteConversationStore",
+    "StoreStats",
+    "create_conversation_store",
+]
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "ConversationBusyError": ".locks",
+        "ConversationHistory": ".history",
+        "ConversationLocks": ".locks",
+        "ConversationStore": ".store",
+        "InMemoryConversationStore": ".store",
+        "LockStats": ".locks",
+        "SQLiteConversationStore": ".sqlite",
+        "StoreStats": ".store",
+        "create_conversation_store": ".factory",
+    },
+)
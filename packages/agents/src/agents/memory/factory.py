@@ -0,0 +1,34 @@
+"""Factory for creating conversation stores based on configuration."""
+
+from agents.config import Settings
+from agents.llm.tokens import TokenCounter, estimate_tokens
+
+from .sqlite import SQLiteConversationStore
+from .store import ConversationStore, InMemoryConversationStore
+
+
+def create_conversation_store(
+    settings: Settings, token_counter: TokenCounter = estimate_tokens
+) -> ConversationStore:
+    """Create a conversation store based on settings."""
+    memory_store = InMemoryConversationStore(
+        max_conversations=settings.conversation_store_max_conversations,
+        max_messages=settings.conversation_memory_limit,
+        token_counter=token_counter,
+        max_bytes=settings.conversation_store_max_bytes,
+        ttl_seconds=settings.conversation_ttl_seconds,
+        sweep_interval_seconds=settings.conversation_sweep_interval_seconds,
+    )
+    if settings.conversation_store == "memory":
+        return memory_store
+    if settings.conversation_store == "sqlite":
+        # The bounded in-memory store becomes the hot cache in front of SQLite
+        return SQLiteConversationStore(
+            settings.conversation_store_path,
+            window=settings.conversation_memory_limit,
+            batch_size=settings.conversation_store_batch_size,
+            flush_interval_seconds=settings.conversation_store_flush_interval_seconds,
+            cache=memory_store,
+        )
+    msg = f"Unsupported conversation store: {settings.conversation_store}"
+    raise ValueError(msg)
@@ -0,0 +1,131 @@
+"""Bounded conversation history with constant-time windowing."""
+
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Iterator
+
+from agents.llm.tokens import TokenCounter, count_message_tokens, estimate_tokens
+
+
+class ConversationHistory:
+    """Message history with the system prompt pinned outside a ring buffer.
+
+    Non-system messages live in a bounded deque, so appending a message and
+    dropping the oldest one are constant time. Prompt windows are produced by
+    iterating the tail of the ring rather than copying and rebuilding the
+    whole history on every turn.
+
+    Token counts are computed once per appended message and kept as running
+    totals in a parallel ring, so the longest tail that fits a token budget
+    is found with a binary search over prefix sums.
+    """
+
+    __slots__ = (
+        "_cumulative",
+        "_dropped_tokens",
+        "_messages",
+        "_token_counter",
+        "system",
+        "system_tokens",
+    )
+
+    def __init__(
+        self,
+        max_messages: int | None = None,
+        token_counter: TokenCounter = estimate_tokens,
+    ) -> None:
+        """Initialize an empty history keeping at most ``max_messages``."""
+        self.system: dict[str, str] | None = None
+        self.system_tokens = 0
+        self._messages: deque[dict[str, str]] = deque(maxlen=max_messages)
+        # Running token total up to and including each retained message
+        self._cumulative: deque[int] = deque(maxlen=max_messages)
+        # Running total of every message that has left the ring
+        self._dropped_tokens = 0
+        self._token_counter = token_counter
+
+    @property
+    def max_messages(self) -> int | None:
+        """Return the capacity of the ring, excluding the system message."""
+        return self._messages.maxlen
+
+    @property
+    def tokens(self) -> int:
+        """Return the token count of all retained messages."""
+        history_tokens = (
+            self._cumulative[-1] - self._dropped_tokens if self._cumulative else 0
+        )
+        return self.system_tokens + history_tokens
+
+    def count_tokens(self, message: dict[str, str]) -> int:
+        """Count the prompt tokens of a message with this history's counter."""
+        return count_message_tokens(message, self._token_counter)
+
+    def append(self, message: dict[str, str]) -> dict[str, str] | None:
+        """Append a message and return the message it displaced, if any."""
+        tokens = self.count_tokens(message)
+        if message["role"] == "system":
+            displaced = self.system
+            self.system = message
+            self.system_tokens = tokens
+            return displaced
+
+        displaced = None
+        if len(self._messages) == self._messages.maxlen:
+            displaced = self._messages[0]
+            self._dropped_tokens = self._cumulative[0]
+        total = self._cumulative[-1] if self._cumulative else self._dropped_tokens
+        self._messages.append(message)
+        self._cumulative.append(total + tokens)
+        return displaced
+
+    def window(
+        self, limit: int, token_budget: int | None = None
+    ) -> Iterator[dict[str, str]]:
+        """Iterate the system message and the most recent messages.
+
+        At most ``limit`` messages are produced in total and, when a token
+        budget is given, only the longest tail of the history whose tokens fit
+        in the budget next to the system message. Only the tail of the ring is
+        visited, so the cost does not grow with the length of the conversation.
+        """
+        size = len(self._messages)
+        if self.system is not None:
+            yield self.system
+            limit -= 1
+        start = max(size - limit, 0)
+
+        if token_budget is not None and size:
+            budget = token_budget - self.system_tokens
+            # Messages from index i onwards cost cumulative[-1] - cumulative[i-1]
+            target = self._cumulative[-1] - budget
+            if self._dropped_tokens < target:
+                start = max(start, bisect_left(self._cumulative, target) + 1)
+
+        # Indexing near the right end of a deque is constant time
+        for index in range(start, size):
+            yield self._messages[index]
+
+    def __len__(self) -> int:
+        """Return the number of stored messages, including the system message."""
+        return len(self._messages) + (self.system is not None)
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        """Iterate all stored messages, starting with the system message."""
+        if self.system is not None:
+            yield self.system
+        yield from self._messages
+
+    def __getitem__(self, index: int) -> dict[str, str]:
+        """Return a message by position, with the system message first."""
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            msg = "conversation history index out of range"
+            raise IndexError(msg)
+        if self.system is not None:
+            if index == 0:
+                return self.system
+            index -= 1
+        return self._messages[index]
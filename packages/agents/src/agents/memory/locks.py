@@ -0,0 +1,112 @@
+"""Per-conversation turn serialization with striped, reference-counted locks."""
+
+import asyncio
+import zlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Literal
+
+ConcurrencyPolicy = Literal["queue", "reject", "cancel"]
+
+
+class ConversationBusyError(RuntimeError):
+    """Raised when a turn is refused because the conversation is busy."""
+
+
+@dataclass
+class LockStats:
+    """Counters describing conversation turn scheduling."""
+
+    turns: int = 0
+    queued: int = 0
+    rejected: int = 0
+    cancelled: int = 0
+    active: int = 0
+
+
+class _TurnLock:
+    """Lock of one conversation, alive while any turn holds or awaits it."""
+
+    __slots__ = ("lock", "refs", "tasks")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.refs = 0
+        self.tasks: set[asyncio.Task[object]] = set()
+
+
+class ConversationLocks:
+    """Serialize turns within a conversation while keeping others parallel.
+
+    Each conversation gets its own lock only while a turn holds or awaits it,
+    so memory is bounded by the number of busy conversations rather than the
+    number of ids ever seen. Locks live in a fixed number of hash stripes to
+    keep every table small. When a conversation is busy, a new turn either
+    waits its turn (``queue``), fails with ``ConversationBusyError``
+    (``reject``) or cancels the turns started before it (``cancel``).
+    """
+
+    def __init__(self, stripes: int = 64, policy: ConcurrencyPolicy = "queue") -> None:
+        """Initialize the lock table."""
+        self.policy = policy
+        self._stripes: list[dict[str, _TurnLock]] = [{} for _ in range(stripes)]
+        self._stats = LockStats()
+
+    def __len__(self) -> int:
+        """Return the number of conversations with a running or waiting turn."""
+        return sum(len(stripe) for stripe in self._stripes)
+
+    def busy(self, conversation_id: str) -> bool:
+        """Return whether a turn is running or waiting in a conversation."""
+        return conversation_id in self._stripe(conversation_id)
+
+    def check(self, conversation_id: str) -> None:
+        """Raise ``ConversationBusyError`` if a new turn would be rejected now."""
+        if self.policy == "reject" and self.busy(conversation_id):
+            self._stats.rejected += 1
+            msg = f"Conversation {conversation_id!r} already has a turn in progress"
+            raise ConversationBusyError(msg)
+
+    @asynccontextmanager
+    async def hold(self, conversation_id: str) -> AsyncIterator[None]:
+        """Run the enclosed block as the conversation's only active turn."""
+        self.check(conversation_id)
+        stripe = self._stripe(conversation_id)
+        entry = stripe.get(conversation_id)
+        if entry is None:
+            entry = stripe[conversation_id] = _TurnLock()
+        elif self.policy == "cancel":
+            self._stats.cancelled += len(entry.tasks)
+            for task in entry.tasks:
+                task.cancel()
+        else:
+            self._stats.queued += 1
+
+        task = asyncio.current_task()
+        entry.refs += 1
+        if task is not None:
+            entry.tasks.add(task)
+        try:
+            async with entry.lock:
+                self._stats.turns += 1
+                yield
+        finally:
+            entry.tasks.discard(task)
+            entry.refs -= 1
+            if not entry.refs:
+                del stripe[conversation_id]
+
+    def stats(self) -> LockStats:
+        """Return a snapshot of the scheduling counters."""
+        return LockStats(
+            turns=self._stats.turns,
+            queued=self._stats.queued,
+            rejected=self._stats.rejected,
+            cancelled=self._stats.cancelled,
+            active=len(self),
+        )
+
+    def _stripe(self, conversation_id: str) -> dict[str, _TurnLock]:
+        index = zlib.crc32(conversation_id.encode()) % len(self._stripes)
+        return self._stripes[index]
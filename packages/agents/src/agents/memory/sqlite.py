@@ -0,0 +1,214 @@
+"""Durable SQLite conversation store with write-behind batching."""
+
+import asyncio
+import contextlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .history import ConversationHistory
+from .store import ConversationStore, InMemoryConversationStore, StoreStats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation
+    ON messages (conversation_id, id);
+"""
+
+logger = logging.getLogger(__name__)
+
+_WindowRow = tuple[str, str]
+_PendingRow = tuple[str, str, str, float]
+
+
+class SQLiteConversationStore(ConversationStore):
+    """Conversation store persisted to a local SQLite database in WAL mode.
+
+    Appends are applied to a hot in-memory cache and queued for a background
+    writer that commits them in batches off the event loop. Cache misses load
+    only the system prompt and the trailing ``window`` messages of a
+    conversation from disk. Only ``get`` reads from disk; the synchronous
+    accessors ``in``, ``len`` and indexing see the hot cache alone, so they
+    never block the event loop.
+    Several processes may share one database file, but each keeps its own hot
+    cache, so a conversation should be served by a single process at a time.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        path: str | Path,
+        *,
+        window: int = 20,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 0.05,
+        max_pending: int = 10_000,
+        cache: InMemoryConversationStore | None = None,
+    ) -> None:
+        """Initialize the store and create the schema if needed."""
+        super().__init__()
+        self.path = Path(path)
+        self.window = window
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        if cache is None:
+            cache = InMemoryConversationStore(max_messages=window)
+        self._cache = cache
+        self._cache.add_eviction_listener(self._notify_evicted)
+        self._queue: asyncio.Queue[_PendingRow] = asyncio.Queue(maxsize=max_pending)
+        self._writer: asyncio.Task[None] | None = None
+        self._wakeup = asyncio.Event()
+        self._write_conn = self._connect()
+        self._read_conn = self._connect()
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        with self._write_lock:
+            self._write_conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    async def get(self, conversation_id: str) -> ConversationHistory | None:
+        """Return the cached history, loading the trailing window on a miss."""
+        history = await self._cache.get(conversation_id)
+        if history is not None:
+            return history or None
+
+        # Make queued writes visible before reading from disk
+        await self.flush()
+        rows = await asyncio.to_thread(self._read_window, conversation_id)
+        # An empty entry marks the conversation as known so appends are cached
+        await self._cache.append(
+            conversation_id,
+            *({"role": role, "content": content} for role, content in rows),
+        )
+        return self._cache[conversation_id] or None
+
+    async def append(self, conversation_id: str, *messages: dict[str, str]) -> None:
+        """Append messages to the cache and queue them for persistence."""
+        self._ensure_writer()
+        if conversation_id in self._cache:
+            await self._cache.append(conversation_id, *messages)
+        now = time.time()
+        for message in messages:
+            await self._queue.put(
+                (conversation_id, message["role"], message["content"], now)
+            )
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    async def delete(self, conversation_id: str) -> None:
+        """Remove a conversation from the cache and the database."""
+        await self._cache.delete(conversation_id)
+        await self.flush()
+        await asyncio.to_thread(self._delete, conversation_id)
+
+    def stats(self) -> StoreStats:
+        """Return cache counters along with the number of pending writes."""
+        stats = self._cache.stats()
+        stats.pending_writes = self._queue.qsize()
+        return stats
+
+    def __contains__(self, conversation_id: object) -> bool:
+        """Return whether the conversation is in the hot cache."""
+        return conversation_id in self._cache
+
+    def __getitem__(self, conversation_id: str) -> ConversationHistory:
+        """Return the cached history without affecting recency or counters."""
+        return self._cache[conversation_id]
+
+    def __len__(self) -> int:
+        """Return the number of cached conversations."""
+        return len(self._cache)
+
+    async def start(self) -> None:
+        """Start the cache sweeper and the background writer."""
+        await self._cache.start()
+        self._ensure_writer()
+
+    async def flush(self) -> None:
+        """Wait until every queued write has been committed."""
+        if self._queue.empty():
+            return
+        self._ensure_writer()
+        self._wakeup.set()
+        await self._queue.join()
+
+    async def aclose(self) -> None:
+        """Flush pending writes, stop background tasks and close the database."""
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer
+            self._writer = None
+        await self._cache.aclose()
+        self._write_conn.close()
+        self._read_conn.close()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Linger to collect a batch unless it fills up or a flush is requested
+            if self._queue.qsize() + 1 < self.batch_size:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), self.flush_interval_seconds
+                    )
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Keep draining without lingering while a backlog remains
+            if self._queue.empty():
+                self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except sqlite3.Error:
+                logger.exception("Failed to persist %d messages", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: list[_PendingRow]) -> None:
+        with self._write_lock, self._write_conn:
+            self._write_conn.executemany(
+                "INSERT INTO messages (conversation_id, role, content, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                batch,
+            )
+
+    def _read_window(self, conversation_id: object) -> list[_WindowRow]:
+        with self._read_lock:
+            system = self._read_conn.execute(
+                "SELECT role, content FROM messages "
+                "WHERE conversation_id = ? AND role = 'system' "
+                "ORDER BY id DESC LIMIT 1",
+                (conversation_id,),
+            ).fetchall()
+            rows = self._read_conn.execute(
+                "SELECT role, content FROM messages "
+                "WHERE conversation_id = ? AND role != 'system' "
+                "ORDER BY id DESC LIMIT ?",
+                (conversation_id, self.window),
+            ).fetchall()
+        rows.reverse()
+        return system + rows
+
+    def _delete(self, conversation_id: str) -> None:
+        with self._write_lock, self._write_conn:
+            self._write_conn.execute(
+                "DELETE FROM messages WHERE conversation_id = ?", (conversation_id,)
+            )
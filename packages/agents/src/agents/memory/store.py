@@ -0,0 +1,272 @@
+"""Conversation store interface and bounded in-memory implementation."""
+
+import asyncio
+import contextlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from agents.llm.tokens import TokenCounter, estimate_tokens
+
+from .history import ConversationHistory
+
+# Rough per-message bookkeeping cost (dict, keys, string headers) in bytes
+_MESSAGE_OVERHEAD = 200
+
+EvictionListener = Callable[[str], None]
+
+
+def message_size(message: dict[str, str]) -> int:
+    """Estimate the resident size of a message in bytes."""
+    return len(message["role"]) + len(message["content"]) + _MESSAGE_OVERHEAD
+
+
+@dataclass
+class StoreStats:
+    """Counters describing conversation store behaviour."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    conversations: int = 0
+    bytes: int = 0
+    pending_writes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups served from the store."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ConversationStore(ABC):
+    """Abstract base class for conversation history storage."""
+
+    def __init__(self) -> None:
+        """Initialize the store."""
+        self._eviction_listeners: list[EvictionListener] = []
+
+    @abstractmethod
+    async def get(self, conversation_id: str) -> ConversationHistory | None:
+        """Return the stored history, or None for unknown conversations.
+
+        The returned history is owned by the store and must only be changed
+        through ``append``.
+        """
+
+    @abstractmethod
+    async def append(self, conversation_id: str, *messages: dict[str, str]) -> None:
+        """Append messages to a conversation, creating it if needed."""
+
+    @abstractmethod
+    async def delete(self, conversation_id: str) -> None:
+        """Remove a conversation from the store."""
+
+    @abstractmethod
+    def stats(self) -> StoreStats:
+        """Return a snapshot of the store counters."""
+
+    @abstractmethod
+    def __contains__(self, conversation_id: object) -> bool:
+        """Return whether the conversation is currently stored."""
+
+    @abstractmethod
+    def __getitem__(self, conversation_id: str) -> ConversationHistory:
+        """Return stored history without affecting recency or counters."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Return the number of stored conversations."""
+
+    async def start(self) -> None:
+        """Start background maintenance; safe to call repeatedly."""
+        return
+
+    async def aclose(self) -> None:
+        """Stop background maintenance and release resources."""
+        return
+
+    def add_eviction_listener(self, listener: EvictionListener) -> None:
+        """Register a callback invoked with the id of each evicted conversation."""
+        self._eviction_listeners.append(listener)
+
+    def _notify_evicted(self, conversation_id: str) -> None:
+        for listener in self._eviction_listeners:
+            listener(conversation_id)
+
+
+@dataclass
+class _Entry:
+    history: ConversationHistory
+    size: int = 0
+    last_access: float = 0.0
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store bounded by conversation count, bytes and idle TTL.
+
+    Conversations are kept in least-recently-used order. Writes that push the
+    store over its limits evict from the cold end immediately, while idle
+    conversations past the TTL are swept by a background task. Each history
+    keeps at most ``max_messages`` messages besides the system prompt.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        max_conversations: int = 10_000,
+        max_messages: int | None = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: float | None = 3600.0,
+        sweep_interval_seconds: float = 60.0,
+        token_counter: TokenCounter = estimate_tokens,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the in-memory store."""
+        super().__init__()
+        self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self.token_counter = token_counter
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._stats = StoreStats()
+        self._sweeper: asyncio.Task[None] | None = None
+
+    async def get(self, conversation_id: str) -> ConversationHistory | None:
+        """Return the stored history, refreshing the conversation's recency."""
+        entry = self._entries.get(conversation_id)
+        now = self._clock()
+        if entry is None or self._is_expired(entry, now):
+            if entry is not None:
+                self._remove(conversation_id, expired=True)
+            self._stats.misses += 1
+            return None
+
+        self._stats.hits += 1
+        entry.last_access = now
+        self._entries.move_to_end(conversation_id)
+        return entry.history
+
+    async def append(self, conversation_id: str, *messages: dict[str, str]) -> None:
+        """Append messages and evict cold conversations if over the limits."""
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            entry = _Entry(ConversationHistory(self.max_messages, self.token_counter))
+            self._entries[conversation_id] = entry
+        else:
+            self._entries.move_to_end(conversation_id)
+
+        added = 0
+        for message in messages:
+            added += message_size(message)
+            displaced = entry.history.append(message)
+            if displaced is not None:
+                added -= message_size(displaced)
+        entry.size += added
+        entry.last_access = self._clock()
+        self._bytes += added
+        self._enforce_limits(keep=conversation_id)
+
+    async def delete(self, conversation_id: str) -> None:
+        """Remove a conversation from the store."""
+        entry = self._entries.pop(conversation_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def stats(self) -> StoreStats:
+        """Return a snapshot of the store counters."""
+        return StoreStats(
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            evictions=self._stats.evictions,
+            expirations=self._stats.expirations,
+            conversations=len(self._entries),
+            bytes=self._bytes,
+        )
+
+    def __contains__(self, conversation_id: object) -> bool:
+        """Return whether the conversation is currently stored."""
+        return conversation_id in self._entries
+
+    def __getitem__(self, conversation_id: str) -> ConversationHistory:
+        """Return stored history without affecting recency or counters."""
+        return self._entries[conversation_id].history
+
+    def __len__(self) -> int:
+        """Return the number of stored conversations."""
+        return len(self._entries)
+
+    async def start(self) -> None:
+        """Start the background TTL sweeper if it is not already running."""
+        if self.ttl_seconds is None:
+            return
+        sweeper = self._sweeper
+        if (
+            sweeper is None
+            or sweeper.done()
+            or sweeper.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def aclose(self) -> None:
+        """Stop the background TTL sweeper."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sweeper
+            self._sweeper = None
+
+    def sweep(self) -> int:
+        """Evict conversations idle for longer than the TTL.
+
+        Returns the number of conversations removed.
+        """
+        now = self._clock()
+        removed = 0
+        # Entries are ordered by last access, so stop at the first live one
+        while self._entries:
+            conversation_id, entry = next(iter(self._entries.items()))
+            if not self._is_expired(entry, now):
+                break
+            self._remove(conversation_id, expired=True)
+            removed += 1
+        return removed
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            self.sweep()
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds is not None and (
+            now - entry.last_access > self.ttl_seconds
+        )
+
+    def _enforce_limits(self, keep: str) -> None:
+        while (
+            len(self._entries) > self.max_conversations or self._bytes > self.max_bytes
+        ):
+            conversation_id = next(iter(self._entries))
+            if conversation_id == keep:
+                # Never evict the conversation that is being written to
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(keep)
+                continue
+            self._remove(conversation_id, expired=False)
+
+    def _remove(self, conversation_id: str, *, expired: bool) -> None:
+        entry = self._entries.pop(conversation_id)
+        self._bytes -= entry.size
+        if expired:
+            self._stats.expirations += 1
+        else:
+            self._stats.evictions += 1
+        self._notify_evicted(conversation_id)
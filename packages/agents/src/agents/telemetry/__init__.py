@@ -0,0 +1,39 @@
+"""Telemetry package for metrics and traces of agent and provider behaviour."""
+
+from .factory import create_tracer
+from .metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    Metric,
+    MetricsRegistry,
+)
+from .tracing import (
+    JSONLinesExporter,
+    RingBufferExporter,
+    Span,
+    SpanExporter,
+    Tracer,
+    request_id_var,
+)
+from .writer import LineWriter
+
+__all__ = [
+    "CONTENT_TYPE",
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "JSONLinesExporter",
+    "LineWriter",
+    "Metric",
+    "MetricsRegistry",
+    "RingBufferExporter",
+    "Span",
+    "SpanExporter",
+    "Tracer",
+    "create_tracer",
+    "request_id_var",
+]
@@ -0,0 +1,15 @@
+"""Factory for creating tracers based on configuration."""
+
+from agents.config import Settings
+
+from .tracing import JSONLinesExporter, RingBufferExporter, SpanExporter, Tracer
+
+
+def create_tracer(settings: Settings) -> Tracer:
+    """Create a tracer, disabled unless tracing is enabled in settings."""
+    if not settings.tracing_enabled:
+        return Tracer()
+    exporters: list[SpanExporter] = [RingBufferExporter(settings.tracing_buffer_traces)]
+    if settings.tracing_export_path:
+        exporters.append(JSONLinesExporter(settings.tracing_export_path))
+    return Tracer(exporters)
@@ -0,0 +1,283 @@
+"""In-process counters, gauges and histograms in the Prometheus text format."""
+
+import math
+import os
+import sys
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from pathlib import Path
+
+# Latency buckets in seconds, from fast cache hits to slow completions
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """A named metric with one value per combination of label values.
+
+    Values can also be computed when the metric is collected, from a
+    function registered with ``set_function``, for quantities that other
+    components already track.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        """Create a metric without any values."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._functions: dict[LabelValues, Callable[[], float]] = {}
+
+    def value(self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        key = self._key(labels)
+        function = self._functions.get(key)
+        return function() if function is not None else self._values.get(key, 0.0)
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        """Compute the value for the given labels whenever it is collected."""
+        self._functions[self._key(labels)] = function
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, float]]:
+        """Yield ``(suffix, label values, value)`` for every series."""
+        for key, value in self._values.items():
+            yield "", key, value
+        for key, function in self._functions.items():
+            yield "", key, function()
+
+    def render(self) -> Iterator[str]:
+        """Yield the lines of this metric in the Prometheus text format."""
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for suffix, key, value in self.samples():
+            yield f"{self.name}{suffix}{self._labels(key)} {_format_value(value)}"
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            msg = f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            raise ValueError(msg)
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, extra: Iterable[tuple[str, str]] = ()) -> str:
+        pairs = [*zip(self.labelnames, key, strict=True), *extra]
+        if not pairs:
+            return ""
+        inner = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+        return f"{{{inner}}}"
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the count for the given labels."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value for the given labels."""
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the value for the given labels."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Decrease the value for the given labels."""
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Create a histogram with the given upper bucket bounds."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given labels."""
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            # One slot per bucket plus the implicit +Inf bucket
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        """Return the number of observations for the given labels."""
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def value(self, **labels: str) -> float:
+        """Return the sum of the observations for the given labels."""
+        return self._sums.get(self._key(labels), 0.0)
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:  # noqa: ARG002
+        """Histograms are only fed by observations."""
+        msg = "Histograms cannot be computed from a function"
+        raise TypeError(msg)
+
+    def render(self) -> Iterator[str]:
+        """Yield the buckets, sum and count of every series."""
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        yield f"# TYPE {self.name} {self.kind}"
+        bounds = [*map(_format_value, self.buckets), "+Inf"]
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts, strict=True):
+                cumulative += count
+                labels = self._labels(key, [("le", bound)])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = self._labels(key)
+            yield f"{self.name}_sum{labels} {_format_value(self._sums[key])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """A named collection of metrics rendered together.
+
+    Metrics are created on first use and shared by every later caller
+    asking for the same name, so independent components can instrument
+    themselves against the process-wide ``REGISTRY``. Updates are plain
+    dictionary operations, cheap enough for per-chunk use on the event loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, Metric] = {}
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Return the counter called ``name``, creating it if needed."""
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        """Return the gauge called ``name``, creating it if needed."""
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Return the histogram called ``name``, creating it if needed."""
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Histogram(
+                name, documentation, labelnames, buckets
+            )
+        return self._check(metric, Histogram, labelnames)
+
+    def get(self, name: str) -> Metric | None:
+        """Return a registered metric."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def _get[M: Metric](
+        self,
+        kind: type[M],
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+    ) -> M:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = kind(name, documentation, labelnames)
+        return self._check(metric, kind, labelnames)
+
+    @staticmethod
+    def _check[M: Metric](
+        metric: Metric, kind: type[M], labelnames: Sequence[str]
+    ) -> M:
+        if not isinstance(metric, kind) or metric.labelnames != tuple(labelnames):
+            msg = f"Metric {metric.name} is already registered differently"
+            raise ValueError(msg)
+        return metric
+
+
+# Process-wide registry exposed by the API's /metrics endpoint
+REGISTRY = MetricsRegistry()
+
+
+def _resident_memory_bytes() -> float:
+    """Return the resident set size, or the peak where /proc is unavailable."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except OSError:
+        import resource  # noqa: PLC0415
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Reported in bytes on macOS and in kibibytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+REGISTRY.counter(
+    "process_cpu_seconds_total", "User and system CPU time of the process"
+).set_function(time.process_time)
+REGISTRY.gauge(
+    "process_resident_memory_bytes", "Resident memory size of the process"
+).set_function(_resident_memory_bytes)
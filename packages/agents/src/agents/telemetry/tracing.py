@@ -0,0 +1,190 @@
+"""Lightweight spans for timing the stages of a conversation turn."""
+
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .writer import LineWriter
+
+# Id of the request being served, set by the API for every HTTP request
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace.
+
+    Spans started while another span is open become its children and share
+    its trace, conversation and request ids.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    conversation_id: str | None = None
+    request_id: str | None = None
+    start_time: float = 0.0
+    duration_seconds: float | None = None
+    status: str = "ok"
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the span as a JSON-serializable dictionary."""
+        return asdict(self)
+
+
+class SpanExporter(ABC):
+    """Destination for finished spans."""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """Receive a finished span; must not block the event loop for long."""
+
+    def close(self) -> None:
+        """Release resources held by the exporter."""
+        return
+
+
+class RingBufferExporter(SpanExporter):
+    """Keep the spans of the most recent traces in memory.
+
+    At most ``max_traces`` traces are held; starting another one drops the
+    oldest.
+    """
+
+    def __init__(self, max_traces: int = 256) -> None:
+        """Initialize an empty buffer."""
+        self.max_traces = max_traces
+        self._traces: OrderedDict[str, list[Span]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of buffered traces."""
+        return len(self._traces)
+
+    def export(self, span: Span) -> None:
+        """Add a span to its trace."""
+        spans = self._traces.get(span.trace_id)
+        if spans is None:
+            while len(self._traces) >= self.max_traces:
+                self._traces.popitem(last=False)
+            spans = self._traces[span.trace_id] = []
+        spans.append(span)
+
+    def traces(self) -> list[list[Span]]:
+        """Return the spans of every buffered trace, oldest trace first."""
+        return [list(spans) for spans in self._traces.values()]
+
+    def slowest(self, limit: int = 10) -> list[list[Span]]:
+        """Return the completed traces with the longest root spans."""
+        completed = [
+            (root.duration_seconds or 0.0, spans)
+            for spans in self._traces.values()
+            for root in spans
+            if root.parent_id is None
+        ]
+        completed.sort(key=lambda item: item[0], reverse=True)
+        return [list(spans) for _, spans in completed[:limit]]
+
+
+class JSONLinesExporter(SpanExporter):
+    """Append every span as one JSON object per line to a file.
+
+    Lines are written by a background thread, off the event loop.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open the file for appending."""
+        self.path = Path(path)
+        self._writer = LineWriter(self.path)
+
+    def export(self, span: Span) -> None:
+        """Queue the span for writing as one line."""
+        self._writer.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def close(self) -> None:
+        """Write the queued spans and close the file."""
+        self._writer.close()
+
+
+class Tracer:
+    """Create spans and hand them to exporters once they finish.
+
+    A tracer without exporters is disabled, and its spans cost no more than
+    entering an empty context manager.
+    """
+
+    def __init__(self, exporters: Sequence[SpanExporter] = ()) -> None:
+        """Create a tracer exporting to ``exporters``."""
+        self.exporters = list(exporters)
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether spans are recorded."""
+        return bool(self.exporters)
+
+    def exporter[E: SpanExporter](self, kind: type[E]) -> E | None:
+        """Return the first exporter of the given type."""
+        return next((e for e in self.exporters if isinstance(e, kind)), None)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        *,
+        conversation_id: str | None = None,
+        **attributes: Any,  # noqa: ANN401
+    ) -> Iterator[Span | None]:
+        """Time the enclosed block as a span, a child of the current span.
+
+        Yields the span so that attributes can be added while it is open, or
+        None when tracing is disabled. Exceptions mark the span as failed.
+        """
+        if not self.exporters:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            conversation_id=conversation_id
+            or (parent.conversation_id if parent else None),
+            request_id=parent.request_id if parent else request_id_var.get(),
+            start_time=time.time(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_seconds = time.perf_counter() - started
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A generator closed from another context cannot reset it
+                _current_span.set(parent)
+            for exporter in self.exporters:
+                exporter.export(span)
+
+    def close(self) -> None:
+        """Close every exporter."""
+        for exporter in self.exporters:
+            exporter.close()
@@ -0,0 +1,61 @@
+"""Append lines to a file without blocking the caller on disk I/O."""
+
+import logging
+import queue
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class LineWriter:
+    """Append lines to a file from a background thread.
+
+    ``write`` only queues a line, so callers on the event loop never wait
+    for the disk. The thread writes whatever is queued in one batch and
+    flushes the file whenever the queue runs empty.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open the file for appending and start the writer thread."""
+        self.path = Path(path)
+        self._file = self.path.open("a", encoding="utf-8")
+        # None asks the thread to stop once the lines before it are written
+        self._queue: queue.Queue[str | None] = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name=f"line-writer-{self.path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        """Queue a line, which must end with a newline, for writing."""
+        self._queue.put(line)
+
+    def flush(self) -> None:
+        """Wait until every queued line has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write the queued lines, stop the thread and close the file."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                self._file.writelines(line for line in batch if line is not None)
+                self._file.flush()
+            except OSError:
+                logger.exception(
+                    "Failed to write %d lines to %s", len(batch), self.path
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if None in batch:
+                return
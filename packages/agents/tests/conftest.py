@@ -0,0 +1,11 @@
+"""Shared pytest fixtures for the agents package."""
+
+import pytest
+
+from agents.llm import LLMFactory
+
+
+@pytest.fixture(autouse=True)
+def isolated_client_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Give every test its own LLM client pool so clients are not shared."""
+    monkeypatch.setattr(LLMFactory, "_pool", None)
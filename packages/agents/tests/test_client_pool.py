@@ -0,0 +1,111 @@
+"""Tests for shared LLM clients and connection pooling."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from agents.config import Settings
+from agents.llm import ClientPool, LLMFactory
+from agents.llm.providers import GeminiProvider
+
+
+async def _respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def server_url() -> AsyncGenerator[str, None]:
+    """Serve keep-alive HTTP responses on a local port."""
+    server = await asyncio.start_server(_respond, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        yield f"http://127.0.0.1:{port}/"
+
+
+class TestClientPool:
+    """Test cases for ClientPool."""
+
+    def test_clients_shared_per_configuration(self) -> None:
+        """Test that equal configurations share one client."""
+        pool = ClientPool()
+        provider = GeminiProvider()
+        config = {"model": "m", "temperature": 0.0, "max_tokens": 10, "api_key": "k"}
+
+        with patch.object(
+            GeminiProvider, "create_llm", side_effect=MagicMock
+        ) as create:
+            first = pool.get(provider, **config)
+            second = pool.get(provider, **config)
+            other = pool.get(provider, **{**config, "temperature": 0.5})
+            rotated = pool.get(provider, **{**config, "api_key": "k2"})
+            routed = pool.get(provider, **config, base_url="http://router")
+
+        assert first is second
+        assert len({id(c) for c in (first, other, rotated, routed)}) == 4
+        assert create.call_count == 4
+        assert create.call_args.kwargs["transport"] is pool.transport
+        stats = pool.stats()
+        assert (stats.clients, stats.hits, stats.misses) == (4, 1, 4)
+
+    @pytest.mark.asyncio
+    async def test_steady_state_reuses_connections(self, server_url: str) -> None:
+        """Test that clients sharing the transport open no new connections."""
+        pool = ClientPool(max_keepalive_connections=1)
+
+        for _ in range(2):
+            # Closing a client leaves the shared connections open
+            async with httpx.AsyncClient(transport=pool.transport) as client:
+                for _ in range(5):
+                    response = await client.get(server_url)
+                    assert response.text == "ok"
+
+        stats = pool.stats()
+        assert stats.requests == 10
+        assert stats.connections_opened == 1
+        assert stats.reuse_rate == 0.9
+        await pool.aclose()
+
+
+class TestFactoryPooling:
+    """Test cases for client pooling in LLMFactory."""
+
+    def test_factory_reuses_clients(self) -> None:
+        """Test that repeated creation returns the pooled client."""
+        settings = Settings(google_api_key="test-key")
+
+        with patch.object(GeminiProvider, "create_llm", side_effect=MagicMock):
+            first = LLMFactory.create_llm(settings)
+            second = LLMFactory.create_llm(settings)
+
+        assert first is second
+        assert LLMFactory.get_pool(settings).stats().hits == 1
+
+    def test_pooling_can_be_disabled(self) -> None:
+        """Test that every call creates a client when pooling is off."""
+        settings = Settings(google_api_key="test-key", llm_client_pool_enabled=False)
+
+        with patch.object(GeminiProvider, "create_llm", side_effect=MagicMock):
+            first = LLMFactory.create_llm(settings)
+            second = LLMFactory.create_llm(settings)
+
+        assert first is not second
+
+    @pytest.mark.asyncio
+    async def test_aclose_resets_pool(self) -> None:
+        """Test that closing the factory drops the shared pool."""
+        settings = Settings()
+        pool = LLMFactory.get_pool(settings)
+
+        await LLMFactory.aclose()
+
+        assert LLMFactory.get_pool(settings) is not pool
@@ -0,0 +1,83 @@
+"""Tests for per-conversation turn locking."""
+
+import asyncio
+
+import pytest
+
+from agents.memory import ConversationBusyError, ConversationLocks
+
+
+async def _turn(
+    locks: ConversationLocks,
+    conversation_id: str,
+    log: list[str],
+    name: str,
+    delay: float = 0.01,
+) -> None:
+    async with locks.hold(conversation_id):
+        log.append(f"{name} start")
+        await asyncio.sleep(delay)
+        log.append(f"{name} end")
+
+
+class TestConversationLocks:
+    """Test cases for ConversationLocks."""
+
+    @pytest.mark.asyncio
+    async def test_queue_serializes_turns(self) -> None:
+        """Test that turns of one conversation run one after another."""
+        locks = ConversationLocks()
+        log: list[str] = []
+
+        await asyncio.gather(_turn(locks, "c", log, "a"), _turn(locks, "c", log, "b"))
+
+        assert log == ["a start", "a end", "b start", "b end"]
+        stats = locks.stats()
+        assert stats.turns == 2
+        assert stats.queued == 1
+
+    @pytest.mark.asyncio
+    async def test_unrelated_conversations_run_in_parallel(self) -> None:
+        """Test that different conversations do not wait for each other."""
+        locks = ConversationLocks(stripes=1)
+        log: list[str] = []
+
+        await asyncio.gather(_turn(locks, "c1", log, "a"), _turn(locks, "c2", log, "b"))
+
+        assert log[:2] == ["a start", "b start"]
+
+    @pytest.mark.asyncio
+    async def test_reject_policy(self) -> None:
+        """Test that a turn on a busy conversation is rejected."""
+        locks = ConversationLocks(policy="reject")
+        first = asyncio.create_task(_turn(locks, "c", [], "a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ConversationBusyError):
+            await _turn(locks, "c", [], "b")
+
+        await first
+        assert locks.stats().rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_policy(self) -> None:
+        """Test that a new turn cancels the turn already in progress."""
+        locks = ConversationLocks(policy="cancel")
+        log: list[str] = []
+        first = asyncio.create_task(_turn(locks, "c", log, "a", delay=10))
+        await asyncio.sleep(0)
+
+        await _turn(locks, "c", log, "b")
+
+        assert first.cancelled()
+        assert log == ["a start", "b start", "b end"]
+
+    @pytest.mark.asyncio
+    async def test_locks_released_after_turns(self) -> None:
+        """Test that idle conversations keep no lock state."""
+        locks = ConversationLocks()
+
+        await asyncio.gather(*(_turn(locks, f"c{i}", [], "t") for i in range(100)))
+
+        assert len(locks) == 0
+        assert not locks.busy("c1")
@@ -0,0 +1,107 @@
+"""Tests for the offline fake provider."""
+
+import time
+from collections.abc import Iterator
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agents.config import Settings
+from agents.llm import ChunkProfile, FakeChatModel, FakeProvider, LLMFactory
+from agents.llm.fake import fake_response
+
+
+@pytest.fixture
+def fake_provider() -> Iterator[FakeProvider]:
+    """Register a fake provider for the duration of a test."""
+    provider = FakeProvider(response_chars=40, chunk_chars=8)
+    LLMFactory.register_provider(provider)
+    yield provider
+    LLMFactory._providers.pop("fake", None)  # noqa: SLF001
+
+
+def test_fake_response_is_deterministic() -> None:
+    """Responses have the requested length and never vary."""
+    assert len(fake_response(1000)) == 1000
+    assert fake_response(50) == fake_response(50)
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks() -> None:
+    """Streams are split into chunks of the configured size."""
+    llm = FakeChatModel(response_chars=20, chunk_chars=8)
+    stream = llm.astream([HumanMessage("hi")])
+    chunks = [c.content async for c in stream if c.content]
+
+    assert [len(c) for c in chunks] == [8, 8, 4]
+    assert "".join(chunks) == fake_response(20)
+
+
+@pytest.mark.asyncio
+async def test_empty_response() -> None:
+    """An empty response streams no chunks and completes with no content."""
+    empty = ChunkProfile(delays=(), sizes=())
+    for llm in (
+        FakeChatModel(response_chars=0),
+        FakeChatModel(profile_for=lambda _: empty),
+    ):
+        stream = llm.astream([HumanMessage("hi")])
+        chunks = [c.content async for c in stream if c.content]
+
+        assert chunks == []
+        assert (await llm.ainvoke([HumanMessage("hi")])).content == ""
+
+
+@pytest.mark.asyncio
+async def test_stream_pacing() -> None:
+    """The first chunk is delayed, later chunks follow at the chunk rate."""
+    llm = FakeChatModel(
+        response_chars=12,
+        chunk_chars=4,
+        chunks_per_second=100,
+        first_token_delay_seconds=0.05,
+    )
+    started = time.perf_counter()
+    stream = llm.astream([HumanMessage("hi")])
+    await anext(stream)
+    first = time.perf_counter() - started
+    async for _ in stream:
+        pass
+    total = time.perf_counter() - started
+
+    assert first >= 0.05
+    assert total >= 0.07
+
+
+@pytest.mark.asyncio
+async def test_complete_response() -> None:
+    """Complete responses contain the whole text."""
+    llm = FakeChatModel(response_chars=30)
+    result = await llm.ainvoke([HumanMessage("hi")])
+
+    assert result.content == fake_response(30)
+
+
+def test_factory_creates_fake_llm(fake_provider: FakeProvider) -> None:
+    """A registered fake provider is selected without an API key."""
+    settings = Settings(llm_provider="fake", google_api_key="")
+
+    llm = LLMFactory.create_llm(settings)
+
+    assert isinstance(llm, FakeChatModel)
+    assert llm.chunk_chars == fake_provider.chunk_chars
+    assert LLMFactory.get_llm_config(settings)["model"] == "fake"
+
+
+@pytest.mark.asyncio
+async def test_profile_is_reproduced() -> None:
+    """A selected profile sets the chunk sizes and delays."""
+    profile = ChunkProfile(delays=(0.03, 0.0, 0.01), sizes=(2, 5, 3))
+    llm = FakeChatModel(profile_for=lambda _: profile)
+
+    started = time.perf_counter()
+    stream = llm.astream([HumanMessage("hi")])
+    chunks = [c.content async for c in stream if c.content]
+
+    assert [len(c) for c in chunks] == [2, 5, 3]
+    assert time.perf_counter() - started >= 0.04
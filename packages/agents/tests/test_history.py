@@ -0,0 +1,119 @@
+"""Tests for bounded conversation history."""
+
+import pytest
+
+from agents.llm.tokens import MESSAGE_TOKEN_OVERHEAD
+from agents.memory import ConversationHistory
+
+
+def _message(role: str, content: str) -> dict[str, str]:
+    return {"role": role, "content": content}
+
+
+class TestConversationHistory:
+    """Test cases for ConversationHistory."""
+
+    def test_system_message_is_pinned(self) -> None:
+        """Test that the system message is kept outside the ring."""
+        history = ConversationHistory(max_messages=2)
+        history.append(_message("system", "prompt"))
+        for i in range(5):
+            history.append(_message("user", str(i)))
+
+        assert len(history) == 3
+        assert history[0]["role"] == "system"
+        assert [m["content"] for m in history] == ["prompt", "3", "4"]
+
+    def test_append_returns_displaced_message(self) -> None:
+        """Test that appending to a full ring reports the dropped message."""
+        history = ConversationHistory(max_messages=1)
+
+        assert history.append(_message("user", "a")) is None
+        displaced = history.append(_message("user", "b"))
+
+        assert displaced is not None
+        assert displaced["content"] == "a"
+
+    def test_window_includes_system_within_limit(self) -> None:
+        """Test that windows lead with the system message and count it."""
+        history = ConversationHistory()
+        history.append(_message("system", "prompt"))
+        for i in range(10):
+            history.append(_message("user", str(i)))
+
+        window = list(history.window(3))
+
+        assert [m["content"] for m in window] == ["prompt", "8", "9"]
+
+    def test_window_shorter_than_limit(self) -> None:
+        """Test windows over histories smaller than the limit."""
+        history = ConversationHistory()
+        history.append(_message("user", "only"))
+
+        assert [m["content"] for m in history.window(5)] == ["only"]
+
+    def test_getitem_bounds(self) -> None:
+        """Test positional access and negative indices."""
+        history = ConversationHistory()
+        history.append(_message("system", "prompt"))
+        history.append(_message("user", "hello"))
+
+        assert history[-1]["content"] == "hello"
+        assert history[-2]["role"] == "system"
+        with pytest.raises(IndexError):
+            history[2]
+
+    def test_token_counts_are_cached(self) -> None:
+        """Test that each message is counted exactly once."""
+        counted: list[str] = []
+
+        def counter(text: str) -> int:
+            counted.append(text)
+            return len(text)
+
+        history = ConversationHistory(token_counter=counter)
+        history.append(_message("user", "abc"))
+        history.append(_message("assistant", "de"))
+        list(history.window(10, token_budget=100))
+        list(history.window(10, token_budget=5))
+
+        assert counted == ["abc", "de"]
+        assert history.tokens == 5 + 2 * MESSAGE_TOKEN_OVERHEAD
+
+    def test_window_respects_token_budget(self) -> None:
+        """Test that the window keeps the longest tail within the budget."""
+        history = ConversationHistory(token_counter=len)
+        history.append(_message("system", "s" * 6))
+        for content in ("a" * 10, "b" * 6, "c" * 6, "d" * 6):
+            history.append(_message("user", content))
+
+        # System costs 10, each short message 10, the long message 14
+        window = list(history.window(10, token_budget=30))
+
+        assert [m["content"][0] for m in window] == ["s", "c", "d"]
+
+    def test_token_budget_after_ring_wraps(self) -> None:
+        """Test prefix sums once old messages have left the ring."""
+        history = ConversationHistory(max_messages=3, token_counter=len)
+        for content in ("a" * 100, "b" * 6, "c" * 6, "d" * 6):
+            history.append(_message("user", content))
+
+        assert [m["content"][0] for m in history.window(10, token_budget=30)] == [
+            "b",
+            "c",
+            "d",
+        ]
+        assert [m["content"][0] for m in history.window(10, token_budget=20)] == [
+            "c",
+            "d",
+        ]
+
+    def test_message_limit_applies_with_budget(self) -> None:
+        """Test that the message limit still caps a generous token budget."""
+        history = ConversationHistory(token_counter=len)
+        for i in range(10):
+            history.append(_message("user", str(i)))
+
+        window = list(history.window(2, token_budget=1_000))
+
+        assert [m["content"] for m in window] == ["8", "9"]
@@ -0,0 +1,47 @@
+"""Tests for the lazily imported package exports."""
+
+import subprocess
+import sys
+
+import pytest
+
+import agents
+import agents.chat
+import agents.llm
+from agents.chat.llm_agent import LLMChatAgent
+
+
+def _loaded_modules(statement: str) -> set[str]:
+    """Return the modules loaded by running ``statement`` in a new process."""
+    script = f"import sys; {statement}; print(' '.join(sys.modules))"
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    ).stdout
+    return set(output.split())
+
+
+def test_subpackages_do_not_load_langgraph() -> None:
+    """Light subpackages and their exports do not pull in LangChain."""
+    modules = _loaded_modules(
+        "import agents.config, agents.telemetry; "
+        "from agents.memory import ConversationBusyError; "
+        "from agents.cache import IdempotencyConflictError"
+    )
+
+    assert "langgraph" not in modules
+    assert "agents.chat.llm_agent" not in modules
+    assert "langchain_core" not in modules
+
+
+def test_exports_resolve_on_access() -> None:
+    """Exports are the objects defined in their modules, aliases included."""
+    assert agents.LLMChatAgent is LLMChatAgent
+    assert agents.chat.ChatAgent is LLMChatAgent
+    assert agents.llm.LLMFactory.__module__ == "agents.llm.factory"
+    assert all(hasattr(agents.llm, name) for name in agents.llm.__all__)
+
+
+def test_unknown_attribute() -> None:
+    """Names that are not exported raise AttributeError."""
+    with pytest.raises(AttributeError, match="no attribute 'Missing'"):
+        _ = agents.llm.Missing
@@ -1,5 +1,8 @@
 """Tests for LLMChatAgent functionality."""
 
+import asyncio
+import gc
+import weakref
 from collections.abc import AsyncGenerator
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -7,6 +10,8 @@ import pytest
 
 from agents.chat import LLMChatAgent
 from agents.config import Settings
+from agents.memory import InMemoryConversationStore
+from agents.telemetry import REGISTRY
 
 
 class TestLLMChatAgent:
@@ -115,3 +120,211 @@ class TestLLMChatAgent:
 
         # Verify the memory limit setting is correctly configured
         assert agent.settings.conversation_memory_limit == 4
+
+    @pytest.mark.asyncio
+    async def test_bounded_conversation_store(
+        self, mock_settings: Settings, mock_llm: MagicMock
+    ) -> None:
+        """Test that the agent evicts conversations beyond the store limits."""
+        store = InMemoryConversationStore(max_conversations=1)
+        with (
+            patch("agents.chat.llm_agent.get_settings", return_value=mock_settings),
+            patch("agents.chat.llm_agent.LLMFactory.create_llm", return_value=mock_llm),
+        ):
+            agent = LLMChatAgent(conversation_store=store)
+
+        await agent.get_response("Hello", "first")
+        await agent.get_response("Hello", "second")
+
+        assert "first" not in agent.conversations
+        assert "second" in agent.conversations
+        assert store.stats().evictions == 1
+        checkpoint = agent.memory.get({"configurable": {"thread_id": "first"}})
+        assert checkpoint is None
+
+    @pytest.mark.asyncio
+    async def test_history_bounded_by_memory_limit(
+        self, mock_settings: Settings, mock_llm: MagicMock
+    ) -> None:
+        """Test that stored history is trimmed to the memory limit."""
+        mock_settings.conversation_memory_limit = 4
+        with (
+            patch("agents.chat.llm_agent.get_settings", return_value=mock_settings),
+            patch("agents.chat.llm_agent.LLMFactory.create_llm", return_value=mock_llm),
+        ):
+            agent = LLMChatAgent()
+
+        for i in range(6):
+            await agent.get_response(f"Message {i}", "bounded")
+
+        messages = agent.conversations["bounded"]
+        assert len(messages) == 5  # system + 4 most recent messages
+        assert messages[0]["role"] == "system"
+        assert messages[-2]["content"] == "Message 5"
+
+        prompt = mock_llm.ainvoke.call_args.args[0]
+        assert len(prompt) == 4
+        assert prompt[-1].content == "Message 5"
+
+    @pytest.mark.asyncio
+    async def test_token_budget_windowing(
+        self, mock_settings: Settings, mock_llm: MagicMock
+    ) -> None:
+        """Test that long messages are dropped from the prompt by token budget."""
+        mock_settings.agent_system_prompt = "Be brief."
+        mock_settings.conversation_token_budget = 50
+        with (
+            patch("agents.chat.llm_agent.get_settings", return_value=mock_settings),
+            patch("agents.chat.llm_agent.LLMFactory.create_llm", return_value=mock_llm),
+        ):
+            agent = LLMChatAgent()
+
+        await agent.get_response("x" * 400, "budget")
+        await agent.get_response("Short question", "budget")
+
+        prompt = mock_llm.ainvoke.call_args.args[0]
+        assert [m.content for m in prompt] == [
+            "Be brief.",
+            "Test response",
+            "Short question",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_idempotent_retry(
+        self, agent: LLMChatAgent, mock_llm: MagicMock
+    ) -> None:
+        """Test that a retried request returns the first result without a rerun."""
+        first = await agent.get_response("Hello", "retry", idempotency_key="abc")
+        second = await agent.get_response("Hello", "retry", idempotency_key="abc")
+
+        assert first == second == "Test response"
+        mock_llm.ainvoke.assert_awaited_once()
+        assert len(agent.conversations["retry"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_turns_see_previous_turn(
+        self, agent: LLMChatAgent, mock_llm: MagicMock
+    ) -> None:
+        """Test that parallel turns on one conversation do not interleave."""
+        prompts = []
+
+        async def async_stream(messages, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ANN001, ANN003, ARG001
+            prompts.append([m.content for m in messages])
+            await asyncio.sleep(0.01)
+            yield MagicMock(content="Test response")
+
+        mock_llm.astream = async_stream
+
+        async def consume(message: str) -> None:
+            _ = [chunk async for chunk in agent.stream_response(message, "parallel")]
+
+        await asyncio.gather(consume("First"), consume("Second"))
+
+        # The second turn is generated against the completed first turn
+        assert prompts[1][1:] == ["First", "Test response", "Second"]
+
+    @pytest.mark.asyncio
+    async def test_closed_stream_records_interrupted_turn(
+        self, agent: LLMChatAgent, mock_llm: MagicMock
+    ) -> None:
+        """Test that closing a stream early stops it and keeps the partial turn."""
+        stopped = asyncio.Event()
+
+        async def async_stream(*args, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ARG001, ANN002, ANN003
+            try:
+                yield MagicMock(content="Once upon")
+                await asyncio.sleep(10)
+                yield MagicMock(content=" a time")
+            finally:
+                stopped.set()
+
+        mock_llm.astream = async_stream
+        stream = agent.stream_response("Tell me a story", "closed")
+
+        assert await anext(stream) == "Once upon"
+        await stream.aclose()
+
+        await asyncio.wait_for(stopped.wait(), 1)
+        assert agent.conversations["closed"][-1]["content"] == (
+            f"Once upon\n\n{agent.INTERRUPTED_MARKER}"
+        )
+        assert agent.stats().interrupted == 1
+        assert not agent.locks.busy("closed")
+
+    @pytest.mark.asyncio
+    async def test_cancelled_stream_records_interrupted_turn(
+        self, agent: LLMChatAgent, mock_llm: MagicMock
+    ) -> None:
+        """Test that cancelling the consuming task records the partial turn."""
+        started = asyncio.Event()
+
+        async def async_stream(*args, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ARG001, ANN002, ANN003
+            started.set()
+            await asyncio.sleep(10)
+            yield MagicMock(content="never")
+
+        mock_llm.astream = async_stream
+
+        async def consume() -> None:
+            _ = [chunk async for chunk in agent.stream_response("Hi", "cancelled")]
+
+        task = asyncio.create_task(consume())
+        await started.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert agent.conversations["cancelled"][-1] == {
+            "role": "assistant",
+            "content": agent.INTERRUPTED_MARKER,
+        }
+
+    @pytest.mark.asyncio
+    async def test_stream_metrics(self, agent: LLMChatAgent) -> None:
+        """Test that a streamed turn records its timing and outcome."""
+        turns = REGISTRY.counter("agent_turns_total", "", ["mode", "outcome"]).value(
+            mode="stream", outcome="ok"
+        )
+        first_chunks = REGISTRY.histogram("agent_stream_first_chunk_seconds", "")
+        gaps = REGISTRY.histogram("agent_stream_chunk_gap_seconds", "")
+        provider = REGISTRY.histogram(
+            "llm_provider_first_chunk_seconds", "", ["provider"]
+        )
+        counts = (first_chunks.count(), gaps.count(), provider.count(provider="gemini"))
+
+        _ = [chunk async for chunk in agent.stream_response("Hi", "metrics")]
+
+        assert (
+            REGISTRY.counter("agent_turns_total", "", ["mode", "outcome"]).value(
+                mode="stream", outcome="ok"
+            )
+            == turns + 1
+        )
+        assert first_chunks.count() == counts[0] + 1
+        assert gaps.count() == counts[1] + 1
+        assert provider.count(provider="gemini") == counts[2] + 1
+        assert REGISTRY.gauge("agent_streams_in_flight", "").value() == 0
+        assert REGISTRY.gauge("agent_conversations", "").value() == 1
+
+    @pytest.mark.asyncio
+    async def test_store_gauges_release_the_store(
+        self, mock_settings: Settings, mock_llm: MagicMock
+    ) -> None:
+        """Test that the store gauges do not keep a dropped agent's store."""
+        with (
+            patch("agents.chat.llm_agent.get_settings", return_value=mock_settings),
+            patch("agents.chat.llm_agent.LLMFactory.create_llm", return_value=mock_llm),
+        ):
+            agent = LLMChatAgent()
+        await agent.get_response("Hi", "released")
+        store = weakref.ref(agent.conversations)
+        gauge = REGISTRY.gauge("agent_conversations", "")
+        assert gauge.value() == 1
+
+        await agent.aclose()
+        del agent
+        # Let the cancelled sweeper task release its frames first
+        await asyncio.sleep(0)
+        gc.collect()
+
+        assert store() is None
+        assert gauge.value() == 0
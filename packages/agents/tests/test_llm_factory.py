@@ -6,7 +6,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from agents.config import Settings
-from agents.llm import LLMFactory
+from agents.llm import LLMFactory, estimate_tokens
 from agents.llm.providers import GeminiProvider, LLMProvider
 
 
@@ -115,3 +115,27 @@ class TestGeminiProvider:
                 temperature=0.5,
                 max_tokens=4096,
             )
+
+
+class TestTokenCounters:
+    """Test cases for provider token counters."""
+
+    def test_estimate_tokens(self) -> None:
+        """Test the character-based fallback estimate."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+
+    def test_default_provider_uses_estimate(self) -> None:
+        """Test that providers without a tokenizer fall back to the estimate."""
+        counter = GeminiProvider().create_token_counter(model="gemini-2.0-flash-exp")
+
+        assert counter is estimate_tokens
+
+    def test_factory_token_counter(self) -> None:
+        """Test creating a token counter from settings."""
+        settings = Settings(llm_provider="gemini")
+
+        counter = LLMFactory.create_token_counter(settings)
+
+        assert counter("a" * 40) == 10
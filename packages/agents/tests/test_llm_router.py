@@ -0,0 +1,135 @@
+"""Tests for latency-aware provider routing."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agents.config import Settings
+from agents.llm import LLMFactory, LLMProvider, RoutingChatModel
+
+MESSAGES = [HumanMessage(content="Hi")]
+
+
+def make_llm(name: str, delay: float = 0.0, *, fail: bool = False) -> MagicMock:
+    """Create a mock chat model answering with its name after a delay."""
+    llm = MagicMock()
+    llm.calls = 0
+    llm.cancelled = False
+
+    async def astream(*args, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ARG001, ANN002, ANN003
+        llm.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            llm.cancelled = True
+            raise
+        if fail:
+            msg = f"{name} failed"
+            raise RuntimeError(msg)
+        yield MagicMock(content=name)
+
+    async def ainvoke(*args, **kwargs) -> MagicMock:  # noqa: ANN002, ANN003
+        chunks = [chunk async for chunk in astream(*args, **kwargs)]
+        return chunks[0]
+
+    llm.astream = astream
+    llm.ainvoke = ainvoke
+    return llm
+
+
+async def collect(model: RoutingChatModel) -> list[str]:
+    """Return the chunk contents streamed by a model."""
+    return [chunk.content async for chunk in model.astream(MESSAGES)]
+
+
+class TestRoutingChatModel:
+    """Test cases for RoutingChatModel."""
+
+    @pytest.mark.asyncio
+    async def test_routes_to_fastest_provider(self) -> None:
+        """Test that measured latency decides which provider is tried first."""
+        slow, fast = make_llm("slow", 0.05), make_llm("fast", 0.0)
+        model = RoutingChatModel({"slow": slow, "fast": fast})
+
+        # Both providers are measured once before latency decides
+        await collect(model)
+        await collect(model)
+        assert model.ranked() == ["fast", "slow"]
+
+        assert await collect(model) == ["fast"]
+        assert slow.calls == 1
+        assert model.stats()["slow"].ttft_seconds > model.stats()["fast"].ttft_seconds
+
+    @pytest.mark.asyncio
+    async def test_fails_over_before_first_token(self) -> None:
+        """Test that a failing provider is skipped and marked unhealthy."""
+        broken, backup = make_llm("broken", fail=True), make_llm("backup")
+        model = RoutingChatModel({"broken": broken, "backup": backup})
+
+        assert await collect(model) == ["backup"]
+        stats = model.stats()
+        assert stats["broken"].failures == 1
+        assert not stats["broken"].healthy
+        assert model.ranked() == ["backup", "broken"]
+
+    @pytest.mark.asyncio
+    async def test_all_providers_failing_raises(self) -> None:
+        """Test that the last error is raised when every provider fails."""
+        model = RoutingChatModel(
+            {"a": make_llm("a", fail=True), "b": make_llm("b", fail=True)}
+        )
+
+        with pytest.raises(RuntimeError, match="b failed"):
+            await model.ainvoke(MESSAGES)
+
+    @pytest.mark.asyncio
+    async def test_hedged_request_cancels_loser(self) -> None:
+        """Test that a slow first token triggers a hedge and the loser stops."""
+        slow, fast = make_llm("slow", 1.0), make_llm("fast", 0.0)
+        model = RoutingChatModel({"slow": slow, "fast": fast}, hedge_delay_seconds=0.01)
+
+        assert await collect(model) == ["fast"]
+        await asyncio.sleep(0)
+        assert slow.cancelled
+        assert model.stats()["fast"].hedges == 1
+
+    @pytest.mark.asyncio
+    async def test_ainvoke_routes(self) -> None:
+        """Test that complete responses are routed too."""
+        model = RoutingChatModel({"only": make_llm("only")})
+
+        response = await model.ainvoke(MESSAGES)
+
+        assert response.content == "only"
+        assert model.stats()["only"].requests == 1
+
+
+class TestCreateRoutingLLM:
+    """Test cases for building the router from settings."""
+
+    def test_router_built_from_settings(self) -> None:
+        """Test that every listed provider gets its own configured model."""
+        settings = Settings(
+            google_api_key="g-key",
+            openai_api_key="o-key",
+            llm_routing_providers=["gemini", "openai"],
+            llm_hedge_delay_seconds=0.5,
+        )
+        created = {}
+
+        def create_llm(self: LLMProvider, **kwargs: str | float) -> AsyncMock:
+            created[self.provider_name] = kwargs["model"]
+            return AsyncMock()
+
+        with (
+            patch("agents.llm.providers.GeminiProvider.create_llm", create_llm),
+            patch("agents.llm.providers.OpenAIProvider.create_llm", create_llm),
+        ):
+            llm = LLMFactory.create_llm(settings)
+
+        assert isinstance(llm, RoutingChatModel)
+        assert llm.hedge_delay_seconds == 0.5
+        assert created == {"gemini": "gemini-2.0-flash-exp", "openai": "gpt-4o-mini"}
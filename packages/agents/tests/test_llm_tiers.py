@@ -0,0 +1,134 @@
+"""Tests for routing turns between small and large model tiers."""
+
+from collections.abc import AsyncGenerator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from agents.config import Settings
+from agents.llm import HeuristicClassifier, LLMFactory, TieredChatModel
+
+
+def make_llm(content: str) -> MagicMock:
+    """Create a mock chat model answering with the given content."""
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=AIMessage(content=content))
+
+    async def astream(*args, **kwargs) -> AsyncGenerator[AIMessage, None]:  # noqa: ARG001, ANN002, ANN003
+        yield AIMessage(content=content)
+
+    llm.astream = astream
+    return llm
+
+
+class TestHeuristicClassifier:
+    """Test cases for HeuristicClassifier."""
+
+    def test_short_turn_is_small(self) -> None:
+        """Test that a short greeting goes to the small tier."""
+        assert HeuristicClassifier()([HumanMessage(content="Hi there!")]) == "small"
+
+    def test_long_turn_is_large(self) -> None:
+        """Test that a long message goes to the large tier."""
+        classifier = HeuristicClassifier(max_chars=10)
+
+        assert classifier([HumanMessage(content="x" * 11)]) == "large"
+
+    def test_long_history_is_large(self) -> None:
+        """Test that a prompt with many messages goes to the large tier."""
+        messages: list[BaseMessage] = [HumanMessage(content="ok")] * 4
+
+        assert HeuristicClassifier(max_messages=3)(messages) == "large"
+
+    def test_keywords_are_large(self) -> None:
+        """Test that keyword rules match whole words regardless of case."""
+        classifier = HeuristicClassifier(large_keywords=["debug"])
+
+        assert classifier([HumanMessage(content="Please DEBUG this")]) == "large"
+        assert classifier([HumanMessage(content="debugger?")]) == "small"
+
+
+class TestTieredChatModel:
+    """Test cases for TieredChatModel."""
+
+    @pytest.mark.asyncio
+    async def test_dispatches_and_records_latency(self) -> None:
+        """Test that turns go to their tier and each tier is timed."""
+        model = TieredChatModel(
+            {"small": make_llm("fast"), "large": make_llm("smart")},
+            HeuristicClassifier(large_keywords=["explain"]),
+        )
+
+        small = await model.ainvoke([HumanMessage(content="Hello")])
+        chunks = [
+            chunk.content
+            async for chunk in model.astream([HumanMessage(content="Explain it")])
+        ]
+
+        assert small.content == "fast"
+        assert chunks == ["smart"]
+        stats = model.stats()
+        assert (stats["small"].requests, stats["small"].completed) == (1, 1)
+        assert (stats["large"].requests, stats["large"].streams) == (1, 1)
+        assert stats["large"].mean_first_token_seconds >= 0
+
+    @pytest.mark.asyncio
+    async def test_custom_classifier(self) -> None:
+        """Test that a custom classifier picks the tier."""
+        large = make_llm("smart")
+        model = TieredChatModel(
+            {"small": make_llm("fast"), "large": large}, lambda _: "large"
+        )
+
+        response = await model.ainvoke([HumanMessage(content="Hi")])
+
+        assert response.content == "smart"
+        large.ainvoke.assert_awaited_once()
+
+    def test_unknown_tier_falls_back_to_large(self) -> None:
+        """Test that unknown tier names are served by the large tier."""
+        model = TieredChatModel({"large": make_llm("smart")}, lambda _: "medium")
+
+        assert model.classify([HumanMessage(content="Hi")]) == "large"
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self) -> None:
+        """Test that failed calls are recorded against their tier."""
+        small = make_llm("fast")
+        small.ainvoke = AsyncMock(side_effect=RuntimeError("down"))
+        model = TieredChatModel({"small": small, "large": make_llm("smart")})
+
+        with pytest.raises(RuntimeError):
+            await model.ainvoke([HumanMessage(content="Hi")])
+
+        assert model.stats()["small"].failures == 1
+
+
+class TestCreateTieredLLM:
+    """Test cases for building the tiers from settings."""
+
+    def test_small_tier_uses_small_model(self) -> None:
+        """Test that the small tier is created with the configured model."""
+        settings = Settings(
+            google_api_key="g-key",
+            llm_tiering_enabled=True,
+            llm_small_model="gemini-flash-lite",
+            llm_tier_max_chars=50,
+        )
+        large = make_llm("smart")
+
+        with patch("agents.llm.providers.GeminiProvider.create_llm") as create:
+            model = LLMFactory.create_tiered_llm(settings, large)
+
+        assert create.call_args.kwargs["model"] == "gemini-flash-lite"
+        assert model.tiers["large"] is large
+        assert isinstance(model.classifier, HeuristicClassifier)
+        assert model.classifier.max_chars == 50
+
+    def test_small_model_required(self) -> None:
+        """Test that tiering without a small model is rejected."""
+        settings = Settings(google_api_key="g-key", llm_tiering_enabled=True)
+
+        with pytest.raises(ValueError, match="llm_small_model"):
+            LLMFactory.create_tiered_llm(settings, make_llm("smart"))
@@ -0,0 +1,233 @@
+"""Tests for conversation stores."""
+
+from pathlib import Path
+
+import pytest
+
+from agents.config import Settings
+from agents.memory import (
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+    create_conversation_store,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+def _message(content: str) -> dict[str, str]:
+    return {"role": "user", "content": content}
+
+
+class TestInMemoryConversationStore:
+    """Test cases for InMemoryConversationStore."""
+
+    @pytest.fixture
+    def clock(self) -> FakeClock:
+        """Create a controllable clock."""
+        return FakeClock()
+
+    @pytest.mark.asyncio
+    async def test_append_and_get(self) -> None:
+        """Test storing and reading back a conversation."""
+        store = InMemoryConversationStore()
+
+        await store.append("c1", _message("hello"), _message("world"))
+        messages = await store.get("c1")
+
+        assert messages is not None
+        assert [m["content"] for m in messages] == ["hello", "world"]
+        assert "c1" in store
+        assert len(store) == 1
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_counts(self) -> None:
+        """Test lookup counters."""
+        store = InMemoryConversationStore()
+        await store.append("c1", _message("hello"))
+
+        await store.get("c1")
+        await store.get("missing")
+
+        stats = store.stats()
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert stats.hit_rate == 0.5
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self) -> None:
+        """Test that the conversation cap evicts the coldest conversation."""
+        store = InMemoryConversationStore(max_conversations=2)
+        evicted: list[str] = []
+        store.add_eviction_listener(evicted.append)
+
+        await store.append("c1", _message("a"))
+        await store.append("c2", _message("b"))
+        await store.get("c1")  # c2 is now least recently used
+        await store.append("c3", _message("c"))
+
+        assert evicted == ["c2"]
+        assert "c1" in store
+        assert "c3" in store
+        assert store.stats().evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_evicts_over_byte_budget(self) -> None:
+        """Test that the byte budget evicts other conversations first."""
+        store = InMemoryConversationStore(max_bytes=1000)
+
+        await store.append("c1", _message("x" * 400))
+        await store.append("c2", _message("y" * 400))
+
+        assert "c1" not in store
+        assert "c2" in store
+        assert store.stats().bytes <= 1000
+
+    @pytest.mark.asyncio
+    async def test_expired_conversation_is_a_miss(self, clock: FakeClock) -> None:
+        """Test that idle conversations past the TTL are not served."""
+        store = InMemoryConversationStore(ttl_seconds=10, clock=clock)
+        await store.append("c1", _message("hello"))
+
+        clock.now = 11
+        assert await store.get("c1") is None
+        assert store.stats().expirations == 1
+
+    @pytest.mark.asyncio
+    async def test_sweep_removes_only_idle(self, clock: FakeClock) -> None:
+        """Test that a sweep stops at the first live conversation."""
+        store = InMemoryConversationStore(ttl_seconds=10, clock=clock)
+        await store.append("old", _message("a"))
+        clock.now = 5
+        await store.append("new", _message("b"))
+
+        clock.now = 12
+        assert store.sweep() == 1
+        assert "old" not in store
+        assert "new" in store
+
+    @pytest.mark.asyncio
+    async def test_start_and_close_sweeper(self) -> None:
+        """Test background sweeper lifecycle."""
+        store = InMemoryConversationStore(sweep_interval_seconds=0.01)
+
+        await store.start()
+        await store.start()
+        await store.aclose()
+
+
+class TestSQLiteConversationStore:
+    """Test cases for SQLiteConversationStore."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path: Path) -> Path:
+        """Return a temporary database path."""
+        return tmp_path / "conversations.db"
+
+    @pytest.mark.asyncio
+    async def test_persists_across_instances(self, db_path: Path) -> None:
+        """Test that conversations survive a store restart."""
+        store = SQLiteConversationStore(db_path)
+        await store.append("c1", _message("hello"), _message("world"))
+        await store.aclose()
+
+        reopened = SQLiteConversationStore(db_path)
+        messages = await reopened.get("c1")
+        await reopened.aclose()
+
+        assert messages is not None
+        assert [m["content"] for m in messages] == ["hello", "world"]
+
+    @pytest.mark.asyncio
+    async def test_loads_only_trailing_window(self, db_path: Path) -> None:
+        """Test that a cache miss reads only the configured window."""
+        store = SQLiteConversationStore(db_path, window=3)
+        await store.append("c1", *[_message(str(i)) for i in range(10)])
+        await store.aclose()
+
+        reopened = SQLiteConversationStore(db_path, window=3)
+        messages = await reopened.get("c1")
+        await reopened.aclose()
+
+        assert messages is not None
+        assert [m["content"] for m in messages] == ["7", "8", "9"]
+
+    @pytest.mark.asyncio
+    async def test_writes_are_batched(self, db_path: Path) -> None:
+        """Test that queued writes are committed together on flush."""
+        store = SQLiteConversationStore(db_path, flush_interval_seconds=10)
+        await store.append("c1", _message("a"), _message("b"))
+
+        assert store.stats().pending_writes > 0
+        await store.flush()
+        assert store.stats().pending_writes == 0
+        reopened = SQLiteConversationStore(db_path)
+        messages = await reopened.get("c1")
+        await reopened.aclose()
+        await store.aclose()
+
+        assert messages is not None
+        assert [m["content"] for m in messages] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_sync_accessors_see_only_the_cache(self, db_path: Path) -> None:
+        """Test that in, len and indexing do not read from disk."""
+        store = SQLiteConversationStore(db_path)
+        await store.append("c1", _message("hello"))
+        await store.aclose()
+
+        reopened = SQLiteConversationStore(db_path)
+        assert "c1" not in reopened
+        assert len(reopened) == 0
+        with pytest.raises(KeyError):
+            _ = reopened["c1"]
+        await reopened.get("c1")
+
+        assert "c1" in reopened
+        assert len(reopened) == 1
+        assert reopened["c1"][-1]["content"] == "hello"
+        await reopened.aclose()
+
+    @pytest.mark.asyncio
+    async def test_read_your_writes(self, db_path: Path) -> None:
+        """Test that a cache miss sees writes still in the queue."""
+        store = SQLiteConversationStore(db_path, flush_interval_seconds=10)
+        await store.append("c1", _message("queued"))
+
+        messages = await store.get("c1")
+        await store.aclose()
+
+        assert messages is not None
+        assert messages[-1]["content"] == "queued"
+
+    @pytest.mark.asyncio
+    async def test_delete(self, db_path: Path) -> None:
+        """Test deleting a persisted conversation."""
+        store = SQLiteConversationStore(db_path)
+        await store.append("c1", _message("hello"))
+
+        await store.delete("c1")
+
+        assert "c1" not in store
+        assert await store.get("c1") is None
+        await store.aclose()
+
+    def test_factory_selects_sqlite(self, db_path: Path) -> None:
+        """Test that settings select the SQLite backend."""
+        settings = Settings(
+            conversation_store="sqlite", conversation_store_path=str(db_path)
+        )
+
+        store = create_conversation_store(settings)
+
+        assert isinstance(store, SQLiteConversationStore)
+        assert store.window == settings.conversation_memory_limit
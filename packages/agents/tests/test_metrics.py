@@ -0,0 +1,73 @@
+"""Tests for the metrics registry."""
+
+import pytest
+
+from agents.telemetry import REGISTRY, MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test cases for MetricsRegistry."""
+
+    def test_counter_rendering(self) -> None:
+        """Test that counters render one sample per label combination."""
+        registry = MetricsRegistry()
+        calls = registry.counter("calls_total", "Calls made", ["provider"])
+
+        calls.inc(provider="openai")
+        calls.inc(2, provider='we"ird')
+
+        assert registry.render() == (
+            "# HELP calls_total Calls made\n"
+            "# TYPE calls_total counter\n"
+            'calls_total{provider="openai"} 1\n'
+            'calls_total{provider="we\\"ird"} 2\n'
+        )
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        """Test that histogram buckets count every observation up to a bound."""
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value)
+
+        lines = registry.render().splitlines()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_sum 3.65" in lines
+        assert "latency_seconds_count 4" in lines
+        assert latency.count() == 4
+
+    def test_gauge_function(self) -> None:
+        """Test that function-backed gauges are computed when collected."""
+        registry = MetricsRegistry()
+        items: list[int] = []
+        registry.gauge("items", "Items held").set_function(lambda: len(items))
+
+        items.extend([1, 2])
+
+        assert "items 2" in registry.render().splitlines()
+
+    def test_metrics_are_shared_by_name(self) -> None:
+        """Test that asking for a metric again returns the same instance."""
+        registry = MetricsRegistry()
+
+        assert registry.gauge("g", "A gauge") is registry.gauge("g", "A gauge")
+        with pytest.raises(ValueError, match="registered differently"):
+            registry.counter("g", "A gauge")
+
+    def test_label_mismatch(self) -> None:
+        """Test that missing labels are rejected."""
+        counter = MetricsRegistry().counter("c", "Counter", ["provider"])
+
+        with pytest.raises(ValueError, match="takes labels"):
+            counter.inc()
+
+    def test_process_metrics(self) -> None:
+        """Test that the shared registry reports process CPU and memory."""
+        lines = REGISTRY.render().splitlines()
+        values = dict(line.split(" ", 1) for line in lines if line[0] != "#")
+
+        assert float(values["process_cpu_seconds_total"]) > 0
+        assert float(values["process_resident_memory_bytes"]) > 0
@@ -0,0 +1,206 @@
+"""Tests for circuit breakers, deadlines and retries around LLM calls."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agents.config import Settings
+from agents.llm import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    LLMFactory,
+    ResilientChatModel,
+    StreamTimeoutError,
+)
+from agents.llm.resilience import RetryBudget
+
+MESSAGES = [HumanMessage(content="Hi")]
+
+
+def make_stream(
+    *chunks: str, first_delay: float = 0.0, idle_delay: float = 0.0
+) -> MagicMock:
+    """Create a mock chat model streaming chunks after the given delays."""
+    llm = MagicMock()
+
+    async def astream(*args, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ARG001, ANN002, ANN003
+        await asyncio.sleep(first_delay)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(idle_delay)
+            yield MagicMock(content=chunk)
+
+    llm.astream = astream
+    return llm
+
+
+async def collect(model: ResilientChatModel) -> list[str]:
+    """Return the chunk contents streamed by a model."""
+    return [chunk.content async for chunk in model.astream(MESSAGES)]
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+
+    def test_opens_after_threshold_and_recovers(self) -> None:
+        """Test the closed, open, half-open and closed cycle."""
+        now = 0.0
+        changes = []
+        breaker = CircuitBreaker(
+            "gemini", failure_threshold=2, reset_timeout_seconds=10, clock=lambda: now
+        )
+        breaker.add_listener(lambda name, old, new: changes.append((name, old, new)))
+
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.allow()
+
+        now = 10.0
+        assert breaker.allow()
+        # Only one probe is let through while half-open
+        assert not breaker.allow()
+        breaker.record_success()
+
+        assert breaker.state is CircuitState.CLOSED
+        assert [new for _, _, new in changes] == ["open", "half_open", "closed"]
+        stats = breaker.stats()
+        assert stats.opened == 1
+        assert stats.rejected == 2
+
+    def test_failed_probe_reopens(self) -> None:
+        """Test that a failing half-open probe opens the circuit again."""
+        now = 0.0
+        breaker = CircuitBreaker(
+            "gemini", failure_threshold=1, reset_timeout_seconds=5, clock=lambda: now
+        )
+        breaker.record_failure()
+        now = 5.0
+        assert breaker.allow()
+
+        breaker.record_failure()
+
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.allow()
+
+
+class TestResilientChatModel:
+    """Test cases for ResilientChatModel."""
+
+    @pytest.mark.asyncio
+    async def test_first_token_timeout(self) -> None:
+        """Test that a provider sending nothing is cut off."""
+        model = ResilientChatModel(
+            make_stream("late", first_delay=1.0),
+            CircuitBreaker("slow"),
+            first_token_timeout_seconds=0.01,
+            max_retries=0,
+        )
+
+        with pytest.raises(StreamTimeoutError):
+            await collect(model)
+        assert model.stats().timeouts == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_timeout(self) -> None:
+        """Test that a stream stalling between chunks is cut off."""
+        model = ResilientChatModel(
+            make_stream("a", "b", idle_delay=1.0),
+            CircuitBreaker("stall"),
+            idle_timeout_seconds=0.01,
+        )
+        stream = model.astream(MESSAGES)
+
+        assert (await anext(stream)).content == "a"
+        with pytest.raises(StreamTimeoutError):
+            await anext(stream)
+        assert model.breaker.stats().failures == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_until_success(self) -> None:
+        """Test that calls failing before any output are retried."""
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock(
+            side_effect=[RuntimeError("boom"), MagicMock(content="ok")]
+        )
+        model = ResilientChatModel(
+            llm, CircuitBreaker("flaky"), retry_backoff_seconds=0
+        )
+
+        response = await model.ainvoke(MESSAGES)
+
+        assert response.content == "ok"
+        assert model.stats().retries == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_budget_limits_retries(self) -> None:
+        """Test that an exhausted retry budget stops retrying."""
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock(side_effect=RuntimeError("down"))
+        model = ResilientChatModel(
+            llm,
+            CircuitBreaker("down", failure_threshold=100),
+            retry_budget=RetryBudget(ratio=0.0, max_tokens=1),
+            retry_backoff_seconds=0,
+        )
+
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                await model.ainvoke(MESSAGES)
+
+        assert llm.ainvoke.await_count == 4
+        assert model.stats().retries == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_falls_back(self) -> None:
+        """Test that an open circuit sends requests to the fallback at once."""
+        primary = make_stream("primary")
+        breaker = CircuitBreaker("primary", failure_threshold=1)
+        breaker.record_failure()
+        model = ResilientChatModel(primary, breaker, fallback=make_stream("secondary"))
+
+        assert await collect(model) == ["secondary"]
+        assert model.stats().fallbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_without_fallback_fails_fast(self) -> None:
+        """Test that an open circuit raises without calling the provider."""
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock()
+        breaker = CircuitBreaker("primary", failure_threshold=1)
+        breaker.record_failure()
+        model = ResilientChatModel(llm, breaker)
+
+        with pytest.raises(CircuitOpenError):
+            await model.ainvoke(MESSAGES)
+        llm.ainvoke.assert_not_awaited()
+
+
+class TestCreateResilientLLM:
+    """Test cases for building the resilience layer from settings."""
+
+    def test_fallback_provider_from_settings(self) -> None:
+        """Test that the configured fallback provider backs the primary one."""
+        settings = Settings(
+            google_api_key="g-key",
+            openai_api_key="o-key",
+            llm_fallback_provider="openai",
+            llm_first_token_timeout_seconds=5,
+        )
+
+        with (
+            patch("agents.llm.providers.GeminiProvider.create_llm"),
+            patch("agents.llm.providers.OpenAIProvider.create_llm"),
+        ):
+            llm = LLMFactory.create_resilient_llm(settings)
+
+        assert isinstance(llm, ResilientChatModel)
+        assert llm.breaker.name == "gemini"
+        assert llm.first_token_timeout_seconds == 5
+        assert isinstance(llm.fallback, ResilientChatModel)
+        assert llm.fallback.breaker.name == "openai"
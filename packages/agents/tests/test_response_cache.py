@@ -0,0 +1,175 @@
+"""Tests for the two-tier response cache."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agents.cache import CachedChatModel, ResponseCache, create_cached_llm
+from agents.cache.response import make_cache_key
+from agents.config import Settings
+
+MESSAGES = [SystemMessage(content="Be brief."), HumanMessage(content="Hi")]
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache."""
+
+    def test_cache_key_depends_on_inputs(self) -> None:
+        """Test that keys change with the model, parameters and messages."""
+        base = make_cache_key("gemini", "m", {"temperature": 0.0}, MESSAGES)
+
+        assert base == make_cache_key("gemini", "m", {"temperature": 0.0}, MESSAGES)
+        assert base != make_cache_key("gemini", "m2", {"temperature": 0.0}, MESSAGES)
+        assert base != make_cache_key("gemini", "m", {"temperature": 0.5}, MESSAGES)
+        assert base != make_cache_key("gemini", "m", {"temperature": 0.0}, MESSAGES[1:])
+
+    @pytest.mark.asyncio
+    async def test_memory_tier_lru(self) -> None:
+        """Test that the memory tier evicts least recently used entries."""
+        cache = ResponseCache(max_entries=2)
+        await cache.put("a", ["1"])
+        await cache.put("b", ["2"])
+        await cache.get("a")
+        await cache.put("c", ["3"])
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == ("1",)
+        assert cache.stats().entries == 2
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path: Path) -> None:
+        """Test that entries are served from disk by a new cache instance."""
+        await ResponseCache(directory=tmp_path).put("key", ["Hello ", "world"])
+
+        cache = ResponseCache(directory=tmp_path)
+        chunks = await cache.get("key")
+        await cache.get("key")
+
+        assert chunks == ("Hello ", "world")
+        stats = cache.stats()
+        assert stats.disk_hits == 1
+        assert stats.memory_hits == 1
+        assert stats.hit_rate == 1.0
+
+    @pytest.mark.asyncio
+    async def test_expired_disk_entries(self, tmp_path: Path) -> None:
+        """Test that expired disk entries are ignored and pruned."""
+        await ResponseCache(directory=tmp_path).put("key", ["old"])
+        cache = ResponseCache(directory=tmp_path, disk_ttl_seconds=-1)
+
+        assert await cache.get("key") is None
+        assert cache.prune() == 1
+
+    @pytest.mark.asyncio
+    async def test_started_cache_prunes_disk_tier(self, tmp_path: Path) -> None:
+        """Test that a started cache deletes expired disk entries periodically."""
+        cache = ResponseCache(
+            directory=tmp_path, disk_ttl_seconds=0.05, prune_interval_seconds=0.05
+        )
+        await cache.start()
+        await cache.put("key", ["old"])
+        await asyncio.sleep(0.3)
+        await cache.aclose()
+
+        # Nothing expired is left to delete
+        assert cache.prune() == 0
+
+
+class TestCachedChatModel:
+    """Test cases for CachedChatModel."""
+
+    @pytest.fixture
+    def mock_llm(self) -> MagicMock:
+        """Create a mock LLM that records its calls."""
+        mock = MagicMock()
+        mock.ainvoke = AsyncMock(return_value=MagicMock(content="Test response"))
+        mock.stream_calls = 0
+
+        async def async_stream(*args, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ARG001, ANN002, ANN003
+            mock.stream_calls += 1
+            yield MagicMock(content="Test ")
+            yield MagicMock(content="response")
+
+        mock.astream = async_stream
+        return mock
+
+    @pytest.fixture
+    def model(self, mock_llm: MagicMock) -> CachedChatModel:
+        """Wrap the mock LLM with a memory-only cache."""
+        return CachedChatModel(
+            mock_llm, ResponseCache(), "gemini", "m", {"temperature": 0.0}
+        )
+
+    @pytest.mark.asyncio
+    async def test_ainvoke_is_cached(
+        self, model: CachedChatModel, mock_llm: MagicMock
+    ) -> None:
+        """Test that a repeated request does not reach the provider."""
+        first = await model.ainvoke(MESSAGES)
+        second = await model.ainvoke(MESSAGES)
+
+        assert first.content == second.content == "Test response"
+        mock_llm.ainvoke.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_chunks(
+        self, model: CachedChatModel, mock_llm: MagicMock
+    ) -> None:
+        """Test that cached streams replay the original chunks."""
+        first = [chunk.content async for chunk in model.astream(MESSAGES)]
+        second = [chunk.content async for chunk in model.astream(MESSAGES)]
+
+        assert first == second == ["Test ", "response"]
+        assert mock_llm.stream_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_is_not_cached(self, mock_llm: MagicMock) -> None:
+        """Test that interrupted streams are not stored."""
+
+        async def failing_stream(*args, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ARG001, ANN002, ANN003
+            yield MagicMock(content="partial")
+            msg = "provider failed"
+            raise RuntimeError(msg)
+
+        mock_llm.astream = failing_stream
+        cache = ResponseCache()
+        model = CachedChatModel(mock_llm, cache, "gemini", "m", {})
+
+        with pytest.raises(RuntimeError):
+            _ = [chunk async for chunk in model.astream(MESSAGES)]
+
+        assert cache.stats().stores == 0
+
+
+class TestCreateCachedLLM:
+    """Test cases for create_cached_llm."""
+
+    def test_disabled_by_default(self) -> None:
+        """Test that the LLM is returned unchanged when caching is off."""
+        llm = MagicMock()
+
+        assert create_cached_llm(llm, Settings()) is llm
+
+    def test_skips_sampled_requests(self) -> None:
+        """Test that non-deterministic temperatures are not cached."""
+        llm = MagicMock()
+        settings = Settings(response_cache_enabled=True, gemini_temperature=0.7)
+
+        assert create_cached_llm(llm, settings) is llm
+
+    def test_wraps_deterministic_requests(self, tmp_path: Path) -> None:
+        """Test that temperature zero requests are cached."""
+        settings = Settings(
+            response_cache_enabled=True,
+            gemini_temperature=0.0,
+            response_cache_dir=str(tmp_path),
+        )
+
+        wrapped = create_cached_llm(MagicMock(), settings)
+
+        assert isinstance(wrapped, CachedChatModel)
+        assert wrapped.cache.directory == tmp_path
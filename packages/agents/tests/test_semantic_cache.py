@@ -0,0 +1,141 @@
+"""Tests for the semantic response cache."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agents.cache import create_semantic_cache  # noqa: E402
+from agents.cache.semantic import (  # noqa: E402
+    HashingEmbedder,
+    SemanticCache,
+    SemanticIndex,
+)
+from agents.chat import LLMChatAgent  # noqa: E402
+from agents.config import Settings  # noqa: E402
+
+
+def _unit_vectors(count: int, dim: int, seed: int = 0) -> "np.ndarray":
+    vectors = np.random.default_rng(seed).standard_normal((count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+class TestHashingEmbedder:
+    """Test cases for HashingEmbedder."""
+
+    def test_deterministic_unit_vectors(self) -> None:
+        """Test that embeddings are stable and normalised."""
+        embedder = HashingEmbedder(dim=64)
+
+        first = embedder.embed(["Reset my password", "What is the weather?"])
+        second = embedder.embed(["Reset my password", "What is the weather?"])
+
+        assert first.shape == (2, 64)
+        np.testing.assert_array_equal(first, second)
+        np.testing.assert_allclose(np.linalg.norm(first, axis=1), 1.0, rtol=1e-5)
+
+    def test_similar_texts_are_close(self) -> None:
+        """Test that shared wording yields higher similarity."""
+        a, b, c = HashingEmbedder().embed(
+            [
+                "How do I reset my password?",
+                "how do i reset my password",
+                "Recommend a good pasta recipe",
+            ]
+        )
+
+        assert float(a @ b) > 0.99
+        assert float(a @ c) < 0.5
+
+
+class TestSemanticIndex:
+    """Test cases for SemanticIndex."""
+
+    def test_exact_scan_finds_nearest(self) -> None:
+        """Test that an exact index returns the best match."""
+        vectors = _unit_vectors(50, 16)
+        index = SemanticIndex(16, capacity=50, hash_bits=0)
+        for i, vector in enumerate(vectors):
+            index.add(vector, str(i))
+
+        value, score = index.search(vectors[7])
+
+        assert value == "7"
+        assert score == pytest.approx(1.0, rel=1e-5)
+
+    def test_partitioned_index_finds_duplicates(self) -> None:
+        """Test that partitioned lookups still find stored vectors."""
+        vectors = _unit_vectors(2_000, 32)
+        index = SemanticIndex(32, capacity=2_000, hash_bits=4)
+        for i, vector in enumerate(vectors):
+            index.add(vector, str(i))
+
+        found = [index.search(vectors[i])[0] for i in range(0, 2_000, 100)]
+
+        assert found == [str(i) for i in range(0, 2_000, 100)]
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that a full index drops the entry unused for longest."""
+        vectors = _unit_vectors(3, 8)
+        index = SemanticIndex(8, capacity=2, hash_bits=1)
+        index.add(vectors[0], "a")
+        index.add(vectors[1], "b")
+        index.search(vectors[0])
+        index.add(vectors[2], "c")
+
+        assert len(index) == 2
+        assert index.evictions == 1
+        assert index.search(vectors[1])[0] != "b"
+        assert index.search(vectors[0])[0] == "a"
+
+
+class TestSemanticCache:
+    """Test cases for SemanticCache."""
+
+    @pytest.mark.asyncio
+    async def test_threshold(self) -> None:
+        """Test that only sufficiently similar messages hit."""
+        cache = SemanticCache(HashingEmbedder(), threshold=0.9)
+        await cache.store("How do I reset my password?", "Use the reset link.")
+
+        assert await cache.lookup("how do I reset my password") == "Use the reset link."
+        assert await cache.lookup("Recommend a pasta recipe") is None
+
+        stats = cache.stats()
+        assert stats.lookups == 2
+        assert stats.hits == 1
+        assert stats.entries == 1
+        assert stats.max_lookup_seconds >= stats.last_lookup_seconds
+
+    def test_factory_disabled_by_default(self) -> None:
+        """Test that the semantic cache is opt-in."""
+        assert create_semantic_cache(Settings()) is None
+
+    @pytest.mark.asyncio
+    async def test_agent_serves_similar_first_turns(self) -> None:
+        """Test that the agent answers paraphrased opening messages from cache."""
+        settings = Settings(google_api_key="test-key", semantic_cache_enabled=True)
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = MagicMock(side_effect=self._answer)
+        with (
+            patch("agents.chat.llm_agent.get_settings", return_value=settings),
+            patch("agents.chat.llm_agent.LLMFactory.create_llm", return_value=mock_llm),
+        ):
+            agent = LLMChatAgent()
+
+        first = await agent.get_response("How do I reset my password?", "c1")
+        second = await agent.get_response("how do i reset my password", "c2")
+        chunks = [
+            chunk
+            async for chunk in agent.stream_response("How do I reset my password", "c3")
+        ]
+
+        assert first == second == "".join(chunks) == "Use the reset link."
+        assert mock_llm.ainvoke.call_count == 1
+        assert agent.conversations["c2"][-1]["content"] == "Use the reset link."
+
+    @staticmethod
+    async def _answer(*args, **kwargs) -> MagicMock:  # noqa: ARG004, ANN002, ANN003
+        return MagicMock(content="Use the reset link.")
@@ -0,0 +1,237 @@
+"""Tests for request coalescing and idempotent retries."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agents.cache import (
+    CoalescingChatModel,
+    IdempotencyConflictError,
+    IdempotencyRegistry,
+    SingleFlight,
+    create_coalescing_llm,
+)
+from agents.config import Settings
+
+MESSAGES = [HumanMessage(content="Hi")]
+
+
+class TestSingleFlight:
+    """Test cases for SingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_streams_share_one_upstream(self) -> None:
+        """Test that every subscriber receives all chunks of a single call."""
+        calls = 0
+        release = asyncio.Event()
+
+        async def upstream() -> AsyncGenerator[str, None]:
+            nonlocal calls
+            calls += 1
+            yield "Hello "
+            await release.wait()
+            yield "world"
+
+        flight = SingleFlight()
+
+        async def consume() -> list[str]:
+            return [chunk async for chunk in flight.stream("key", upstream)]
+
+        first = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        # A late subscriber still sees chunks produced before it joined
+        second = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await first == await second == ["Hello ", "world"]
+        assert calls == 1
+        stats = flight.stats()
+        assert stats.flights == 1
+        assert stats.coalesced == 1
+        assert stats.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_upstream_error_reaches_all_subscribers(self) -> None:
+        """Test that a failed upstream stream fails every subscriber."""
+
+        async def upstream() -> AsyncGenerator[str, None]:
+            yield "partial"
+            msg = "provider failed"
+            raise RuntimeError(msg)
+
+        flight = SingleFlight()
+        streams = [flight.stream("key", upstream) for _ in range(2)]
+
+        for stream in streams:
+            with pytest.raises(RuntimeError, match="provider failed"):
+                _ = [chunk async for chunk in stream]
+
+    @pytest.mark.asyncio
+    async def test_upstream_cancelled_when_all_subscribers_leave(self) -> None:
+        """Test that abandoning every subscriber stops the upstream call."""
+        cancelled = asyncio.Event()
+
+        async def upstream() -> AsyncGenerator[str, None]:
+            try:
+                yield "first"
+                await asyncio.Event().wait()
+                yield "never"
+            finally:
+                cancelled.set()
+
+        flight = SingleFlight()
+        stream = flight.stream("key", upstream)
+        assert await anext(stream) == "first"
+        await stream.aclose()
+
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert flight.stats().in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_result(self) -> None:
+        """Test that concurrent calls with the same key run once."""
+        calls = 0
+
+        async def upstream() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        flight = SingleFlight()
+        results = await asyncio.gather(
+            *(flight.call("key", upstream) for _ in range(5))
+        )
+
+        assert results == ["answer"] * 5
+        assert calls == 1
+
+
+class TestCoalescingChatModel:
+    """Test cases for CoalescingChatModel."""
+
+    @pytest.mark.asyncio
+    async def test_identical_streams_coalesce(self) -> None:
+        """Test that identical concurrent prompts reach the provider once."""
+        llm = MagicMock()
+        llm.stream_calls = 0
+
+        async def async_stream(*args, **kwargs) -> AsyncGenerator[MagicMock, None]:  # noqa: ARG001, ANN002, ANN003
+            llm.stream_calls += 1
+            await asyncio.sleep(0.01)
+            yield MagicMock(content="Test response")
+
+        llm.astream = async_stream
+        model = CoalescingChatModel(llm, "gemini", "m", {"temperature": 0.7})
+
+        async def consume() -> list[str]:
+            return [chunk.content async for chunk in model.astream(MESSAGES)]
+
+        results = await asyncio.gather(consume(), consume(), consume())
+
+        assert results == [["Test response"]] * 3
+        assert llm.stream_calls == 1
+
+    def test_factory_respects_setting(self) -> None:
+        """Test that coalescing can be switched off."""
+        llm = MagicMock()
+
+        assert isinstance(create_coalescing_llm(llm, Settings()), CoalescingChatModel)
+        settings = Settings(request_coalescing_enabled=False)
+        assert create_coalescing_llm(llm, settings) is llm
+
+
+class TestIdempotencyRegistry:
+    """Test cases for IdempotencyRegistry."""
+
+    @pytest.mark.asyncio
+    async def test_retry_joins_in_flight_call(self) -> None:
+        """Test that a retry waits for the original call instead of rerunning."""
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        registry = IdempotencyRegistry()
+        results = await asyncio.gather(
+            registry.run("key", "request", work), registry.run("key", "request", work)
+        )
+
+        assert results == ["answer", "answer"]
+        assert calls == 1
+        assert registry.replays == 1
+
+    @pytest.mark.asyncio
+    async def test_completed_result_expires(self) -> None:
+        """Test that completed results are replayed only within the TTL."""
+        now = 0.0
+        calls = 0
+
+        async def work() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        registry = IdempotencyRegistry(ttl_seconds=10, clock=lambda: now)
+
+        assert await registry.run("key", "request", work) == 1
+        assert await registry.run("key", "request", work) == 1
+        now = 11.0
+        assert await registry.run("key", "request", work) == 2
+
+    @pytest.mark.asyncio
+    async def test_oldest_completed_keys_dropped_above_limit(self) -> None:
+        """Test that only the oldest completed keys make room for new ones."""
+        calls = 0
+
+        async def work() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        registry = IdempotencyRegistry(max_keys=2)
+        for key in ("a", "b", "c", "d"):
+            await registry.run(key, "request", work)
+
+        assert len(registry) == 3
+        assert await registry.run("c", "request", work) == 3
+        assert await registry.run("a", "request", work) == 5
+
+    @pytest.mark.asyncio
+    async def test_failed_call_is_retried(self) -> None:
+        """Test that a failure is not replayed to retries."""
+        attempts = 0
+
+        async def work() -> str:
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                msg = "provider failed"
+                raise RuntimeError(msg)
+            return "answer"
+
+        registry = IdempotencyRegistry()
+
+        with pytest.raises(RuntimeError):
+            await registry.run("key", "request", work)
+        assert await registry.run("key", "request", work) == "answer"
+
+    @pytest.mark.asyncio
+    async def test_conflicting_request_is_rejected(self) -> None:
+        """Test that reusing a key for another request raises."""
+
+        async def work() -> str:
+            return "answer"
+
+        registry = IdempotencyRegistry()
+        await registry.run("key", "request", work)
+
+        with pytest.raises(IdempotencyConflictError):
+            await registry.run("key", "other request", work)
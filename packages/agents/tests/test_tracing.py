@@ -0,0 +1,177 @@
+"""Tests for tracing spans and exporters."""
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from agents.chat import LLMChatAgent
+from agents.config import Settings
+from agents.telemetry import (
+    JSONLinesExporter,
+    LineWriter,
+    RingBufferExporter,
+    Span,
+    Tracer,
+    request_id_var,
+)
+
+
+def make_span(trace_id: str, duration: float, parent_id: str | None = None) -> Span:
+    """Create a finished span."""
+    return Span(
+        name="s",
+        trace_id=trace_id,
+        span_id=f"{trace_id}-{duration}",
+        parent_id=parent_id,
+        duration_seconds=duration,
+    )
+
+
+class TestTracer:
+    """Test cases for Tracer."""
+
+    def test_nested_spans_share_trace(self) -> None:
+        """Test that child spans inherit the trace, conversation and request."""
+        buffer = RingBufferExporter()
+        tracer = Tracer([buffer])
+        token = request_id_var.set("req-1")
+        try:
+            with (
+                tracer.span("turn", conversation_id="c1") as root,
+                tracer.span("llm", messages=2) as child,
+            ):
+                pass
+        finally:
+            request_id_var.reset(token)
+
+        assert root is not None
+        assert child is not None
+        assert child.trace_id == root.trace_id
+        assert child.parent_id == root.span_id
+        assert child.conversation_id == "c1"
+        assert child.request_id == "req-1"
+        assert child.attributes == {"messages": 2}
+        # Children finish, and are exported, before their parent
+        assert [span.name for span in buffer.traces()[0]] == ["llm", "turn"]
+
+    def test_failed_span(self) -> None:
+        """Test that an exception marks the span as failed."""
+        buffer = RingBufferExporter()
+        tracer = Tracer([buffer])
+        msg = "boom"
+
+        with pytest.raises(ValueError, match=msg), tracer.span("turn"):
+            raise ValueError(msg)
+
+        (span,) = buffer.traces()[0]
+        assert span.status == "error"
+        assert span.error == "ValueError: boom"
+        assert span.duration_seconds is not None
+
+    def test_disabled_tracer(self) -> None:
+        """Test that a tracer without exporters records nothing."""
+        tracer = Tracer()
+
+        with tracer.span("turn") as span:
+            pass
+
+        assert not tracer.enabled
+        assert span is None
+
+
+class TestRingBufferExporter:
+    """Test cases for RingBufferExporter."""
+
+    def test_keeps_recent_traces(self) -> None:
+        """Test that the oldest trace is dropped when the buffer is full."""
+        buffer = RingBufferExporter(max_traces=2)
+
+        for trace_id in ("a", "b", "c"):
+            buffer.export(make_span(trace_id, 1.0))
+
+        assert [spans[0].trace_id for spans in buffer.traces()] == ["b", "c"]
+
+    def test_slowest_completed_traces(self) -> None:
+        """Test that completed traces are ranked by root duration."""
+        buffer = RingBufferExporter()
+        buffer.export(make_span("fast", 0.1))
+        buffer.export(make_span("slow", 2.0))
+        buffer.export(make_span("open", 5.0, parent_id="unfinished-root"))
+
+        slowest = buffer.slowest(limit=5)
+
+        assert [spans[0].trace_id for spans in slowest] == ["slow", "fast"]
+
+
+class TestJSONLinesExporter:
+    """Test cases for JSONLinesExporter."""
+
+    def test_appends_one_line_per_span(self, tmp_path: Path) -> None:
+        """Test that every span is written as a JSON object."""
+        path = tmp_path / "spans.jsonl"
+        exporter = JSONLinesExporter(path)
+        tracer = Tracer([exporter])
+
+        with tracer.span("turn", conversation_id="c1"), tracer.span("llm"):
+            pass
+        tracer.close()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["llm", "turn"]
+        assert lines[0]["conversation_id"] == "c1"
+
+
+class TestLineWriter:
+    """Test cases for LineWriter."""
+
+    def test_writes_queued_lines_in_order(self, tmp_path: Path) -> None:
+        """Test that queued lines reach the file on flush and close."""
+        path = tmp_path / "lines.jsonl"
+        writer = LineWriter(path)
+
+        for i in range(100):
+            writer.write(f"{i}\n")
+        writer.flush()
+        flushed = path.read_text().splitlines()
+        writer.write("last\n")
+        writer.close()
+        writer.close()
+
+        assert flushed == [str(i) for i in range(100)]
+        assert path.read_text().splitlines()[-1] == "last"
+
+
+class TestAgentTracing:
+    """Test cases for the spans recorded by LLMChatAgent."""
+
+    @pytest.mark.asyncio
+    async def test_turn_spans(self) -> None:
+        """Test that nodes, checkpoints and the LLM call are traced."""
+        settings = Settings(google_api_key="test-key", llm_provider="gemini")
+        llm = AsyncMock()
+        llm.ainvoke = AsyncMock(return_value=MagicMock(content="Hi"))
+        buffer = RingBufferExporter()
+        with (
+            patch("agents.chat.llm_agent.get_settings", return_value=settings),
+            patch("agents.chat.llm_agent.LLMFactory.create_llm", return_value=llm),
+        ):
+            agent = LLMChatAgent(tracer=Tracer([buffer]))
+
+        await agent.get_response("Hello", "traced")
+
+        (spans,) = buffer.traces()
+        names = {span.name for span in spans}
+        assert {
+            "turn",
+            "node.process_message",
+            "node.generate_response",
+            "llm.invoke",
+            "checkpoint.read",
+            "checkpoint.write",
+        } <= names
+        assert all(span.conversation_id == "traced" for span in spans)
+        llm_span = next(span for span in spans if span.name == "llm.invoke")
+        node = next(span for span in spans if span.name == "node.generate_response")
+        assert llm_span.parent_id == node.span_id